@@ -0,0 +1,27 @@
+"""Conditional GET helpers.
+
+Endpoints compute an entity tag from version stamps before loading anything
+expensive and answer ``If-None-Match`` with ``304 Not Modified`` when the
+client already has that version.
+"""
+
+from typing import Optional
+
+from fastapi.responses import Response
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of ``etag`` against an ``If-None-Match`` header."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    tag = etag.removeprefix("W/")
+    return any(
+        candidate.strip().removeprefix("W/") == tag
+        for candidate in if_none_match.split(",")
+    )
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag})
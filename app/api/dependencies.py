@@ -0,0 +1,40 @@
+from typing import Optional
+
+from fastapi import Depends, Header, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.database import get_db, get_read_db
+from app.models.user import User
+from app.services.auth_cache import AuthUser, api_key_cache
+
+
+async def authenticate(api_key: str, db: AsyncSession) -> AuthUser:
+    async def load_user():
+        result = await db.execute(
+            select(User.id, User.name).where(User.name == api_key)
+        )
+        row = result.first()
+        return AuthUser(id=row.id, name=row.name) if row else None
+
+    user = await api_key_cache.get(api_key, load_user)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    return user
+
+
+async def get_authenticated_user(
+    api_key: str = Header(...),
+    db: AsyncSession = Depends(get_db),
+) -> AuthUser:
+    return await authenticate(api_key, db)
+
+
+async def get_optional_user(
+    api_key: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_read_db),
+) -> Optional[AuthUser]:
+    """The caller of an endpoint that also answers without an ``api-key``."""
+    if api_key is None:
+        return None
+    return await authenticate(api_key, db)
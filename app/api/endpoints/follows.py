@@ -1,50 +1,89 @@
-from fastapi import APIRouter, Depends, Header, HTTPException
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import and_, case, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 
-from app.database import get_db
+from app.api.dependencies import get_authenticated_user
+from app.api.endpoints.users import (
+    FOLLOW_MAX_PAGE_SIZE,
+    FOLLOW_PAGE_SIZE,
+    list_follow_page,
+)
+from app.database import get_db, get_read_db
 from app.models.follow import Follow
 from app.models.user import User
 from app.schemas.follow import (
+    FollowBatchItem,
+    FollowBatchRequest,
+    FollowBatchResponse,
     FollowResponse,
     GetFollowersResponse,
     GetFollowingResponse,
     UnfollowResponse,
 )
+from app.services.auth_cache import AuthUser
+from app.services.follows import add_follow, add_follows
+from app.services.timeline import keep_on_read, purge_follow
+from app.services.upsert import WriteOutcome
 
 router = APIRouter(prefix="/api/follows", tags=["Follows"])
 
 
+FOLLOW_ERRORS = {
+    WriteOutcome.TARGET_NOT_FOUND: "Target user not found",
+    WriteOutcome.ALREADY_EXISTS: "Already following this user",
+}
+
+
+@router.post("/batch", response_model=FollowBatchResponse)
+async def follow_users(
+    batch: FollowBatchRequest,
+    user: AuthUser = Depends(get_authenticated_user),
+    db: AsyncSession = Depends(get_db),
+):
+    user_ids = list(dict.fromkeys(batch.user_ids))
+    targets = [user_id for user_id in user_ids if user_id != user.id]
+    outcomes = await add_follows(db, user.id, targets) if targets else {}
+    await db.commit()
+
+    results = []
+    for user_id in user_ids:
+        if user_id == user.id:
+            results.append(
+                FollowBatchItem(
+                    user_id=user_id, result=False, detail="Cannot follow yourself"
+                )
+            )
+            continue
+        outcome = outcomes[user_id]
+        results.append(
+            FollowBatchItem(
+                user_id=user_id,
+                result=outcome is WriteOutcome.CREATED,
+                detail=FOLLOW_ERRORS.get(outcome),
+            )
+        )
+
+    return FollowBatchResponse(result=True, results=results)
+
+
 @router.post("/{user_id}", response_model=FollowResponse)
 async def follow_user(
     user_id: int,
-    api_key: str = Header(...),
+    user: AuthUser = Depends(get_authenticated_user),
     db: AsyncSession = Depends(get_db),
 ):
-    user_result = await db.execute(select(User).where(User.name == api_key))
-    user = user_result.scalars().first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-
     if user.id == user_id:
         raise HTTPException(status_code=400, detail="Cannot follow yourself")
 
-    target_user_result = await db.execute(select(User).where(User.id == user_id))
-    target_user = target_user_result.scalars().first()
-    if not target_user:
-        raise HTTPException(status_code=404, detail="Target user not found")
-
-    follow_result = await db.execute(
-        select(Follow).where(
-            Follow.follower_id == user.id, Follow.following_id == user_id
-        )
-    )
-    existing_follow = follow_result.scalars().first()
-    if existing_follow:
-        raise HTTPException(status_code=400, detail="Already following this user")
+    outcome = await add_follow(db, user.id, user_id)
+    if outcome is WriteOutcome.TARGET_NOT_FOUND:
+        raise HTTPException(status_code=404, detail=FOLLOW_ERRORS[outcome])
+    if outcome is WriteOutcome.ALREADY_EXISTS:
+        raise HTTPException(status_code=400, detail=FOLLOW_ERRORS[outcome])
 
-    follow = Follow(follower_id=user.id, following_id=user_id)
-    db.add(follow)
     await db.commit()
 
     return FollowResponse(result=True)
@@ -53,14 +92,9 @@ async def follow_user(
 @router.delete("/{user_id}", response_model=UnfollowResponse)
 async def unfollow_user(
     user_id: int,
-    api_key: str = Header(...),
+    user: AuthUser = Depends(get_authenticated_user),
     db: AsyncSession = Depends(get_db),
 ):
-    user_result = await db.execute(select(User).where(User.name == api_key))
-    user = user_result.scalars().first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-
     follow_result = await db.execute(
         select(Follow).where(
             Follow.follower_id == user.id, Follow.following_id == user_id
@@ -71,56 +105,63 @@ async def unfollow_user(
         raise HTTPException(status_code=400, detail="Not following this user")
 
     await db.delete(follow)
+    await db.execute(
+        update(User)
+        .where(User.id.in_([user.id, user_id]))
+        .values(
+            followers_count=case(
+                (
+                    and_(User.id == user_id, User.followers_count > 0),
+                    User.followers_count - 1,
+                ),
+                else_=User.followers_count,
+            ),
+            following_count=case(
+                (
+                    and_(User.id == user.id, User.following_count > 0),
+                    User.following_count - 1,
+                ),
+                else_=User.following_count,
+            ),
+            fan_out_on_read=keep_on_read(),
+            version=User.version + 1,
+        )
+    )
+    await purge_follow(db, user.id, user_id)
     await db.commit()
 
     return UnfollowResponse(result=True)
 
 
 @router.get("/following", response_model=GetFollowingResponse)
-async def get_following(api_key: str = Header(...), db: AsyncSession = Depends(get_db)):
-    user_result = await db.execute(select(User).where(User.name == api_key))
-    user = user_result.scalars().first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-
-    following_result = await db.execute(
-        select(Follow).where(Follow.follower_id == user.id)
+async def get_following(
+    limit: int = Query(FOLLOW_PAGE_SIZE, ge=1, le=FOLLOW_MAX_PAGE_SIZE),
+    max_id: Optional[int] = Query(
+        None, description="Return users with an id lower than this cursor"
+    ),
+    user: AuthUser = Depends(get_authenticated_user),
+    db: AsyncSession = Depends(get_read_db),
+):
+    following, next_cursor = await list_follow_page(
+        db, user.id, "following", limit, max_id
+    )
+    return GetFollowingResponse(
+        result=True, following=following, next_cursor=next_cursor
     )
-    following = following_result.scalars().unique().all()
-
-    following_users = [
-        {
-            "id": f.following_id,
-            "name": (
-                await db.execute(select(User.name).where(User.id == f.following_id))
-            ).scalar_one(),
-        }
-        for f in following
-    ]
-
-    return GetFollowingResponse(result=True, following=following_users)
 
 
 @router.get("/followers", response_model=GetFollowersResponse)
-async def get_followers(api_key: str = Header(...), db: AsyncSession = Depends(get_db)):
-    user_result = await db.execute(select(User).where(User.name == api_key))
-    user = user_result.scalars().first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-
-    followers_result = await db.execute(
-        select(Follow).where(Follow.following_id == user.id)
+async def get_followers(
+    limit: int = Query(FOLLOW_PAGE_SIZE, ge=1, le=FOLLOW_MAX_PAGE_SIZE),
+    max_id: Optional[int] = Query(
+        None, description="Return users with an id lower than this cursor"
+    ),
+    user: AuthUser = Depends(get_authenticated_user),
+    db: AsyncSession = Depends(get_read_db),
+):
+    followers, next_cursor = await list_follow_page(
+        db, user.id, "followers", limit, max_id
+    )
+    return GetFollowersResponse(
+        result=True, followers=followers, next_cursor=next_cursor
     )
-    followers = followers_result.scalars().unique().all()
-
-    followers_users = [
-        {
-            "id": f.follower_id,
-            "name": (
-                await db.execute(select(User.name).where(User.id == f.follower_id))
-            ).scalar_one(),
-        }
-        for f in followers
-    ]
-
-    return GetFollowersResponse(result=True, followers=followers_users)
@@ -0,0 +1,71 @@
+import os
+import secrets
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import PlainTextResponse
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import QueuePool
+
+from app import database
+from app.metrics import (
+    pool_checkout_timeouts,
+    pool_connections_opened,
+    pool_wait_seconds,
+    render_prometheus,
+)
+
+# Shared secret for the internal endpoints; they answer 404 while it is unset.
+INTERNAL_TOKEN = os.getenv("INTERNAL_TOKEN")
+
+
+async def require_internal_token(internal_token: Optional[str] = Header(None)) -> None:
+    if (
+        INTERNAL_TOKEN is None
+        or internal_token is None
+        or not secrets.compare_digest(internal_token, INTERNAL_TOKEN)
+    ):
+        raise HTTPException(status_code=404, detail="Not Found")
+
+
+router = APIRouter(
+    prefix="/internal",
+    tags=["Internal"],
+    include_in_schema=False,
+    dependencies=[Depends(require_internal_token)],
+)
+
+
+def pool_status(name: str, engine: AsyncEngine) -> dict:
+    pool = engine.pool
+    status = {"name": name, "pool": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update(
+            size=pool.size(),
+            checked_out=pool.checkedout(),
+            idle=pool.checkedin(),
+            overflow=pool.overflow(),
+        )
+    status.update(
+        wait_seconds=pool_wait_seconds.snapshot(pool=name),
+        checkout_timeouts=pool_checkout_timeouts.get(pool=name),
+        connections_opened=pool_connections_opened.get(pool=name),
+    )
+    return status
+
+
+@router.get("/pool")
+async def get_pool_status():
+    pools = [pool_status("primary", database.engine)]
+    pools += [
+        pool_status(replica.name, replica.engine)
+        for replica in database.replicas.replicas
+    ]
+    return {"result": True, "pools": pools}
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    return PlainTextResponse(
+        render_prometheus(), media_type="text/plain; version=0.0.4"
+    )
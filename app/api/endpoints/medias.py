@@ -1,40 +1,43 @@
-import os
-import shutil
-
-from fastapi import APIRouter, Depends, File, Header, HTTPException, UploadFile
+from fastapi import (
+    APIRouter,
+    BackgroundTasks,
+    Depends,
+    File,
+    HTTPException,
+    UploadFile,
+)
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.future import select
 
+from app.api.dependencies import get_authenticated_user
 from app.database import get_db
 from app.models.media import Media
-from app.models.user import User
+from app.services.auth_cache import AuthUser
+from app.services.media_storage import UploadTooLarge, store_upload
+from app.services.media_variants import generate_variants
 
 router = APIRouter(prefix="/api/medias", tags=["Media"])
 
-UPLOAD_DIR = "uploads"
-
 
 @router.post("")
 async def upload_media(
-    api_key: str = Header(...),
+    background_tasks: BackgroundTasks,
+    user: AuthUser = Depends(get_authenticated_user),
     file: UploadFile = File(...),
     db: AsyncSession = Depends(get_db),
 ):
-    user_result = await db.execute(select(User).where(User.name == api_key))
-    user = user_result.scalars().first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-
     if not file.filename:
         raise HTTPException(status_code=400, detail="Invalid file")
 
-    file_path = os.path.join(UPLOAD_DIR, file.filename)
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
+    try:
+        file_path = await store_upload(file)
+    except UploadTooLarge:
+        raise HTTPException(status_code=413, detail="File too large")
 
-    media = Media(file_path=file_path)
+    media = Media(file_path=file_path, uploader_id=user.id)
     db.add(media)
     await db.commit()
     await db.refresh(media)
 
+    background_tasks.add_task(generate_variants, media.id, file_path)
+
     return {"result": True, "media_id": media.id}
@@ -0,0 +1,62 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.api.endpoints.tweets import FEED_MAX_PAGE_SIZE, FEED_PAGE_SIZE
+from app.api.responses import ModelResponse
+from app.database import get_read_db
+from app.models.tweet import Tweet
+from app.models.tweet_tag import TweetTag
+from app.schemas.tag import TrendingTag, TrendingTagsResponse
+from app.schemas.tweet import TweetListResponse
+from app.services.feed import load_tweet_details
+from app.services.tags import normalize_tag
+from app.services.trending import trending_tags
+
+router = APIRouter(prefix="/api/tags", tags=["Tags"])
+# Kept apart from /api/tags/{tag} so that no hashtag is shadowed.
+trending_router = APIRouter(prefix="/api/trending", tags=["Tags"])
+
+TRENDING_MAX_LIMIT = 50
+
+
+@trending_router.get("/tags", response_model=TrendingTagsResponse)
+async def get_trending_tags(limit: int = Query(10, ge=1, le=TRENDING_MAX_LIMIT)):
+    return TrendingTagsResponse(
+        result=True,
+        tags=[
+            TrendingTag(tag=tag, count=count) for tag, count in trending_tags.top(limit)
+        ],
+    )
+
+
+@router.get("/{tag}", response_model=TweetListResponse)
+async def get_tag_timeline(
+    tag: str,
+    limit: int = Query(FEED_PAGE_SIZE, ge=1, le=FEED_MAX_PAGE_SIZE),
+    max_id: Optional[int] = Query(
+        None, description="Return tweets with an id lower than this cursor"
+    ),
+    db: AsyncSession = Depends(get_read_db),
+):
+    query = (
+        select(Tweet)
+        .join(TweetTag, TweetTag.tweet_id == Tweet.id)
+        .where(TweetTag.tag == normalize_tag(tag))
+    )
+    if max_id is not None:
+        query = query.where(TweetTag.tweet_id < max_id)
+    query = query.order_by(TweetTag.tweet_id.desc()).limit(limit + 1)
+
+    tweets = await load_tweet_details(db, query)
+
+    next_cursor = None
+    if len(tweets) > limit:
+        tweets = tweets[:limit]
+        next_cursor = tweets[-1].id
+
+    return ModelResponse(
+        TweetListResponse(result=True, tweets=tweets, next_cursor=next_cursor)
+    )
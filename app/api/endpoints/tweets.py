@@ -1,131 +1,293 @@
-from fastapi import APIRouter, Depends, Header, HTTPException
+from typing import Optional, Tuple
+
+from fastapi import (
+    APIRouter,
+    Depends,
+    Header,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+)
+from fastapi.responses import StreamingResponse
+from sqlalchemy import update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 
-from app.database import get_db
+from app.api.conditional import etag_matches, not_modified
+from app.api.dependencies import authenticate, get_authenticated_user
+from app.api.responses import ModelResponse
+from app.api.sse import event_stream
+from app.database import LAST_WRITE_COOKIE, get_db, get_read_db, read_session
 from app.models.follow import Follow
 from app.models.like import Like
 from app.models.media import Media
 from app.models.tweet import Tweet
-from app.models.user import User
-from app.schemas.like import LikeRemovedResponse, LikeResponse
+from app.schemas.like import (
+    LikeBatchItem,
+    LikeBatchRequest,
+    LikeBatchResponse,
+    LikeRemovedResponse,
+    LikeResponse,
+)
 from app.schemas.tweet import (
+    FeedMode,
     TweetCreate,
     TweetDeleteResponse,
-    TweetDetail,
     TweetLikesList,
     TweetListResponse,
     TweetResponse,
+    TweetSearchResponse,
+)
+from app.services.auth_cache import AuthUser
+from app.services.events import publish_tweet_event
+from app.services.feed import load_tweet_details
+from app.services.likes import add_like, add_likes
+from app.services.ranking import rank_feed, ranked_feed_cache
+from app.services.search import (
+    decode_cursor,
+    encode_cursor,
+    search_terms,
+    search_tweet_ids,
+)
+from app.services.tags import index_tweet
+from app.services.timeline import (
+    fan_out_tweet,
+    purge_tweet,
+    rebuild_timeline,
+    timeline_tweet_ids,
 )
+from app.services.trending import trending_tags
+from app.services.upsert import WriteOutcome
+from app.services.versions import bump_versions, feed_etag, feed_version_query
 
 router = APIRouter(prefix="/api/tweets", tags=["Tweets"])
 
+FEED_PAGE_SIZE = 20
+FEED_MAX_PAGE_SIZE = 100
+SEARCH_MAX_QUERY_LENGTH = 200
+
+LIKE_ERRORS = {
+    WriteOutcome.TARGET_NOT_FOUND: "Tweet not found",
+    WriteOutcome.ALREADY_EXISTS: "Tweet already liked",
+}
+
 
 @router.post("", response_model=TweetResponse)
 async def create_tweet(
     tweet_data: TweetCreate,
-    api_key: str = Header(...),
+    user: AuthUser = Depends(get_authenticated_user),
     db: AsyncSession = Depends(get_db),
 ):
-    result = await db.execute(select(User).where(User.name == api_key))
-    user = result.scalars().first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-
     tweet = Tweet(content=tweet_data.tweet_data, author_id=user.id)
     db.add(tweet)
-    await db.commit()
-    await db.refresh(tweet)
+    await db.flush()
 
     if tweet_data.tweet_media_ids:
-        for media_id in tweet_data.tweet_media_ids:
-            media = await db.execute(select(Media).where(Media.id == media_id))
-            media_obj = media.scalars().first()
-            if media_obj:
-                media_obj.tweet_id = tweet.id
-                db.add(media_obj)
-
-        await db.commit()
+        media_ids = set(tweet_data.tweet_media_ids)
+        attached = await db.execute(
+            update(Media)
+            .where(
+                Media.id.in_(media_ids),
+                Media.tweet_id.is_(None),
+                Media.uploader_id == user.id,
+            )
+            .values(tweet_id=tweet.id)
+            .returning(Media.id)
+        )
+        if set(attached.scalars()) != media_ids:
+            await db.rollback()
+            raise HTTPException(status_code=400, detail="Invalid media ids")
+
+    tags = await index_tweet(db, tweet.id, tweet.content)
+    await fan_out_tweet(db, tweet)
+    await db.execute(bump_versions([user.id]))
+    await publish_tweet_event(db, "tweet_created", tweet.id, user.id)
+    await db.commit()
+    trending_tags.record(tags)
 
     return TweetResponse(result=True, tweet_id=tweet.id)
 
 
+async def get_feed_versions(
+    user_id: int, db: AsyncSession, primary: AsyncSession
+) -> Tuple[AsyncSession, Tuple[int, int]]:
+    """Return the session to read the feed from and its version stamp.
+
+    A timeline that was never built is materialized first. Replicas are
+    read-only and may lag, so it is then written and read back on the primary.
+    """
+    row = (await db.execute(feed_version_query(user_id))).one()
+    if not row.timeline_built:
+        await rebuild_timeline(primary, user_id)
+        await primary.commit()
+        db = primary
+        row = (await db.execute(feed_version_query(user_id))).one()
+    return db, (row.version, row.followed_versions)
+
+
 @router.get("", response_model=TweetListResponse)
 async def get_user_feed(
-    api_key: str = Header(...),
-    db: AsyncSession = Depends(get_db),
+    limit: int = Query(FEED_PAGE_SIZE, ge=1, le=FEED_MAX_PAGE_SIZE),
+    max_id: Optional[int] = Query(
+        None, description="Return tweets with an id lower than this cursor"
+    ),
+    since_id: Optional[int] = Query(
+        None, description="Return tweets with an id greater than this cursor"
+    ),
+    full: bool = Query(False, description="Return the whole feed unpaginated"),
+    mode: FeedMode = Query(
+        FeedMode.LATEST,
+        description="latest: newest first, top: ranked by recent engagement",
+    ),
+    offset: Optional[int] = Query(
+        None, ge=0, description="Position in the ranked feed, only with mode=top"
+    ),
+    if_none_match: Optional[str] = Header(None),
+    user: AuthUser = Depends(get_authenticated_user),
+    db: AsyncSession = Depends(get_read_db),
+    primary: AsyncSession = Depends(get_db),
 ):
-    user_result = await db.execute(select(User).where(User.name == api_key))
-    user = user_result.scalars().first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
+    if mode is FeedMode.TOP and (max_id is not None or since_id is not None):
+        raise HTTPException(status_code=400, detail="mode=top is paginated with offset")
+    if mode is FeedMode.LATEST and offset is not None:
+        raise HTTPException(
+            status_code=400, detail="mode=latest is paginated with max_id"
+        )
+
+    db, versions = await get_feed_versions(user.id, db, primary)
+    if mode is FeedMode.TOP:
+        return await get_top_feed(
+            user.id, versions, limit, offset or 0, full, if_none_match, db
+        )
+
+    etag = feed_etag(user.id, *versions, limit, max_id, since_id, full)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    headers = {"ETag": etag}
+
+    page_size = None if full else limit + 1
+    tweet_ids = timeline_tweet_ids(user.id, page_size, max_id, since_id)
+    query = select(Tweet).where(Tweet.id.in_(tweet_ids)).order_by(Tweet.id.desc())
 
-    following_result = await db.execute(
-        select(Follow.following_id).where(Follow.follower_id == user.id)
+    tweets = await load_tweet_details(db, query)
+
+    if full:
+        return ModelResponse(
+            TweetListResponse(result=True, tweets=tweets), headers=headers
+        )
+
+    next_cursor = None
+    if len(tweets) > limit:
+        tweets = tweets[:limit]
+        next_cursor = tweets[-1].id
+
+    return ModelResponse(
+        TweetListResponse(result=True, tweets=tweets, next_cursor=next_cursor),
+        headers=headers,
     )
-    following_ids = [row[0] for row in following_result.all()]
-    following_ids.append(user.id)
 
-    if not following_ids:
-        return {"result": True, "tweets": []}
 
-    tweets_result = await db.execute(
-        select(Tweet)
-        .where(Tweet.author_id.in_(following_ids))
-        .order_by(Tweet.id.desc())
+async def get_top_feed(
+    user_id: int,
+    versions: Tuple[int, int],
+    limit: int,
+    offset: int,
+    full: bool,
+    if_none_match: Optional[str],
+    db: AsyncSession,
+) -> Response:
+    ranked = ranked_feed_cache.get(user_id, versions)
+    if ranked is None:
+        ranked = await rank_feed(db, user_id, versions)
+
+    # The ranking also changes with time, so each computed one gets an ETag.
+    etag = feed_etag(
+        user_id, *versions, FeedMode.TOP.value, ranked.computed_at, limit, offset, full
     )
-    tweets = tweets_result.scalars().all()
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+
+    if full:
+        page, next_cursor = ranked.tweet_ids, None
+    else:
+        page = ranked.tweet_ids[offset : offset + limit]
+        end = offset + limit
+        next_cursor = end if end < len(ranked.tweet_ids) else None
+
+    tweets = []
+    if page:
+        position = {tweet_id: index for index, tweet_id in enumerate(page)}
+        tweets = await load_tweet_details(db, select(Tweet).where(Tweet.id.in_(page)))
+        tweets.sort(key=lambda tweet: position[tweet.id])
+
+    return ModelResponse(
+        TweetListResponse(result=True, tweets=tweets, next_cursor=next_cursor),
+        headers={"ETag": etag},
+    )
+
 
-    response = []
-    for tweet in tweets:
+@router.get("/search", response_model=TweetSearchResponse)
+async def search_tweets(
+    q: str = Query(..., min_length=1, max_length=SEARCH_MAX_QUERY_LENGTH),
+    limit: int = Query(FEED_PAGE_SIZE, ge=1, le=FEED_MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    db: AsyncSession = Depends(get_read_db),
+):
+    after = None
+    if cursor is not None:
+        try:
+            after = decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    terms = search_terms(q)
+    ranked = await search_tweet_ids(db, terms, limit + 1, after) if terms else []
+    if not ranked:
+        return ModelResponse(TweetSearchResponse(result=True, tweets=[]))
+
+    next_cursor = None
+    if len(ranked) > limit:
+        ranked = ranked[:limit]
+        next_cursor = encode_cursor(ranked[-1][1], ranked[-1][0])
+
+    position = {tweet_id: index for index, (tweet_id, _) in enumerate(ranked)}
+    tweets = await load_tweet_details(db, select(Tweet).where(Tweet.id.in_(position)))
+    tweets.sort(key=lambda tweet: position[tweet.id])
+
+    return ModelResponse(
+        TweetSearchResponse(result=True, tweets=tweets, next_cursor=next_cursor)
+    )
 
-        author_result = await db.execute(select(User).where(User.id == tweet.author_id))
-        author = author_result.scalars().first()
 
-        likes_result = await db.execute(select(Like).where(Like.tweet_id == tweet.id))
-        likes = likes_result.scalars().all()
-        likes_data = []
-        for like in likes:
-            user_like_result = await db.execute(
-                select(User.name).where(User.id == like.user_id)
-            )
-            user_like = user_like_result.scalars().first()
-            likes_data.append(
-                {
-                    "user_id": like.user_id,
-                    "name": user_like if user_like else "Unknown",
-                }
-            )
+@router.get("/stream")
+async def stream_feed(request: Request, api_key: str = Header(...)):
+    """Push new and deleted tweets and like count changes as Server-Sent Events.
 
-        attachments_result = await db.execute(
-            select(Media.file_path).where(Media.tweet_id == tweet.id)
-        )
-        attachments = [row[0] for row in attachments_result.all()]
-
-        response.append(
-            TweetDetail(
-                id=tweet.id,
-                content=tweet.content,
-                attachments=attachments,
-                author={"id": author.id, "name": author.name},
-                likes=likes_data,
-            )
+    The stream covers the authors followed when it was opened; clients
+    reconnect after following someone. The session is closed before the
+    stream starts instead of coming from a request-scoped dependency, which
+    would hold its pooled connection for as long as the client listens.
+    """
+    async with read_session(api_key, request.cookies.get(LAST_WRITE_COOKIE)) as db:
+        user = await authenticate(api_key, db)
+        following = await db.execute(
+            select(Follow.following_id).where(Follow.follower_id == user.id)
         )
-
-    return TweetListResponse(result=True, tweets=response)
+        channels = [user.id, *following.scalars()]
+    return StreamingResponse(
+        event_stream(channels),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @router.delete("/{tweet_id}", response_model=TweetDeleteResponse)
 async def delete_tweet(
     tweet_id: int,
-    api_key: str = Header(...),
+    user: AuthUser = Depends(get_authenticated_user),
     db: AsyncSession = Depends(get_db),
 ):
-    user_result = await db.execute(select(User).where(User.name == api_key))
-    user = user_result.scalars().first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-
     tweet_result = await db.execute(select(Tweet).where(Tweet.id == tweet_id))
     tweet = tweet_result.scalars().first()
     if not tweet:
@@ -136,64 +298,73 @@ async def delete_tweet(
             status_code=403, detail="You can only delete your own tweets"
         )
 
+    await purge_tweet(db, tweet.id)
+    await db.execute(bump_versions([user.id]))
+    await publish_tweet_event(db, "tweet_deleted", tweet.id, user.id)
     await db.delete(tweet)
     await db.commit()
 
     return TweetDeleteResponse(result=True)
 
 
+@router.post("/likes/batch", response_model=LikeBatchResponse)
+async def like_tweets(
+    batch: LikeBatchRequest,
+    user: AuthUser = Depends(get_authenticated_user),
+    db: AsyncSession = Depends(get_db),
+):
+    tweet_ids = list(dict.fromkeys(batch.tweet_ids))
+    written = await add_likes(db, user.id, tweet_ids)
+    for tweet_id, (outcome, author_id) in written.items():
+        if outcome is WriteOutcome.CREATED:
+            await publish_tweet_event(db, "likes_changed", tweet_id, author_id, delta=1)
+    await db.commit()
+
+    return LikeBatchResponse(
+        result=True,
+        results=[
+            LikeBatchItem(
+                tweet_id=tweet_id,
+                result=outcome is WriteOutcome.CREATED,
+                detail=LIKE_ERRORS.get(outcome),
+            )
+            for tweet_id, (outcome, _) in written.items()
+        ],
+    )
+
+
 @router.post("/{tweet_id}/likes", response_model=LikeResponse)
 async def like_tweet(
     tweet_id: int,
-    api_key: str = Header(...),
+    user: AuthUser = Depends(get_authenticated_user),
     db: AsyncSession = Depends(get_db),
 ):
-    user_result = await db.execute(select(User).where(User.name == api_key))
-    user = user_result.scalars().first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-
-    tweet_result = await db.execute(select(Tweet).where(Tweet.id == tweet_id))
-    tweet = tweet_result.scalars().first()
-    if not tweet:
-        raise HTTPException(status_code=404, detail="Tweet not found")
-
-    like_result = await db.execute(
-        select(Like).where(Like.user_id == user.id, Like.tweet_id == tweet.id)
-    )
-    existing_like = like_result.scalars().first()
-    if existing_like:
-        raise HTTPException(status_code=400, detail="Tweet already liked")
+    outcome, author_id = await add_like(db, user.id, tweet_id)
+    if outcome is WriteOutcome.TARGET_NOT_FOUND:
+        raise HTTPException(status_code=404, detail=LIKE_ERRORS[outcome])
+    if outcome is WriteOutcome.ALREADY_EXISTS:
+        raise HTTPException(status_code=400, detail=LIKE_ERRORS[outcome])
 
-    like = Like(user_id=user.id, tweet_id=tweet.id)
-    db.add(like)
+    await publish_tweet_event(db, "likes_changed", tweet_id, author_id, delta=1)
     await db.commit()
     return LikeResponse(result=True, message="Tweet liked")
 
 
 @router.get("/{tweet_id}/likes", response_model=TweetLikesList)
-async def get_tweet_likes(tweet_id: int, db: AsyncSession = Depends(get_db)):
-    tweet_result = await db.execute(select(Tweet).where(Tweet.id == tweet_id))
-    tweet = tweet_result.scalars().first()
-    if not tweet:
+async def get_tweet_likes(tweet_id: int, db: AsyncSession = Depends(get_read_db)):
+    likes_count = await db.scalar(select(Tweet.likes_count).where(Tweet.id == tweet_id))
+    if likes_count is None:
         raise HTTPException(status_code=404, detail="Tweet not found")
 
-    likes_result = await db.execute(select(Like).where(Like.tweet_id == tweet_id))
-    likes = likes_result.scalars().unique().all()
-    return TweetLikesList(result=True, likes_count=len(likes))
+    return TweetLikesList(result=True, likes_count=likes_count)
 
 
 @router.delete("/{tweet_id}/likes", response_model=LikeRemovedResponse)
 async def unlike_tweet(
     tweet_id: int,
-    api_key: str = Header(...),
+    user: AuthUser = Depends(get_authenticated_user),
     db: AsyncSession = Depends(get_db),
 ):
-    user_result = await db.execute(select(User).where(User.name == api_key))
-    user = user_result.scalars().first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-
     tweet_result = await db.execute(select(Tweet).where(Tweet.id == tweet_id))
     tweet = tweet_result.scalars().first()
     if not tweet:
@@ -207,6 +378,13 @@ async def unlike_tweet(
         raise HTTPException(status_code=400, detail="Like not found")
 
     await db.delete(like)
+    await db.execute(
+        update(Tweet)
+        .where(Tweet.id == tweet_id, Tweet.likes_count > 0)
+        .values(likes_count=Tweet.likes_count - 1)
+    )
+    await db.execute(bump_versions([tweet.author_id]))
+    await publish_tweet_event(db, "likes_changed", tweet_id, tweet.author_id, delta=-1)
     await db.commit()
 
     return LikeRemovedResponse(result=True, message="Like removed")
@@ -1,57 +1,202 @@
-from fastapi import APIRouter, Depends, Header, HTTPException
+from typing import List, Optional, Tuple
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 
-from app.database import get_db
+from app.api.conditional import etag_matches, not_modified
+from app.api.dependencies import get_authenticated_user, get_optional_user
+from app.database import get_read_db
 from app.models.follow import Follow
 from app.models.user import User
-from app.schemas.user import UserBase, UserProfile, UserResponse
+from app.schemas.user import (
+    MAX_BATCH_SIZE,
+    UserBase,
+    UserBatchResponse,
+    UserListResponse,
+    UserProfile,
+    UserResponse,
+)
+from app.services.auth_cache import AuthUser
+from app.services.follows import FOLLOW_SIDES, list_follow_users
+from app.services.versions import profile_etag
 
 router = APIRouter(prefix="/api/users", tags=["Users"])
 
+FOLLOW_PAGE_SIZE = 20
+FOLLOW_MAX_PAGE_SIZE = 100
+# Most users a profile embeds per list requested with include=.
+PROFILE_LIST_LIMIT = 100
 
-async def get_user_with_follow_data(user_id: int, db: AsyncSession):
-    user_result = await db.execute(select(User).where(User.id == user_id))
-    user = user_result.scalars().first()
+INCLUDE_DESCRIPTION = (
+    f"Comma-separated lists to embed, followers and following, "
+    f"{PROFILE_LIST_LIMIT} users at most"
+)
 
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
 
-    followers_result = await db.execute(
-        select(User.id, User.name)
-        .join(Follow, Follow.follower_id == User.id)
-        .where(Follow.following_id == user_id)
-    )
-    followers = [UserBase(id=f.id, name=f.name) for f in followers_result.all()]
+def parse_include(include: Optional[str]) -> Tuple[str, ...]:
+    if include is None:
+        return ()
+    names = {name.strip() for name in include.split(",") if name.strip()}
+    if not names <= FOLLOW_SIDES.keys():
+        raise HTTPException(status_code=400, detail="Invalid include")
+    return tuple(sorted(names))
 
-    following_result = await db.execute(
-        select(User.id, User.name)
-        .join(Follow, Follow.following_id == User.id)
-        .where(Follow.follower_id == user_id)
-    )
-    following = [UserBase(id=f.id, name=f.name) for f in following_result.all()]
+
+async def get_user_with_follow_data(user, include: Tuple[str, ...], db: AsyncSession):
+    lists = {}
+    for side in include:
+        rows = await list_follow_users(db, user.id, side, PROFILE_LIST_LIMIT)
+        lists[side] = [UserBase(id=row.id, name=row.name) for row in rows]
 
     return UserProfile(
-        id=user.id, name=user.name, followers=followers, following=following
+        id=user.id,
+        name=user.name,
+        followers_count=user.followers_count,
+        following_count=user.following_count,
+        is_following=getattr(user, "is_following", None),
+        **lists,
     )
 
 
-@router.get("/me", response_model=UserResponse)
-async def get_current_user(
-    api_key: str = Header(...), db: AsyncSession = Depends(get_db)
+async def get_profile_response(
+    user_id: int,
+    include: Tuple[str, ...],
+    if_none_match: Optional[str],
+    response: Response,
+    db: AsyncSession,
+    viewer: Optional[AuthUser] = None,
 ):
-    user_result = await db.execute(select(User).where(User.name == api_key))
-    user = user_result.scalars().first()
+    """Build a profile, or answer 304 when the client has its current version.
+
+    With a ``viewer`` the profile says whether they follow the user. Following
+    and unfollowing bump the user's version, so the ETag stays per viewer.
+    """
+    columns = [
+        User.id,
+        User.name,
+        User.followers_count,
+        User.following_count,
+        User.version,
+    ]
+    viewer_params = ()
+    if viewer is not None:
+        is_following = (
+            select(Follow.id)
+            .where(Follow.follower_id == viewer.id, Follow.following_id == User.id)
+            .exists()
+        )
+        columns.append(is_following.label("is_following"))
+        viewer_params = ("viewer", viewer.id)
+    user_result = await db.execute(select(*columns).where(User.id == user_id))
+    user = user_result.first()
 
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
-    user_data = await get_user_with_follow_data(user.id, db)
+    etag = profile_etag(user.id, user.version, *include, *viewer_params)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    response.headers["ETag"] = etag
 
+    user_data = await get_user_with_follow_data(user, include, db)
     return UserResponse(result=True, user=user_data)
 
 
+async def list_follow_page(
+    db: AsyncSession, user_id: int, side: str, limit: int, max_id: Optional[int]
+) -> Tuple[List[UserBase], Optional[int]]:
+    """A page of a follow list and the cursor of the next one, if any."""
+    rows = await list_follow_users(db, user_id, side, limit + 1, max_id)
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = rows[-1].id
+
+    return [UserBase(id=row.id, name=row.name) for row in rows], next_cursor
+
+
+async def get_follow_page(
+    user_id: int, side: str, limit: int, max_id: Optional[int], db: AsyncSession
+) -> UserListResponse:
+    users, next_cursor = await list_follow_page(db, user_id, side, limit, max_id)
+    if not users and not await db.scalar(select(User.id).where(User.id == user_id)):
+        raise HTTPException(status_code=404, detail="User not found")
+
+    return UserListResponse(result=True, users=users, next_cursor=next_cursor)
+
+
+@router.get("", response_model=UserBatchResponse)
+async def get_users(
+    ids: str = Query(..., description="Comma-separated user ids"),
+    db: AsyncSession = Depends(get_read_db),
+):
+    try:
+        user_ids = list(dict.fromkeys(int(i) for i in ids.split(",") if i.strip()))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid user ids")
+    if not user_ids or len(user_ids) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=400, detail="Invalid user ids")
+
+    users_result = await db.execute(
+        select(User.id, User.name).where(User.id.in_(user_ids))
+    )
+    users = {u.id: UserBase(id=u.id, name=u.name) for u in users_result.all()}
+
+    return UserBatchResponse(
+        result=True,
+        users=[users[i] for i in user_ids if i in users],
+        not_found=[i for i in user_ids if i not in users],
+    )
+
+
+@router.get("/me", response_model=UserResponse)
+async def get_current_user(
+    response: Response,
+    include: Optional[str] = Query(None, description=INCLUDE_DESCRIPTION),
+    if_none_match: Optional[str] = Header(None),
+    user: AuthUser = Depends(get_authenticated_user),
+    db: AsyncSession = Depends(get_read_db),
+):
+    return await get_profile_response(
+        user.id, parse_include(include), if_none_match, response, db
+    )
+
+
 @router.get("/{user_id}", response_model=UserResponse)
-async def get_user_profile(user_id: int, db: AsyncSession = Depends(get_db)):
-    user_data = await get_user_with_follow_data(user_id, db)
-    return UserResponse(result=True, user=user_data)
+async def get_user_profile(
+    user_id: int,
+    response: Response,
+    include: Optional[str] = Query(None, description=INCLUDE_DESCRIPTION),
+    if_none_match: Optional[str] = Header(None),
+    viewer: Optional[AuthUser] = Depends(get_optional_user),
+    db: AsyncSession = Depends(get_read_db),
+):
+    return await get_profile_response(
+        user_id, parse_include(include), if_none_match, response, db, viewer
+    )
+
+
+@router.get("/{user_id}/followers", response_model=UserListResponse)
+async def get_user_followers(
+    user_id: int,
+    limit: int = Query(FOLLOW_PAGE_SIZE, ge=1, le=FOLLOW_MAX_PAGE_SIZE),
+    max_id: Optional[int] = Query(
+        None, description="Return users with an id lower than this cursor"
+    ),
+    db: AsyncSession = Depends(get_read_db),
+):
+    return await get_follow_page(user_id, "followers", limit, max_id, db)
+
+
+@router.get("/{user_id}/following", response_model=UserListResponse)
+async def get_user_following(
+    user_id: int,
+    limit: int = Query(FOLLOW_PAGE_SIZE, ge=1, le=FOLLOW_MAX_PAGE_SIZE),
+    max_id: Optional[int] = Query(
+        None, description="Return users with an id lower than this cursor"
+    ),
+    db: AsyncSession = Depends(get_read_db),
+):
+    return await get_follow_page(user_id, "following", limit, max_id, db)
@@ -0,0 +1,55 @@
+import os
+import re
+
+from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers
+from starlette.exceptions import HTTPException
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse
+from starlette.types import Scope
+
+# Blobs and their renditions are named after the sha256 of the original,
+# e.g. "<digest>.png" or "<digest>_thumbnail.png".
+CONTENT_ADDRESSED_NAME = re.compile(r"^([0-9a-f]{64}(?:_[a-z]+)?)(?:\.[a-z0-9]+)?$")
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+class MediaFiles(StaticFiles):
+    """Serve uploads, marking content-addressed files as immutable.
+
+    Content-addressed files get a strong ``ETag`` derived from their digest
+    and a year-long ``immutable`` cache lifetime; ``If-None-Match`` is
+    answered with 304. Range requests come from ``FileResponse``, which
+    streams the file in chunks under uvicorn.
+    """
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        if path.split("/", 1)[0] == "tmp":
+            # Uploads in progress are not published.
+            raise HTTPException(status_code=404)
+        return await super().get_response(path, scope)
+
+    def file_response(
+        self,
+        full_path,
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200,
+    ) -> Response:
+        headers = {}
+        match = CONTENT_ADDRESSED_NAME.match(os.path.basename(full_path))
+        if match:
+            headers = {
+                "etag": f'"{match.group(1)}"',
+                "cache-control": IMMUTABLE_CACHE_CONTROL,
+            }
+
+        response = FileResponse(
+            full_path,
+            status_code=status_code,
+            headers=headers,
+            stat_result=stat_result,
+        )
+        if self.is_not_modified(response.headers, Headers(scope=scope)):
+            return NotModifiedResponse(response.headers)
+        return response
@@ -0,0 +1,175 @@
+import logging
+import os
+import time
+from typing import Iterable
+
+import orjson
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.metrics import (
+    RequestStats,
+    current_request,
+    request_db_seconds,
+    request_seconds,
+    request_statements,
+)
+
+SLOW_REQUEST_SECONDS = float(os.getenv("SLOW_REQUEST_SECONDS", "1.0"))
+
+logger = logging.getLogger(__name__)
+
+
+def route_template(scope: Scope) -> str:
+    """The matched path template, so ``/api/tweets/1`` and ``/2`` share a label."""
+    route = scope.get("route")
+    if route is not None:
+        return route.path
+    if "endpoint" in scope:
+        # Mounted applications such as the static files.
+        return scope.get("root_path", "") + "/{path:path}"
+    return "unmatched"
+
+
+class MetricsMiddleware:
+    """Record latency and SQL statistics of every HTTP request.
+
+    The request is measured until its last body chunk is sent; background
+    tasks that run afterwards are not included.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        status_code = 500
+        started = time.perf_counter()
+        elapsed = None
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code, elapsed
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get(
+                "more_body", False
+            ):
+                elapsed = time.perf_counter() - started
+                stats.finished = True
+
+        token = current_request.set(stats)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_request.reset(token)
+            if elapsed is None:
+                elapsed = time.perf_counter() - started
+            self.observe(scope, status_code, elapsed, stats)
+
+    def observe(
+        self, scope: Scope, status_code: int, elapsed: float, stats: RequestStats
+    ) -> None:
+        route = route_template(scope)
+        request_seconds.observe(
+            elapsed, method=scope["method"], route=route, status=status_code
+        )
+        request_statements.observe(stats.statement_count, route=route)
+        request_db_seconds.observe(stats.db_seconds, route=route)
+
+        if elapsed >= SLOW_REQUEST_SECONDS:
+            breakdown = "".join(
+                f"\n  {count}x {seconds * 1000:.1f} ms  {sql}"
+                for sql, count, seconds in stats.breakdown()
+            )
+            logger.warning(
+                "Slow request %s %s: %.1f ms, %d statements, %.1f ms in the database%s",
+                scope["method"],
+                scope["path"],
+                elapsed * 1000,
+                stats.statement_count,
+                stats.db_seconds * 1000,
+                breakdown,
+            )
+
+
+class _BodyTooLarge(Exception):
+    pass
+
+
+class BodySizeLimitMiddleware:
+    """Refuse request bodies over ``max_body_size`` while they are received.
+
+    Starlette spools a whole multipart body to a temporary file before the
+    endpoint runs, so a limit checked in the endpoint still costs the full
+    upload. A declared ``Content-Length`` over the limit is answered with 413
+    without reading the body; a body that grows past it anyway (chunked, or
+    longer than declared) is cut off at the limit and answered with 413, and
+    whatever the application sends after that is dropped.
+    """
+
+    def __init__(self, app: ASGIApp, paths: Iterable[str], max_body_size: int):
+        self.app = app
+        self.paths = frozenset(paths)
+        self.max_body_size = max_body_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        content_length = dict(scope["headers"]).get(b"content-length")
+        if content_length is not None and content_length.isdigit():
+            if int(content_length) > self.max_body_size:
+                await self.refuse(send)
+                return
+
+        received = 0
+        response_started = False
+        refused = False
+
+        async def receive_wrapper() -> Message:
+            nonlocal received, refused
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_body_size:
+                    # Answer right away: the framework may catch the error
+                    # below while parsing the body and turn it into a 400.
+                    if not response_started:
+                        await self.refuse(send)
+                        refused = True
+                    raise _BodyTooLarge()
+            return message
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal response_started
+            if refused:
+                return
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, receive_wrapper, send_wrapper)
+        except _BodyTooLarge:
+            if not refused:
+                raise
+
+    async def refuse(self, send: Send) -> None:
+        body = orjson.dumps({"detail": "File too large"})
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 413,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"connection", b"close"),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
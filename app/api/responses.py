@@ -0,0 +1,38 @@
+"""Response classes that skip FastAPI's generic encoding pipeline.
+
+Returning a model from an endpoint makes FastAPI validate it again against
+``response_model``, walk it with ``jsonable_encoder`` and only then dump the
+resulting dicts. For large payloads such as feeds this dominates the request
+CPU time, so those endpoints wrap their model in ``ModelResponse``, which
+serializes it in one pass with a ``TypeAdapter`` built once per schema.
+"""
+
+from functools import lru_cache
+from typing import Any, Type
+
+import orjson
+from fastapi.responses import Response
+from pydantic import BaseModel, TypeAdapter
+
+
+class ORJSONResponse(Response):
+    """Default response class, dumps the already encoded content with orjson."""
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+@lru_cache(maxsize=None)
+def type_adapter(model: Type[BaseModel]) -> TypeAdapter:
+    return TypeAdapter(model)
+
+
+class ModelResponse(Response):
+    """Render a pydantic model straight to JSON bytes."""
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return type_adapter(type(content)).dump_json(content)
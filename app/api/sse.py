@@ -0,0 +1,37 @@
+"""Server-Sent Events framing of a feed subscription."""
+
+import os
+from typing import AsyncIterator, Iterable
+
+import anyio
+
+from app.services import events
+
+STREAM_KEEPALIVE_SECONDS = float(os.getenv("STREAM_KEEPALIVE_SECONDS", "15"))
+# Milliseconds browsers wait before reconnecting a dropped stream.
+STREAM_RETRY_MS = 3000
+
+KEEPALIVE_FRAME = b": keepalive\n\n"
+RESYNC_FRAME = b"event: resync\ndata: {}\n\n"
+
+
+async def event_stream(
+    channels: Iterable[int], keepalive: float = STREAM_KEEPALIVE_SECONDS
+) -> AsyncIterator[bytes]:
+    """Yield the frames published on ``channels`` with keepalives in between.
+
+    A subscriber that fell behind gets a final ``resync`` event, telling the
+    client to reload its feed before it reconnects.
+    """
+    with events.broker.subscribe(channels) as subscription:
+        yield f"retry: {STREAM_RETRY_MS}\n\n".encode()
+        while True:
+            frame = KEEPALIVE_FRAME
+            try:
+                with anyio.move_on_after(keepalive):
+                    frame = await subscription.receive()
+            except anyio.EndOfStream:
+                break
+            yield frame
+        if subscription.overflowed:
+            yield RESYNC_FRAME
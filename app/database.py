@@ -1,7 +1,31 @@
+import math
 import os
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, List, Optional
 
 from dotenv import load_dotenv
-from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from fastapi import Request, Response
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from app.metrics import (
+    pool_checkout_timeouts,
+    pool_connections_opened,
+    pool_wait_seconds,
+    record_statement,
+)
 
 load_dotenv()
 
@@ -9,7 +33,91 @@ DATABASE_URL = os.getenv("DATABASE_URL")
 if DATABASE_URL is None:
     raise ValueError("DATABASE_URL is not set")
 
-engine = create_async_engine(DATABASE_URL, echo=False)
+DATABASE_REPLICA_URLS = [
+    url.strip()
+    for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",")
+    if url.strip()
+]
+REPLICA_RETRY_AFTER = float(os.getenv("REPLICA_RETRY_AFTER", "30"))
+READ_YOUR_WRITES_WINDOW = float(os.getenv("READ_YOUR_WRITES_WINDOW", "5"))
+READ_YOUR_WRITES_SIZE = int(os.getenv("READ_YOUR_WRITES_SIZE", "100000"))
+LAST_WRITE_COOKIE = "last_write"
+
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "-1"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "false").lower() in ("1", "true")
+DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "100"))
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long checkouts wait and how often they fail.
+
+    The pool's ``logging_name`` is used as the ``pool`` label.
+    """
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            pool_checkout_timeouts.inc(pool=self.logging_name)
+            raise
+        finally:
+            pool_wait_seconds.observe(
+                time.perf_counter() - started, pool=self.logging_name
+            )
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    """Time every statement into the statistics of the current request."""
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def start_timer(conn, cursor, statement, parameters, context, executemany):
+        context._statement_started = time.perf_counter()
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def stop_timer(conn, cursor, statement, parameters, context, executemany):
+        record_statement(statement, time.perf_counter() - context._statement_started)
+
+
+def create_engine(url: str, name: str) -> AsyncEngine:
+    """Create an instrumented engine with pool settings from the environment.
+
+    SQLite keeps SQLAlchemy's default pool, which has nothing to tune.
+    """
+    url = make_url(url)
+    if url.get_backend_name() == "sqlite":
+        engine = create_async_engine(url, echo=False)
+        instrument_engine(engine)
+        return engine
+
+    connect_args = {}
+    if url.get_driver_name() == "asyncpg":
+        connect_args["statement_cache_size"] = DB_STATEMENT_CACHE_SIZE
+    engine = create_async_engine(
+        url,
+        echo=False,
+        poolclass=InstrumentedPool,
+        pool_logging_name=name,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=DB_POOL_PRE_PING,
+        connect_args=connect_args,
+    )
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def count_connection(dbapi_connection, connection_record) -> None:
+        pool_connections_opened.inc(pool=name)
+
+    instrument_engine(engine)
+    return engine
+
+
+engine = create_engine(DATABASE_URL, "primary")
 
 async_session_maker = async_sessionmaker(
     bind=engine,
@@ -17,6 +125,147 @@ async_session_maker = async_sessionmaker(
 )
 
 
-async def get_db():
+class Replica:
+    """A read-only copy of the primary, skipped for a while after it fails."""
+
+    def __init__(self, url: str, name: str = "replica"):
+        self.name = name
+        self.engine = create_engine(url, name)
+        self.session_maker = async_sessionmaker(
+            bind=self.engine, expire_on_commit=False
+        )
+        self.down_until = 0.0
+
+    @property
+    def healthy(self) -> bool:
+        return self.down_until <= time.monotonic()
+
+    def mark_down(self) -> None:
+        self.down_until = time.monotonic() + REPLICA_RETRY_AFTER
+
+
+class ReplicaSet:
+    def __init__(self, replicas: List[Replica]):
+        self.replicas = replicas
+        self._next = 0
+
+    def candidates(self) -> List[Replica]:
+        """Healthy replicas, starting one further on every call."""
+        if not self.replicas:
+            return []
+        start = self._next % len(self.replicas)
+        self._next = start + 1
+        ordered = self.replicas[start:] + self.replicas[:start]
+        return [replica for replica in ordered if replica.healthy]
+
+
+class RecentWriters:
+    """Api keys that committed a write less than ``window`` seconds ago.
+
+    Their reads go to the primary so that replication lag never hides a
+    user's own tweet, like or follow from them. The record is kept per
+    process, so with several workers it only covers clients that do not
+    send back the ``LAST_WRITE_COOKIE`` set on every write response.
+    """
+
+    def __init__(self, window: float, maxsize: int):
+        self.window = window
+        self.maxsize = maxsize
+        self._deadlines: "OrderedDict[str, float]" = OrderedDict()
+
+    def record(self, api_key: str) -> None:
+        self._deadlines[api_key] = time.monotonic() + self.window
+        self._deadlines.move_to_end(api_key)
+        while len(self._deadlines) > self.maxsize:
+            self._deadlines.popitem(last=False)
+
+    def wrote_recently(self, api_key: str) -> bool:
+        deadline = self._deadlines.get(api_key)
+        if deadline is None:
+            return False
+        if deadline > time.monotonic():
+            return True
+        del self._deadlines[api_key]
+        return False
+
+    def clear(self) -> None:
+        self._deadlines.clear()
+
+
+replicas = ReplicaSet(
+    [
+        Replica(url, f"replica{number}")
+        for number, url in enumerate(DATABASE_REPLICA_URLS, start=1)
+    ]
+)
+recent_writers = RecentWriters(READ_YOUR_WRITES_WINDOW, READ_YOUR_WRITES_SIZE)
+
+
+def wrote_recently(api_key: Optional[str], last_write: Optional[str]) -> bool:
+    """Whether a client committed a write within ``READ_YOUR_WRITES_WINDOW``.
+
+    ``last_write`` is the wall-clock time from ``LAST_WRITE_COOKIE``, which
+    any worker can check; times further in the future than the window are
+    ignored so that a forged cookie cannot pin a client to the primary.
+    """
+    try:
+        if abs(time.time() - float(last_write)) < READ_YOUR_WRITES_WINDOW:
+            return True
+    except (TypeError, ValueError):
+        pass
+    return api_key is not None and recent_writers.wrote_recently(api_key)
+
+
+@event.listens_for(Session, "after_commit")
+def _record_writer(session: Session) -> None:
+    api_key = session.info.get("api_key")
+    if api_key is not None:
+        recent_writers.record(api_key)
+    response = session.info.pop("response", None)
+    if response is not None:
+        response.set_cookie(
+            LAST_WRITE_COOKIE,
+            f"{time.time():.3f}",
+            max_age=math.ceil(READ_YOUR_WRITES_WINDOW),
+            httponly=True,
+            samesite="lax",
+        )
+
+
+async def get_db(request: Request, response: Response):
+    info = {"api_key": request.headers.get("api-key"), "response": response}
+    async with async_session_maker(info=info) as session:
+        yield session
+
+
+@asynccontextmanager
+async def read_session(
+    api_key: Optional[str] = None, last_write: Optional[str] = None
+) -> AsyncIterator[AsyncSession]:
+    """Open a session on the next healthy replica, or on the primary.
+
+    The primary is used when no replica is configured or reachable and for
+    clients that wrote recently.
+    """
+    if not wrote_recently(api_key, last_write):
+        for replica in replicas.candidates():
+            session = replica.session_maker()
+            try:
+                await session.connection()
+            except (OSError, DBAPIError):
+                await session.close()
+                replica.mark_down()
+                continue
+            async with session:
+                yield session
+            return
+
     async with async_session_maker() as session:
         yield session
+
+
+async def get_read_db(request: Request):
+    async with read_session(
+        request.headers.get("api-key"), request.cookies.get(LAST_WRITE_COOKIE)
+    ) as session:
+        yield session
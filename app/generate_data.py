@@ -0,0 +1,330 @@
+"""Generate a large, skewed synthetic data set for capacity testing.
+
+Follower counts, likes per tweet and tweets per author follow a power law, so
+a handful of celebrity accounts and hot tweets dominate the graph like they do
+in production. The first ``--celebrities`` generated users get the largest
+audiences and are named ``celebrity1``, ``celebrity2``, ...; everyone else is
+``user<id>``. All ids are assigned here, after the ids already in the
+database, and every table is generated from its own fixed seed, so the same
+arguments always produce the same rows.
+
+Rows are streamed to the database in batches through ``COPY`` on PostgreSQL
+(asyncpg) and through ``executemany`` inserts elsewhere. The denormalized
+counters are written together with the rows, except for following counts,
+which one ``UPDATE`` fills in once the follows are loaded. Home timelines are
+left empty and get materialized on the first feed read.
+
+Usage::
+
+    python -m app.generate_data --users 100000 --tweets 1000000 --likes 10000000
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from array import array
+from dataclasses import dataclass
+from itertools import accumulate, islice
+from typing import Dict, Iterable, Iterator, List, Sequence, Tuple
+
+from sqlalchemy import Table, func, insert, text, update
+from sqlalchemy.ext.asyncio import AsyncConnection
+from sqlalchemy.future import select
+
+from app.database import engine
+from app.models.follow import Follow
+from app.models.like import Like
+from app.models.media import Media
+from app.models.media_variant import MediaVariant  # noqa: F401
+from app.models.tweet import Tweet
+from app.models.user import User
+
+BATCH_SIZE = 50000
+
+WORDS = (
+    "hello world today coffee morning news python release weekend music "
+    "football travel photo launch update thread idea team city night"
+).split()
+
+
+@dataclass(frozen=True)
+class DataSetConfig:
+    users: int = 10000
+    tweets: int = 100000
+    follows: int = 500000
+    likes: int = 1000000
+    celebrities: int = 10
+    media_ratio: float = 0.2
+    alpha: float = 1.1
+    seed: int = 42
+
+
+def _batched(rows: Iterable[tuple], size: int) -> Iterator[List[tuple]]:
+    rows = iter(rows)
+    while batch := list(islice(rows, size)):
+        yield batch
+
+
+def zipf_weights(slots: int, alpha: float) -> List[float]:
+    return [1 / rank**alpha for rank in range(1, slots + 1)]
+
+
+def skewed_counts(total: int, slots: int, alpha: float, cap: int) -> List[int]:
+    """Split ``total`` over ``slots`` by a Zipf law, slot 0 gets the most.
+
+    No slot gets more than ``cap``; what the capped slots cannot take is
+    spread over the others, up to ``cap * slots`` in total.
+    """
+    weights = zipf_weights(slots, alpha)
+    counts = [0] * slots
+    remaining = min(total, cap * slots)
+    open_slots = list(range(slots))
+    while remaining > 0:
+        scale = remaining / sum(weights[slot] for slot in open_slots)
+        added = 0
+        for slot in open_slots:
+            share = min(int(weights[slot] * scale), cap - counts[slot])
+            counts[slot] += share
+            added += share
+        open_slots = [slot for slot in open_slots if counts[slot] < cap]
+        remaining -= added
+        if not added:
+            # Shares rounded down to zero, hand out the rest one by one.
+            for slot in open_slots[:remaining]:
+                counts[slot] += 1
+            break
+    return counts
+
+
+class DataSet:
+    """Row generators for one configuration, starting after the given ids."""
+
+    def __init__(self, config: DataSetConfig, first_ids: Dict[str, int]):
+        self.config = config
+        self.first_user_id = first_ids["users"]
+        self.first_tweet_id = first_ids["tweets"]
+        self.first_follow_id = first_ids["follows"]
+        self.first_like_id = first_ids["likes"]
+        self.first_media_id = first_ids["medias"]
+
+        users, tweets = config.users, config.tweets
+        celebrities = min(config.celebrities, users)
+        # Audience rank 0 belongs to the first celebrity; the other ranks are
+        # spread randomly over the remaining users.
+        regular = list(range(celebrities, users))
+        self._rng("audience").shuffle(regular)
+        self.user_by_audience_rank = list(range(celebrities)) + regular
+        self.followers_count = array("l", [0] * users)
+        for rank, count in enumerate(
+            skewed_counts(config.follows, users, config.alpha, users - 1)
+        ):
+            self.followers_count[self.user_by_audience_rank[rank]] = count
+
+        authors_rng = self._rng("authors")
+        user_by_activity_rank = list(range(users))
+        authors_rng.shuffle(user_by_activity_rank)
+        self.tweet_authors = array(
+            "l",
+            authors_rng.choices(
+                user_by_activity_rank,
+                cum_weights=list(accumulate(zipf_weights(users, config.alpha))),
+                k=tweets,
+            ),
+        )
+
+        hot = list(range(tweets))
+        self._rng("hot tweets").shuffle(hot)
+        self.likes_count = array("l", [0] * tweets)
+        for rank, count in enumerate(
+            skewed_counts(config.likes, tweets, config.alpha, users)
+        ):
+            self.likes_count[hot[rank]] = count
+
+    def _rng(self, table: str) -> random.Random:
+        return random.Random(f"{self.config.seed}:{table}")
+
+    def user_name(self, index: int) -> str:
+        if index < self.config.celebrities:
+            return f"celebrity{index + 1}"
+        return f"user{self.first_user_id + index}"
+
+    def users(self) -> Iterator[Tuple[int, str, int]]:
+        for index in range(self.config.users):
+            yield (
+                self.first_user_id + index,
+                self.user_name(index),
+                self.followers_count[index],
+            )
+
+    def tweets(self) -> Iterator[Tuple[int, str, int, int]]:
+        rng = self._rng("tweets")
+        for index in range(self.config.tweets):
+            content = " ".join(rng.choices(WORDS, k=rng.randint(3, 20)))
+            yield (
+                self.first_tweet_id + index,
+                content,
+                self.first_user_id + self.tweet_authors[index],
+                self.likes_count[index],
+            )
+
+    def follows(self) -> Iterator[Tuple[int, int, int]]:
+        rng = self._rng("follows")
+        follow_id = self.first_follow_id
+        for followee, count in enumerate(self.followers_count):
+            if not count:
+                continue
+            followers = rng.sample(range(self.config.users), count + 1)
+            followers = [user for user in followers if user != followee][:count]
+            for follower in followers:
+                yield (
+                    follow_id,
+                    self.first_user_id + follower,
+                    self.first_user_id + followee,
+                )
+                follow_id += 1
+
+    def likes(self) -> Iterator[Tuple[int, int, int]]:
+        rng = self._rng("likes")
+        like_id = self.first_like_id
+        for tweet, count in enumerate(self.likes_count):
+            for user in rng.sample(range(self.config.users), count):
+                yield (like_id, self.first_user_id + user, self.first_tweet_id + tweet)
+                like_id += 1
+
+    def medias(self) -> Iterator[Tuple[int, str, int, int]]:
+        rng = self._rng("medias")
+        media_id = self.first_media_id
+        for tweet in range(self.config.tweets):
+            if rng.random() >= self.config.media_ratio:
+                continue
+            digest = f"{rng.getrandbits(256):064x}"
+            yield (
+                media_id,
+                f"uploads/{digest[:2]}/{digest[2:4]}/{digest}.jpg",
+                self.first_tweet_id + tweet,
+                self.first_user_id + self.tweet_authors[tweet],
+            )
+            media_id += 1
+
+    def tables(self) -> List[Tuple[Table, Sequence[str], Iterable[tuple]]]:
+        """Tables in foreign key order with their columns and rows."""
+        return [
+            (User.__table__, ("id", "name", "followers_count"), self.users()),
+            (
+                Tweet.__table__,
+                ("id", "content", "author_id", "likes_count"),
+                self.tweets(),
+            ),
+            (Follow.__table__, ("id", "follower_id", "following_id"), self.follows()),
+            (Like.__table__, ("id", "user_id", "tweet_id"), self.likes()),
+            (
+                Media.__table__,
+                ("id", "file_path", "tweet_id", "uploader_id"),
+                self.medias(),
+            ),
+        ]
+
+
+async def next_ids(conn: AsyncConnection) -> Dict[str, int]:
+    ids = {}
+    for model in (User, Tweet, Follow, Like, Media):
+        max_id = await conn.scalar(select(func.max(model.id)))
+        ids[model.__tablename__] = (max_id or 0) + 1
+    return ids
+
+
+async def load_rows(
+    conn: AsyncConnection,
+    table: Table,
+    columns: Sequence[str],
+    rows: Iterable[tuple],
+    batch_size: int = BATCH_SIZE,
+) -> int:
+    """Stream ``rows`` into ``table``, returning how many were written."""
+    loaded = 0
+    if conn.dialect.name == "postgresql" and conn.dialect.driver == "asyncpg":
+        raw = await conn.get_raw_connection()
+        for batch in _batched(rows, batch_size):
+            await raw.driver_connection.copy_records_to_table(
+                table.name, records=batch, columns=list(columns)
+            )
+            loaded += len(batch)
+        await conn.execute(
+            text(
+                f"SELECT setval(pg_get_serial_sequence('{table.name}', 'id'), "
+                f"(SELECT max(id) FROM {table.name}))"
+            )
+        )
+        return loaded
+
+    for batch in _batched(rows, batch_size):
+        await conn.execute(insert(table), [dict(zip(columns, row)) for row in batch])
+        loaded += len(batch)
+    return loaded
+
+
+async def generate(
+    conn: AsyncConnection, config: DataSetConfig, batch_size: int = BATCH_SIZE
+) -> Dict[str, int]:
+    """Generate and load a data set, committing table by table."""
+    data_set = DataSet(config, await next_ids(conn))
+    await conn.commit()
+
+    loaded = {}
+    for table, columns, rows in data_set.tables():
+        started = time.perf_counter()
+        loaded[table.name] = await load_rows(conn, table, columns, rows, batch_size)
+        await conn.commit()
+        elapsed = time.perf_counter() - started
+        print(
+            f"{table.name}: {loaded[table.name]} rows in {elapsed:.1f} s "
+            f"({loaded[table.name] / max(elapsed, 1e-9):.0f} rows/s)"
+        )
+
+    # Follows are generated followee by followee, so how many accounts each
+    # user follows is only known after they are loaded.
+    following = (
+        select(func.count(Follow.id))
+        .where(Follow.follower_id == User.id)
+        .scalar_subquery()
+    )
+    await conn.execute(
+        update(User)
+        .where(User.id >= data_set.first_user_id)
+        .values(following_count=following)
+    )
+    await conn.commit()
+    return loaded
+
+
+async def main():
+    defaults = DataSetConfig()
+    parser = argparse.ArgumentParser(description="Generate a synthetic data set")
+    parser.add_argument("--users", type=int, default=defaults.users)
+    parser.add_argument("--tweets", type=int, default=defaults.tweets)
+    parser.add_argument("--follows", type=int, default=defaults.follows)
+    parser.add_argument("--likes", type=int, default=defaults.likes)
+    parser.add_argument("--celebrities", type=int, default=defaults.celebrities)
+    parser.add_argument("--media-ratio", type=float, default=defaults.media_ratio)
+    parser.add_argument("--alpha", type=float, default=defaults.alpha)
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    args = parser.parse_args()
+
+    config = DataSetConfig(
+        users=args.users,
+        tweets=args.tweets,
+        follows=args.follows,
+        likes=args.likes,
+        celebrities=args.celebrities,
+        media_ratio=args.media_ratio,
+        alpha=args.alpha,
+        seed=args.seed,
+    )
+    async with engine.connect() as conn:
+        await generate(conn, config, args.batch_size)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -6,8 +6,10 @@ from app.database import async_session_maker
 from app.models.follow import Follow
 from app.models.like import Like
 from app.models.media import Media
+from app.models.media_variant import MediaVariant  # noqa: F401
 from app.models.tweet import Tweet
 from app.models.user import User
+from app.reconcile_counters import reconcile_counters
 
 
 async def create_test_data():
@@ -54,6 +56,10 @@ async def create_test_data():
         session.add_all([like1, like2, like3])
         await session.commit()
 
+        # The rows above bypass the services, so the denormalized counters
+        # are computed from them in one go.
+        await reconcile_counters(session)
+
 
 if __name__ == "__main__":
     asyncio.run(create_test_data())
@@ -1,16 +1,62 @@
+import asyncio
+import os
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
 
-from app.api.endpoints import follows, medias, tweets, users
+from app.api.endpoints import follows, internal, medias, tags, tweets, users
+from app.api.media_files import MediaFiles
+from app.api.middleware import BodySizeLimitMiddleware, MetricsMiddleware
+from app.api.responses import ORJSONResponse
+from app.services.events import broker
+from app.services.media_storage import (
+    MAX_UPLOAD_SIZE,
+    MULTIPART_OVERHEAD,
+    UPLOAD_DIR,
+)
+from app.services.media_variants import shutdown_executor
+from app.services.trending import (
+    checkpoint_periodically,
+    load_checkpoint,
+    save_checkpoint,
+)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await broker.start()
+    load_checkpoint()
+    checkpoints = asyncio.create_task(checkpoint_periodically())
+    yield
+    checkpoints.cancel()
+    await save_checkpoint()
+    await broker.stop()
+    shutdown_executor()
 
-app = FastAPI(title="Microblog API", redirect_slashes=True)
+
+app = FastAPI(
+    title="Microblog API",
+    redirect_slashes=True,
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
+)
+
+app.add_middleware(
+    BodySizeLimitMiddleware,
+    paths=["/api/medias"],
+    max_body_size=MAX_UPLOAD_SIZE + MULTIPART_OVERHEAD,
+)
+app.add_middleware(MetricsMiddleware)
 
 app.include_router(users.router)
 app.include_router(tweets.router)
 app.include_router(follows.router)
 app.include_router(medias.router)
+app.include_router(tags.router)
+app.include_router(tags.trending_router)
+app.include_router(internal.router)
 
-UPLOAD_DIR = "uploads"
-
-app.mount("/uploads", StaticFiles(directory=UPLOAD_DIR), name="uploads")
+os.makedirs(UPLOAD_DIR, exist_ok=True)
+app.mount("/uploads", MediaFiles(directory=UPLOAD_DIR), name="uploads")
 app.mount("/", StaticFiles(directory="app/static", html=True), name="static")
@@ -0,0 +1,212 @@
+"""Process-local metrics.
+
+Counters and histograms are kept per label set in plain dicts; every worker
+process reports its own numbers. ``render_prometheus`` dumps all of them in
+the Prometheus text exposition format.
+
+Statements executed while serving a request are also collected into the
+request's ``RequestStats``, found through a context variable set by
+``app.api.middleware.MetricsMiddleware``.
+"""
+
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Sequence, Tuple
+
+LabelValues = Tuple[Tuple[str, str], ...]
+
+LATENCY_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+STATEMENT_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 200)
+
+REGISTRY: list = []
+
+
+def _label_values(labels: Dict[str, str]) -> LabelValues:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _format_labels(labels: LabelValues) -> str:
+    if not labels:
+        return ""
+    escaped = (
+        (name, value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for name, value in labels
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+def _format_number(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, registry: list = REGISTRY):
+        self.name = name
+        self.documentation = documentation
+        self.values: Dict[LabelValues, float] = {}
+        registry.append(self)
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = _label_values(labels)
+        self.values[key] = self.values.get(key, 0) + amount
+
+    def get(self, **labels: str) -> float:
+        return self.values.get(_label_values(labels), 0)
+
+    def expose(self) -> List[str]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} counter",
+        ]
+        for labels, value in self.values.items():
+            lines.append(f"{self.name}{_format_labels(labels)} {_format_number(value)}")
+        return lines
+
+    def clear(self) -> None:
+        self.values.clear()
+
+
+class _HistogramSeries:
+    def __init__(self, bucket_count: int):
+        self.buckets: List[int] = [0] * bucket_count
+        self.count = 0
+        self.sum = 0.0
+
+
+class Histogram:
+    """Histogram with fixed upper bounds, buckets are not cumulative."""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+        registry: list = REGISTRY,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.upper_bounds = tuple(buckets)
+        self.series: Dict[LabelValues, _HistogramSeries] = {}
+        registry.append(self)
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = _label_values(labels)
+        series = self.series.get(key)
+        if series is None:
+            series = self.series[key] = _HistogramSeries(len(self.upper_bounds) + 1)
+        series.buckets[bisect_left(self.upper_bounds, value)] += 1
+        series.count += 1
+        series.sum += value
+
+    def snapshot(self, **labels: str) -> dict:
+        series = self.series.get(_label_values(labels))
+        if series is None:
+            series = _HistogramSeries(len(self.upper_bounds) + 1)
+        bounds = [str(bound) for bound in self.upper_bounds] + ["+Inf"]
+        return {
+            "count": series.count,
+            "sum": series.sum,
+            "buckets": dict(zip(bounds, series.buckets)),
+        }
+
+    def expose(self) -> List[str]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} histogram",
+        ]
+        bounds = [_format_number(bound) for bound in self.upper_bounds] + ["+Inf"]
+        for labels, series in self.series.items():
+            cumulative = 0
+            for bound, count in zip(bounds, series.buckets):
+                cumulative += count
+                bucket_labels = _format_labels(labels + (("le", bound),))
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            suffix = _format_labels(labels)
+            lines.append(f"{self.name}_sum{suffix} {_format_number(series.sum)}")
+            lines.append(f"{self.name}_count{suffix} {series.count}")
+        return lines
+
+    def clear(self) -> None:
+        self.series.clear()
+
+
+def render_prometheus() -> str:
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.expose())
+    return "\n".join(lines) + "\n"
+
+
+class RequestStats:
+    """SQL statements issued while serving one request."""
+
+    def __init__(self):
+        self.statement_count = 0
+        self.db_seconds = 0.0
+        self.statements: Dict[str, List[float]] = {}
+        self.finished = False
+
+    def record(self, statement: str, seconds: float) -> None:
+        if self.finished:
+            # Background tasks run after the response, they are not part of it.
+            return
+        self.statement_count += 1
+        self.db_seconds += seconds
+        totals = self.statements.setdefault(" ".join(statement.split()), [0, 0.0])
+        totals[0] += 1
+        totals[1] += seconds
+
+    def breakdown(self, limit: int = 10) -> List[Tuple[str, int, float]]:
+        """The statements that took most time, as ``(sql, count, seconds)``."""
+        rows = [
+            (sql, count, seconds) for sql, (count, seconds) in self.statements.items()
+        ]
+        rows.sort(key=lambda row: row[2], reverse=True)
+        return rows[:limit]
+
+
+current_request: ContextVar[Optional[RequestStats]] = ContextVar(
+    "current_request", default=None
+)
+
+
+def record_statement(statement: str, seconds: float) -> None:
+    stats = current_request.get()
+    if stats is not None:
+        stats.record(statement, seconds)
+
+
+pool_wait_seconds = Histogram(
+    "db_pool_wait_seconds", "Time spent waiting for a pooled connection."
+)
+pool_checkout_timeouts = Counter(
+    "db_pool_checkout_timeouts_total", "Checkouts that gave up after pool_timeout."
+)
+pool_connections_opened = Counter(
+    "db_pool_connections_opened_total", "New DBAPI connections opened by the pool."
+)
+request_seconds = Histogram(
+    "http_request_duration_seconds", "Time until the response body was sent."
+)
+request_statements = Histogram(
+    "http_request_db_statements",
+    "SQL statements executed per request.",
+    buckets=STATEMENT_COUNT_BUCKETS,
+)
+request_db_seconds = Histogram(
+    "http_request_db_seconds", "Time spent executing SQL per request."
+)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, ForeignKey, Integer, UniqueConstraint
+from sqlalchemy import Column, ForeignKey, Index, Integer, UniqueConstraint
 from sqlalchemy.orm import relationship
 
 from app.models.base import Base
@@ -14,7 +14,10 @@ class Like(Base):
         Integer, ForeignKey("tweets.id", ondelete="CASCADE"), nullable=False
     )
 
-    __table_args__ = (UniqueConstraint("user_id", "tweet_id", name="unique_like"),)
+    __table_args__ = (
+        UniqueConstraint("user_id", "tweet_id", name="unique_like"),
+        Index("ix_likes_tweet_user", "tweet_id", "user_id"),
+    )
 
     user = relationship("User", back_populates="likes")
     tweet = relationship("Tweet", back_populates="likes")
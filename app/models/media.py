@@ -10,6 +10,12 @@ class Media(Base):
     id = Column(Integer, primary_key=True, index=True)
     file_path = Column(String, nullable=False)
     tweet_id = Column(
-        Integer, ForeignKey("tweets.id", ondelete="CASCADE"), nullable=True
+        Integer, ForeignKey("tweets.id", ondelete="CASCADE"), nullable=True, index=True
+    )
+    uploader_id = Column(
+        Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True
     )
     tweet = relationship("Tweet", back_populates="medias")
+    variants = relationship(
+        "MediaVariant", back_populates="media", cascade="all, delete-orphan"
+    )
@@ -0,0 +1,23 @@
+from sqlalchemy import Column, ForeignKey, Integer, String, UniqueConstraint
+from sqlalchemy.orm import relationship
+
+from app.models.base import Base
+
+
+class MediaVariant(Base):
+    __tablename__ = "media_variants"
+
+    id = Column(Integer, primary_key=True, index=True)
+    media_id = Column(
+        Integer, ForeignKey("medias.id", ondelete="CASCADE"), nullable=False
+    )
+    kind = Column(String, nullable=False)
+    file_path = Column(String, nullable=False)
+    width = Column(Integer, nullable=False)
+    height = Column(Integer, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("media_id", "kind", name="unique_media_variant"),
+    )
+
+    media = relationship("Media", back_populates="variants")
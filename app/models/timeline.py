@@ -0,0 +1,22 @@
+from sqlalchemy import Column, ForeignKey, Index, Integer
+
+from app.models.base import Base
+
+
+class TimelineEntry(Base):
+    __tablename__ = "timeline_entries"
+
+    user_id = Column(
+        Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+    )
+    tweet_id = Column(
+        Integer, ForeignKey("tweets.id", ondelete="CASCADE"), primary_key=True
+    )
+    author_id = Column(
+        Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False
+    )
+
+    __table_args__ = (
+        Index("ix_timeline_entries_user_author", "user_id", "author_id"),
+        Index("ix_timeline_entries_tweet_id", "tweet_id"),
+    )
@@ -1,8 +1,22 @@
-from sqlalchemy import Column, ForeignKey, Integer, String
+from sqlalchemy import (
+    DDL,
+    Column,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    event,
+    func,
+)
 from sqlalchemy.orm import relationship
 
 from app.models.base import Base
 
+# Text search configuration of the search index. "simple" only lowercases, so
+# tweets in any language are matched word for word.
+SEARCH_CONFIG = "simple"
+
 
 class Tweet(Base):
     __tablename__ = "tweets"
@@ -10,7 +24,55 @@ class Tweet(Base):
     id = Column(Integer, primary_key=True, index=True)
     content = Column(String, nullable=False)
     author_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    likes_count = Column(Integer, nullable=False, default=0, server_default="0")
+    # Set in the INSERT itself; the server default covers COPY loads.
+    created_at = Column(
+        DateTime(timezone=True),
+        nullable=False,
+        default=func.now(),
+        server_default=func.now(),
+    )
+
+    __table_args__ = (Index("ix_tweets_author_id_id", "author_id", "id"),)
 
     author = relationship("User")
     likes = relationship("Like", back_populates="tweet", cascade="all, delete-orphan")
     medias = relationship("Media", back_populates="tweet")
+
+
+# The full-text index is dialect specific and not mapped: a trigger-maintained
+# tsvector column with a GIN index on PostgreSQL, an external content FTS5
+# table kept in sync by triggers on SQLite. See app.services.search.
+SEARCH_DDL = {
+    "postgresql": [
+        "ALTER TABLE tweets ADD COLUMN search_vector tsvector",
+        "CREATE TRIGGER tweets_search_vector BEFORE INSERT OR UPDATE OF content "
+        "ON tweets FOR EACH ROW EXECUTE FUNCTION tsvector_update_trigger("
+        f"search_vector, 'pg_catalog.{SEARCH_CONFIG}', content)",
+        "CREATE INDEX ix_tweets_search_vector ON tweets USING gin (search_vector)",
+    ],
+    "sqlite": [
+        "CREATE VIRTUAL TABLE tweets_fts USING fts5("
+        "content, content='tweets', content_rowid='id')",
+        "CREATE TRIGGER tweets_fts_insert AFTER INSERT ON tweets BEGIN "
+        "INSERT INTO tweets_fts (rowid, content) VALUES (new.id, new.content); END",
+        "CREATE TRIGGER tweets_fts_delete AFTER DELETE ON tweets BEGIN "
+        "INSERT INTO tweets_fts (tweets_fts, rowid, content) "
+        "VALUES ('delete', old.id, old.content); END",
+        "CREATE TRIGGER tweets_fts_update AFTER UPDATE OF content ON tweets BEGIN "
+        "INSERT INTO tweets_fts (tweets_fts, rowid, content) "
+        "VALUES ('delete', old.id, old.content); "
+        "INSERT INTO tweets_fts (rowid, content) VALUES (new.id, new.content); END",
+    ],
+}
+
+for dialect, statements in SEARCH_DDL.items():
+    for statement in statements:
+        event.listen(
+            Tweet.__table__, "after_create", DDL(statement).execute_if(dialect=dialect)
+        )
+event.listen(
+    Tweet.__table__,
+    "after_drop",
+    DDL("DROP TABLE IF EXISTS tweets_fts").execute_if(dialect="sqlite"),
+)
@@ -0,0 +1,16 @@
+from sqlalchemy import Column, ForeignKey, Index, Integer
+
+from app.models.base import Base
+
+
+class TweetMention(Base):
+    __tablename__ = "tweet_mentions"
+
+    user_id = Column(
+        Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+    )
+    tweet_id = Column(
+        Integer, ForeignKey("tweets.id", ondelete="CASCADE"), primary_key=True
+    )
+
+    __table_args__ = (Index("ix_tweet_mentions_tweet_id", "tweet_id"),)
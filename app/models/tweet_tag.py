@@ -0,0 +1,17 @@
+from sqlalchemy import Column, ForeignKey, Index, Integer, String
+
+from app.models.base import Base
+
+MAX_TAG_LENGTH = 100
+
+
+class TweetTag(Base):
+    __tablename__ = "tweet_tags"
+
+    # The primary key doubles as the index of tag timelines, newest first.
+    tag = Column(String(MAX_TAG_LENGTH), primary_key=True)
+    tweet_id = Column(
+        Integer, ForeignKey("tweets.id", ondelete="CASCADE"), primary_key=True
+    )
+
+    __table_args__ = (Index("ix_tweet_tags_tweet_id", "tweet_id"),)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import Boolean, Column, Integer, String, false
 from sqlalchemy.orm import relationship
 
 from app.models.base import Base
@@ -8,7 +8,23 @@ class User(Base):
     __tablename__ = "users"
 
     id = Column(Integer, primary_key=True, index=True)
-    name = Column(String, nullable=False)
+    name = Column(String, nullable=False, unique=True, index=True)
+    followers_count = Column(Integer, nullable=False, default=0, server_default="0")
+    following_count = Column(Integer, nullable=False, default=0, server_default="0")
+    # Bumped by every write that changes the user's profile or their tweets,
+    # see app.services.versions.
+    version = Column(Integer, nullable=False, default=0, server_default="0")
+    # Set once the home timeline was materialized from the follow graph, see
+    # app.services.timeline.rebuild_timeline.
+    timeline_built = Column(
+        Boolean, nullable=False, default=False, server_default=false()
+    )
+
+    # Set once the user had enough followers to be served on read, see
+    # app.services.timeline.
+    fan_out_on_read = Column(
+        Boolean, nullable=False, default=False, server_default=false()
+    )
 
     likes = relationship("Like", back_populates="user", cascade="all, delete-orphan")
     followers = relationship(
@@ -0,0 +1,91 @@
+import argparse
+import asyncio
+
+from sqlalchemy import func, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.database import async_session_maker
+from app.models.follow import Follow
+from app.models.like import Like
+from app.models.media import Media  # noqa: F401
+from app.models.media_variant import MediaVariant  # noqa: F401
+from app.models.tweet import Tweet
+from app.models.user import User
+from app.services.timeline import keep_on_read
+
+BATCH_SIZE = 10000
+
+
+async def _reconcile(
+    session: AsyncSession, model, counter, actual, batch_size, values=None
+):
+    """Rewrite ``counter`` wherever it differs from ``actual``, batch by batch.
+
+    ``values`` are extra columns to set on the rewritten rows.
+    """
+    max_id = await session.scalar(select(func.max(model.id))) or 0
+    fixed = 0
+    for start in range(0, max_id + 1, batch_size):
+        result = await session.execute(
+            update(model)
+            .where(
+                model.id >= start,
+                model.id < start + batch_size,
+                counter != actual,
+            )
+            .values({counter: actual, **(values or {})})
+            .execution_options(synchronize_session=False)
+        )
+        await session.commit()
+        fixed += result.rowcount
+    return fixed
+
+
+async def reconcile_counters(session: AsyncSession, batch_size: int = BATCH_SIZE):
+    """Fix drift of the denormalized counters, returning the rows changed."""
+    likes = (
+        select(func.count(Like.id)).where(Like.tweet_id == Tweet.id).scalar_subquery()
+    )
+    followers = (
+        select(func.count(Follow.id))
+        .where(Follow.following_id == User.id)
+        .scalar_subquery()
+    )
+    following = (
+        select(func.count(Follow.id))
+        .where(Follow.follower_id == User.id)
+        .scalar_subquery()
+    )
+    return {
+        "likes_count": await _reconcile(
+            session, Tweet, Tweet.likes_count, likes, batch_size
+        ),
+        "followers_count": await _reconcile(
+            session,
+            User,
+            User.followers_count,
+            followers,
+            batch_size,
+            {User.fan_out_on_read: keep_on_read()},
+        ),
+        "following_count": await _reconcile(
+            session, User, User.following_count, following, batch_size
+        ),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Fix denormalized counter drift")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    args = parser.parse_args()
+
+    async with async_session_maker() as session:
+        fixed = await reconcile_counters(session, args.batch_size)
+
+    for counter, rows in fixed.items():
+        print(f"{counter}: {rows} rows fixed")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,4 +1,8 @@
-from pydantic import BaseModel
+from typing import List, Optional
+
+from pydantic import BaseModel, Field
+
+from app.schemas.user import MAX_BATCH_SIZE, UserBase
 
 
 class FollowResponse(BaseModel):
@@ -11,9 +15,26 @@ class UnfollowResponse(BaseModel):
 
 class GetFollowersResponse(BaseModel):
     result: bool
-    followers: list
+    followers: List[UserBase]
+    next_cursor: Optional[int] = None
 
 
 class GetFollowingResponse(BaseModel):
     result: bool
-    following: list
+    following: List[UserBase]
+    next_cursor: Optional[int] = None
+
+
+class FollowBatchRequest(BaseModel):
+    user_ids: List[int] = Field(min_length=1, max_length=MAX_BATCH_SIZE)
+
+
+class FollowBatchItem(BaseModel):
+    user_id: int
+    result: bool
+    detail: Optional[str] = None
+
+
+class FollowBatchResponse(BaseModel):
+    result: bool
+    results: List[FollowBatchItem]
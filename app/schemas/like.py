@@ -1,4 +1,8 @@
-from pydantic import BaseModel
+from typing import List, Optional
+
+from pydantic import BaseModel, Field
+
+from app.schemas.user import MAX_BATCH_SIZE
 
 
 class LikeResponse(BaseModel):
@@ -9,3 +13,18 @@ class LikeResponse(BaseModel):
 class LikeRemovedResponse(BaseModel):
     result: bool
     message: str
+
+
+class LikeBatchRequest(BaseModel):
+    tweet_ids: List[int] = Field(min_length=1, max_length=MAX_BATCH_SIZE)
+
+
+class LikeBatchItem(BaseModel):
+    tweet_id: int
+    result: bool
+    detail: Optional[str] = None
+
+
+class LikeBatchResponse(BaseModel):
+    result: bool
+    results: List[LikeBatchItem]
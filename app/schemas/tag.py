@@ -0,0 +1,13 @@
+from typing import List
+
+from pydantic import BaseModel
+
+
+class TrendingTag(BaseModel):
+    tag: str
+    count: int
+
+
+class TrendingTagsResponse(BaseModel):
+    result: bool
+    tags: List[TrendingTag]
@@ -1,3 +1,4 @@
+import enum
 from typing import List, Optional
 
 from pydantic import BaseModel
@@ -13,17 +14,48 @@ class TweetResponse(BaseModel):
     tweet_id: int
 
 
+class TweetMedia(BaseModel):
+    id: int
+    url: str
+    thumbnail_url: Optional[str] = None
+    medium_url: Optional[str] = None
+
+
+class TweetAuthor(BaseModel):
+    id: int
+    name: str
+
+
+class TweetLike(BaseModel):
+    user_id: int
+    name: str
+
+
 class TweetDetail(BaseModel):
     id: int
     content: str
-    attachments: list
-    author: dict
-    likes: List[dict]
+    attachments: List[str]
+    media: List[TweetMedia]
+    author: TweetAuthor
+    likes: List[TweetLike]
+    likes_count: int
+
+
+class FeedMode(str, enum.Enum):
+    LATEST = "latest"
+    TOP = "top"
 
 
 class TweetListResponse(BaseModel):
     result: bool
     tweets: List[TweetDetail]
+    next_cursor: Optional[int] = None
+
+
+class TweetSearchResponse(BaseModel):
+    result: bool
+    tweets: List[TweetDetail]
+    next_cursor: Optional[str] = None
 
 
 class TweetDeleteResponse(BaseModel):
@@ -1,7 +1,10 @@
-from typing import List
+from typing import List, Optional
 
 from pydantic import BaseModel
 
+# Most ids one batch request may carry, shared by the batch endpoints.
+MAX_BATCH_SIZE = 100
+
 
 class UserBase(BaseModel):
     id: int
@@ -9,10 +12,26 @@ class UserBase(BaseModel):
 
 
 class UserProfile(UserBase):
-    followers: List[UserBase]
-    following: List[UserBase]
+    followers_count: int
+    following_count: int
+    followers: Optional[List[UserBase]] = None
+    following: Optional[List[UserBase]] = None
+    # Whether the caller follows this user; only set when they sent an api-key.
+    is_following: Optional[bool] = None
 
 
 class UserResponse(BaseModel):
     result: bool
     user: UserProfile
+
+
+class UserBatchResponse(BaseModel):
+    result: bool
+    users: List[UserBase]
+    not_found: List[int]
+
+
+class UserListResponse(BaseModel):
+    result: bool
+    users: List[UserBase]
+    next_cursor: Optional[int] = None
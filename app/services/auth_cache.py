@@ -0,0 +1,106 @@
+"""In-process cache of ``api_key`` → user lookups.
+
+Entries expire after ``AUTH_CACHE_TTL`` seconds and the least recently used
+ones are evicted above ``AUTH_CACHE_SIZE``. Concurrent misses for the same key
+share a single database query. Renaming or deleting a ``User`` through the ORM
+invalidates its entry in this process; other workers catch up within the TTL.
+"""
+
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+import anyio
+from sqlalchemy import event, inspect
+
+from app.models.user import User
+
+AUTH_CACHE_SIZE = int(os.getenv("AUTH_CACHE_SIZE", "10000"))
+AUTH_CACHE_TTL = float(os.getenv("AUTH_CACHE_TTL", "60"))
+
+
+@dataclass(frozen=True)
+class AuthUser:
+    id: int
+    name: str
+
+
+class _Inflight:
+    def __init__(self):
+        self.done = anyio.Event()
+        self.finished = False
+        self.user: Optional[AuthUser] = None
+        self.error: Optional[Exception] = None
+
+
+class ApiKeyCache:
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, AuthUser]]" = OrderedDict()
+        self._inflight: Dict[str, _Inflight] = {}
+
+    async def get(
+        self, api_key: str, load: Callable[[], Awaitable[Optional[AuthUser]]]
+    ) -> Optional[AuthUser]:
+        entry = self._entries.get(api_key)
+        if entry is not None:
+            expires_at, user = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(api_key)
+                return user
+            del self._entries[api_key]
+
+        inflight = self._inflight.get(api_key)
+        if inflight is not None:
+            await inflight.done.wait()
+            if not inflight.finished:
+                # The loading request was cancelled, load on our own.
+                return await self.get(api_key, load)
+            if inflight.error is not None:
+                raise inflight.error
+            return inflight.user
+
+        inflight = self._inflight[api_key] = _Inflight()
+        try:
+            inflight.user = await load()
+            inflight.finished = True
+        except Exception as exc:
+            inflight.error = exc
+            inflight.finished = True
+            raise
+        finally:
+            del self._inflight[api_key]
+            inflight.done.set()
+
+        if inflight.user is not None:
+            self._store(api_key, inflight.user)
+        return inflight.user
+
+    def _store(self, api_key: str, user: AuthUser) -> None:
+        self._entries[api_key] = (time.monotonic() + self.ttl, user)
+        self._entries.move_to_end(api_key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, api_key: str) -> None:
+        self._entries.pop(api_key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+api_key_cache = ApiKeyCache(AUTH_CACHE_SIZE, AUTH_CACHE_TTL)
+
+
+@event.listens_for(User, "after_update")
+def _invalidate_renamed_user(mapper, connection, target):
+    for old_name in inspect(target).attrs.name.history.deleted:
+        api_key_cache.invalidate(old_name)
+
+
+@event.listens_for(User, "after_delete")
+def _invalidate_deleted_user(mapper, connection, target):
+    api_key_cache.invalidate(target.name)
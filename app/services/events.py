@@ -0,0 +1,230 @@
+"""Live feed events for connected clients.
+
+Every author has a channel. Writes publish small events on it (a new or
+deleted tweet, a change of a tweet's like count) and the feed stream
+subscribes to the channels of the reader and of everyone they follow.
+
+Events are published inside the write's transaction and only reach
+subscribers once it commits; a rollback drops them. Each event is encoded
+once into a Server-Sent Events frame that is shared by all subscribers.
+
+``EVENT_BROKER=memory`` (the default) delivers events inside the process,
+which is enough for a single worker. With several workers
+``EVENT_BROKER=postgres`` sends them through ``NOTIFY`` on the primary;
+every worker listens for them and delivers them to its own subscribers.
+"""
+
+import asyncio
+import logging
+import os
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import anyio
+import orjson
+from sqlalchemy import event, func
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy.orm import Session
+
+from app.database import DATABASE_URL
+
+EVENT_BROKER = os.getenv("EVENT_BROKER", "memory")
+# Events a subscriber may fall behind by before it is disconnected.
+STREAM_BUFFER_SIZE = int(os.getenv("STREAM_BUFFER_SIZE", "256"))
+NOTIFY_CHANNEL = "feed_events"
+LISTEN_RETRY_SECONDS = 5
+
+PENDING_EVENTS = "pending_events"
+
+logger = logging.getLogger(__name__)
+
+
+def sse_frame(event_data: dict) -> bytes:
+    return (
+        b"event: "
+        + event_data["type"].encode()
+        + b"\ndata: "
+        + orjson.dumps(event_data)
+        + b"\n\n"
+    )
+
+
+class Subscription:
+    """Frames published on a set of channels, in order.
+
+    Iteration stops when the subscriber fell more than ``STREAM_BUFFER_SIZE``
+    events behind; the client has to reload its feed then.
+    """
+
+    def __init__(self, broker: "InProcessBroker", channels: Set[int], size: int):
+        self.broker = broker
+        self.channels = channels
+        self.send_stream, self.receive_stream = anyio.create_memory_object_stream(size)
+        self.overflowed = False
+
+    def offer(self, frame: bytes) -> None:
+        try:
+            self.send_stream.send_nowait(frame)
+        except anyio.WouldBlock:
+            self.overflowed = True
+            self.send_stream.close()
+        except anyio.ClosedResourceError:
+            pass
+
+    async def receive(self) -> bytes:
+        """The next frame, raises ``anyio.EndOfStream`` once closed."""
+        return await self.receive_stream.receive()
+
+    def close(self) -> None:
+        self.broker.unsubscribe(self)
+        self.send_stream.close()
+        self.receive_stream.close()
+
+    def __enter__(self) -> "Subscription":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class InProcessBroker:
+    def __init__(self, buffer_size: int = STREAM_BUFFER_SIZE):
+        self.buffer_size = buffer_size
+        self.subscribers: Dict[int, Set[Subscription]] = {}
+
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+    def subscribe(self, channels: Iterable[int]) -> Subscription:
+        subscription = Subscription(self, set(channels), self.buffer_size)
+        for channel in subscription.channels:
+            self.subscribers.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        for channel in subscription.channels:
+            subscribers = self.subscribers.get(channel)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self.subscribers[channel]
+
+    def deliver(self, channel: int, frame: bytes) -> None:
+        for subscription in list(self.subscribers.get(channel, ())):
+            subscription.offer(frame)
+
+    async def publish(self, db: AsyncSession, channel: int, event_data: dict) -> None:
+        db.info.setdefault(PENDING_EVENTS, []).append((channel, sse_frame(event_data)))
+
+    def flush(self, pending: List[Tuple[int, bytes]]) -> None:
+        for channel, frame in pending:
+            self.deliver(channel, frame)
+
+
+class PostgresBroker(InProcessBroker):
+    """Deliver events of every worker through ``LISTEN/NOTIFY``.
+
+    ``NOTIFY`` is transactional, so PostgreSQL itself holds the events back
+    until the write commits. Each worker keeps one extra connection to listen
+    on, outside of the pool.
+    """
+
+    def __init__(self, url: str, buffer_size: int = STREAM_BUFFER_SIZE):
+        super().__init__(buffer_size)
+        self.dsn = (
+            make_url(url)
+            .set(drivername="postgresql")
+            .render_as_string(hide_password=False)
+        )
+        self.connection = None
+        self._reconnect: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        import asyncpg
+
+        connection = await asyncpg.connect(self.dsn)
+        try:
+            connection.add_termination_listener(self._on_terminated)
+            await connection.add_listener(NOTIFY_CHANNEL, self._on_notification)
+        except BaseException:
+            connection.terminate()
+            raise
+        self.connection = connection
+
+    async def stop(self) -> None:
+        if self._reconnect is not None:
+            self._reconnect.cancel()
+            self._reconnect = None
+        if self.connection is not None:
+            connection, self.connection = self.connection, None
+            connection.remove_termination_listener(self._on_terminated)
+            await connection.close()
+
+    def _on_notification(self, connection, pid, channel, payload: str) -> None:
+        message = orjson.loads(payload)
+        self.deliver(message["channel"], sse_frame(message["event"]))
+
+    def _on_terminated(self, connection) -> None:
+        logger.warning("Lost the %s listener connection", NOTIFY_CHANNEL)
+        self.connection = None
+        self._reconnect = asyncio.get_running_loop().create_task(self._listen_again())
+
+    async def _listen_again(self) -> None:
+        import asyncpg
+
+        while self.connection is None:
+            await asyncio.sleep(LISTEN_RETRY_SECONDS)
+            try:
+                await self.start()
+            except (OSError, asyncpg.PostgresError, asyncpg.InterfaceError):
+                logger.warning("Could not listen on %s, retrying", NOTIFY_CHANNEL)
+        self._reconnect = None
+
+    async def publish(self, db: AsyncSession, channel: int, event_data: dict) -> None:
+        payload = orjson.dumps({"channel": channel, "event": event_data}).decode()
+        await db.execute(select(func.pg_notify(NOTIFY_CHANNEL, payload)))
+
+
+def create_broker() -> InProcessBroker:
+    if EVENT_BROKER == "postgres":
+        return PostgresBroker(DATABASE_URL)
+    if EVENT_BROKER != "memory":
+        raise ValueError(f"Unknown EVENT_BROKER {EVENT_BROKER!r}")
+    return InProcessBroker()
+
+
+broker = create_broker()
+
+
+async def publish(db: AsyncSession, channel: int, event_data: dict) -> None:
+    """Publish ``event_data`` on ``channel`` when ``db`` commits."""
+    await broker.publish(db, channel, event_data)
+
+
+async def publish_tweet_event(
+    db: AsyncSession, event_type: str, tweet_id: int, author_id: int, **fields
+) -> None:
+    """Publish an event about a tweet on its author's channel."""
+    await publish(
+        db,
+        author_id,
+        {"type": event_type, "tweet_id": tweet_id, "author_id": author_id, **fields},
+    )
+
+
+@event.listens_for(Session, "after_commit")
+def _deliver_events(session: Session) -> None:
+    pending = session.info.pop(PENDING_EVENTS, None)
+    if pending:
+        broker.flush(pending)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _drop_events(session: Session, previous_transaction) -> None:
+    # Also fires when nothing reached the database yet, unlike after_rollback.
+    if not previous_transaction.nested:
+        session.info.pop(PENDING_EVENTS, None)
@@ -0,0 +1,59 @@
+from typing import List, Sequence
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, selectinload
+from sqlalchemy.sql import Select
+
+from app.models.like import Like
+from app.models.media import Media
+from app.models.tweet import Tweet
+from app.schemas.tweet import TweetAuthor, TweetDetail, TweetLike, TweetMedia
+
+
+def with_feed_relations(query: Select) -> Select:
+    """Eager-load everything a feed entry needs in a fixed number of queries.
+
+    Authors are joined into the tweet query, attachments and their resized
+    variants are fetched with one ``IN`` query each, likes are fetched in one
+    query joined with the liker's name.
+    """
+    return query.options(
+        joinedload(Tweet.author),
+        selectinload(Tweet.likes).joinedload(Like.user),
+        selectinload(Tweet.medias).selectinload(Media.variants),
+    )
+
+
+def to_tweet_media(media: Media) -> TweetMedia:
+    variants = {variant.kind: variant.file_path for variant in media.variants}
+    return TweetMedia(
+        id=media.id,
+        url=media.file_path,
+        thumbnail_url=variants.get("thumbnail"),
+        medium_url=variants.get("medium"),
+    )
+
+
+def to_tweet_detail(tweet: Tweet) -> TweetDetail:
+    return TweetDetail(
+        id=tweet.id,
+        content=tweet.content,
+        attachments=[media.file_path for media in tweet.medias],
+        media=[to_tweet_media(media) for media in tweet.medias],
+        author=TweetAuthor(id=tweet.author.id, name=tweet.author.name),
+        likes=[
+            TweetLike(
+                user_id=like.user_id,
+                name=like.user.name if like.user else "Unknown",
+            )
+            for like in tweet.likes
+        ],
+        likes_count=tweet.likes_count,
+    )
+
+
+async def load_tweet_details(db: AsyncSession, query: Select) -> List[TweetDetail]:
+    """Run a ``select(Tweet)`` query and build ``TweetDetail`` for every row."""
+    result = await db.execute(with_feed_relations(query))
+    tweets: Sequence[Tweet] = result.scalars().all()
+    return [to_tweet_detail(tweet) for tweet in tweets]
@@ -0,0 +1,153 @@
+from typing import Dict, List, Optional, Sequence
+
+from sqlalchemy import Integer, Row, case, exists, insert, literal, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.models.follow import Follow
+from app.models.timeline import TimelineEntry
+from app.models.user import User
+from app.services.timeline import (
+    ENTRY_COLUMNS,
+    backfill_follow,
+    backfill_follows,
+    backfill_query,
+)
+from app.services.upsert import (
+    WriteOutcome,
+    dialect_name,
+    insert_ignoring_conflicts,
+    write_outcome,
+)
+
+# For each list of a user: the follows column holding the user and the one
+# holding the listed users.
+FOLLOW_SIDES = {
+    "followers": (Follow.following_id, Follow.follower_id),
+    "following": (Follow.follower_id, Follow.following_id),
+}
+
+
+async def add_follow(
+    db: AsyncSession, follower_id: int, following_id: int
+) -> WriteOutcome:
+    """Insert a follow, bump the counter and versions, backfill the timeline."""
+    target = select(User.id).where(User.id == following_id)
+    insert_follow = (
+        insert_ignoring_conflicts(db, Follow)
+        .from_select(
+            ["follower_id", "following_id"],
+            select(literal(follower_id, Integer), User.id).where(
+                User.id == following_id
+            ),
+        )
+        .returning(Follow.following_id)
+    )
+    # Both sides get a new version and one of the two counters.
+    bump = (
+        update(User)
+        .where(User.id.in_([follower_id, following_id]))
+        .values(
+            followers_count=User.followers_count
+            + case((User.id == following_id, 1), else_=0),
+            following_count=User.following_count
+            + case((User.id == follower_id, 1), else_=0),
+            version=User.version + 1,
+        )
+    )
+
+    if dialect_name(db) == "postgresql":
+        target = target.cte("target")
+        inserted = insert_follow.cte("inserted")
+        was_inserted = exists(select(inserted.c.following_id))
+        bumped = bump.where(was_inserted).cte("bumped")
+        backfilled = (
+            insert(TimelineEntry)
+            .from_select(
+                ENTRY_COLUMNS,
+                backfill_query(follower_id, following_id).where(was_inserted),
+            )
+            .cte("backfilled")
+        )
+        row = (
+            await db.execute(
+                select(
+                    exists(select(target.c.id)).label("found"),
+                    was_inserted.label("created"),
+                ).add_cte(bumped, backfilled)
+            )
+        ).one()
+        found, created = row.found, row.created
+    else:
+        created = (await db.execute(insert_follow)).first() is not None
+        if created:
+            await db.execute(bump)
+            await backfill_follow(db, follower_id, following_id)
+            found = True
+        else:
+            found = (await db.scalar(target)) is not None
+
+    return write_outcome(found, created)
+
+
+async def add_follows(
+    db: AsyncSession, follower_id: int, following_ids: List[int]
+) -> Dict[int, WriteOutcome]:
+    """Follow several users at once in a constant number of statements."""
+    inserted = await db.execute(
+        insert_ignoring_conflicts(db, Follow)
+        .from_select(
+            ["follower_id", "following_id"],
+            select(literal(follower_id, Integer), User.id).where(
+                User.id.in_(following_ids)
+            ),
+        )
+        .returning(Follow.following_id)
+    )
+    created = set(inserted.scalars())
+    if created:
+        await db.execute(
+            update(User)
+            .where(User.id.in_(created | {follower_id}))
+            .values(
+                followers_count=User.followers_count
+                + case((User.id == follower_id, 0), else_=1),
+                following_count=User.following_count
+                + case((User.id == follower_id, len(created)), else_=0),
+                version=User.version + 1,
+            )
+        )
+        await backfill_follows(db, follower_id, created)
+
+    found = set(created)
+    missing = set(following_ids) - created
+    if missing:
+        existing = await db.execute(select(User.id).where(User.id.in_(missing)))
+        found.update(existing.scalars())
+
+    return {
+        user_id: write_outcome(user_id in found, user_id in created)
+        for user_id in following_ids
+    }
+
+
+async def list_follow_users(
+    db: AsyncSession,
+    user_id: int,
+    side: str,
+    limit: int,
+    max_id: Optional[int] = None,
+) -> Sequence[Row]:
+    """Select ``(id, name)`` of a user's followers or following, highest id first.
+
+    Pages are cut on the listed users' ids, which makes every page a range
+    scan over ``(following_id, follower_id)`` or ``unique_follow``.
+    """
+    own, listed = FOLLOW_SIDES[side]
+    query = (
+        select(User.id, User.name).join(Follow, listed == User.id).where(own == user_id)
+    )
+    if max_id is not None:
+        query = query.where(listed < max_id)
+    result = await db.execute(query.order_by(listed.desc()).limit(limit))
+    return result.all()
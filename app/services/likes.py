@@ -0,0 +1,101 @@
+from typing import Dict, List, NamedTuple, Optional
+
+from sqlalchemy import Integer, exists, literal, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.models.like import Like
+from app.models.tweet import Tweet
+from app.services.upsert import (
+    WriteOutcome,
+    dialect_name,
+    insert_ignoring_conflicts,
+    write_outcome,
+)
+from app.services.versions import bump_authors, bump_versions
+
+
+class LikeWrite(NamedTuple):
+    outcome: WriteOutcome
+    # Author of the liked tweet, None when the tweet does not exist.
+    author_id: Optional[int]
+
+
+async def add_like(db: AsyncSession, user_id: int, tweet_id: int) -> LikeWrite:
+    """Insert a like and bump the tweet's counter and author's version."""
+    target = select(Tweet.author_id).where(Tweet.id == tweet_id)
+    insert_like = (
+        insert_ignoring_conflicts(db, Like)
+        .from_select(
+            ["user_id", "tweet_id"],
+            select(literal(user_id, Integer), Tweet.id).where(Tweet.id == tweet_id),
+        )
+        .returning(Like.tweet_id)
+    )
+    bump = update(Tweet).values(likes_count=Tweet.likes_count + 1)
+
+    if dialect_name(db) == "postgresql":
+        target = target.cte("target")
+        inserted = insert_like.cte("inserted")
+        bumped = bump.where(Tweet.id.in_(select(inserted.c.tweet_id))).cte("bumped")
+        versioned = bump_authors(select(inserted.c.tweet_id)).cte("versioned")
+        row = (
+            await db.execute(
+                select(
+                    select(target.c.author_id).scalar_subquery().label("author_id"),
+                    exists(select(inserted.c.tweet_id)).label("created"),
+                ).add_cte(bumped, versioned)
+            )
+        ).one()
+        author_id, created = row.author_id, row.created
+    else:
+        created = (await db.execute(insert_like)).first() is not None
+        if created:
+            author_id = await db.scalar(
+                bump.where(Tweet.id == tweet_id).returning(Tweet.author_id)
+            )
+            await db.execute(bump_versions([author_id]))
+        else:
+            author_id = await db.scalar(target)
+
+    return LikeWrite(write_outcome(author_id is not None, created), author_id)
+
+
+async def add_likes(
+    db: AsyncSession, user_id: int, tweet_ids: List[int]
+) -> Dict[int, LikeWrite]:
+    """Like several tweets at once in a constant number of statements."""
+    inserted = await db.execute(
+        insert_ignoring_conflicts(db, Like)
+        .from_select(
+            ["user_id", "tweet_id"],
+            select(literal(user_id, Integer), Tweet.id).where(Tweet.id.in_(tweet_ids)),
+        )
+        .returning(Like.tweet_id)
+    )
+    created = set(inserted.scalars())
+    authors = {}
+    if created:
+        bumped = await db.execute(
+            update(Tweet)
+            .where(Tweet.id.in_(created))
+            .values(likes_count=Tweet.likes_count + 1)
+            .returning(Tweet.id, Tweet.author_id)
+        )
+        authors.update(bumped.all())
+        await db.execute(bump_versions(set(authors.values())))
+
+    missing = set(tweet_ids) - created
+    if missing:
+        existing = await db.execute(
+            select(Tweet.id, Tweet.author_id).where(Tweet.id.in_(missing))
+        )
+        authors.update(existing.all())
+
+    return {
+        tweet_id: LikeWrite(
+            write_outcome(tweet_id in authors, tweet_id in created),
+            authors.get(tweet_id),
+        )
+        for tweet_id in tweet_ids
+    }
@@ -0,0 +1,74 @@
+"""Content-addressed storage for uploaded media.
+
+Uploads are written to ``UPLOAD_DIR/<aa>/<bb>/<sha256><ext>``, where ``aa`` and
+``bb`` are the first two byte pairs of the digest. Identical uploads share one
+file, and a stored file never changes once written.
+"""
+
+import hashlib
+import os
+import re
+import tempfile
+
+import anyio
+from fastapi import UploadFile
+
+UPLOAD_DIR = os.getenv("UPLOAD_DIR", "uploads")
+MAX_UPLOAD_SIZE = int(os.getenv("MAX_UPLOAD_SIZE", str(20 * 1024 * 1024)))
+# Room for the multipart boundaries and part headers around the file when the
+# whole request body is limited, see app.api.middleware.BodySizeLimitMiddleware.
+MULTIPART_OVERHEAD = 64 * 1024
+CHUNK_SIZE = 1024 * 1024
+
+EXTENSION_RE = re.compile(r"^\.[a-z0-9]{1,10}$")
+
+
+class UploadTooLarge(Exception):
+    pass
+
+
+def blob_path(digest: str, extension: str) -> str:
+    return os.path.join(UPLOAD_DIR, digest[:2], digest[2:4], digest + extension)
+
+
+def _write_chunk(out, digest, chunk: bytes) -> None:
+    digest.update(chunk)
+    out.write(chunk)
+
+
+def _commit_blob(tmp_path: str, path: str) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    if os.path.exists(path):
+        os.remove(tmp_path)
+    else:
+        os.replace(tmp_path, path)
+
+
+async def store_upload(file: UploadFile) -> str:
+    """Stream an upload to disk off the event loop and return its blob path."""
+    extension = os.path.splitext(file.filename or "")[1].lower()
+    if not EXTENSION_RE.match(extension):
+        extension = ""
+
+    tmp_dir = os.path.join(UPLOAD_DIR, "tmp")
+    os.makedirs(tmp_dir, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=tmp_dir)
+
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while chunk := await file.read(CHUNK_SIZE):
+                size += len(chunk)
+                if size > MAX_UPLOAD_SIZE:
+                    raise UploadTooLarge()
+                await anyio.to_thread.run_sync(_write_chunk, out, digest, chunk)
+
+        path = blob_path(digest.hexdigest(), extension)
+        await anyio.to_thread.run_sync(_commit_blob, tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    return path
@@ -0,0 +1,115 @@
+"""Resized renditions of uploaded images.
+
+Resizing runs in a process pool so that decoding and resampling large images
+never holds the event loop or the GIL of the serving process. Renditions are
+written next to the content-addressed original and named after it. A
+rendition that already exists on disk is not resized again, only its header
+is read for the dimensions.
+"""
+
+import asyncio
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple
+
+from PIL import Image, UnidentifiedImageError
+from sqlalchemy.future import select
+
+from app.database import async_session_maker
+from app.models.media import Media
+from app.models.media_variant import MediaVariant
+from app.services.upsert import insert_ignoring_conflicts
+from app.services.versions import bump_versions
+
+logger = logging.getLogger(__name__)
+
+MEDIA_WORKERS = int(os.getenv("MEDIA_WORKERS", "2"))
+
+# Renditions fit into a square bounding box of this many pixels.
+VARIANT_SIZES = {"thumbnail": 320, "medium": 1080}
+
+_executor: Optional[ProcessPoolExecutor] = None
+
+
+def render_variants(source_path: str) -> List[Tuple[str, str, int, int]]:
+    """Render every variant of an image, returning ``(kind, path, w, h)``.
+
+    Images already smaller than a bounding box use the original file for that
+    variant. Files Pillow cannot read produce no variants.
+    """
+    try:
+        with Image.open(source_path) as image:
+            # Opening only reads the header; pixels are decoded on first use.
+            width, height = image.size
+            stem, extension = os.path.splitext(source_path)
+            variants = []
+            for kind, size in VARIANT_SIZES.items():
+                if width <= size and height <= size:
+                    variants.append((kind, source_path, width, height))
+                    continue
+
+                path = f"{stem}_{kind}{extension}"
+                if os.path.exists(path):
+                    with Image.open(path) as existing:
+                        variants.append((kind, path, *existing.size))
+                    continue
+
+                rendition = image.copy()
+                rendition.thumbnail((size, size))
+                tmp_path = f"{path}.tmp"
+                rendition.save(tmp_path, format=image.format)
+                os.replace(tmp_path, path)
+                variants.append((kind, path, rendition.width, rendition.height))
+    except (OSError, UnidentifiedImageError):
+        return []
+    return variants
+
+
+def get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=MEDIA_WORKERS)
+    return _executor
+
+
+def shutdown_executor() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(cancel_futures=True)
+        _executor = None
+
+
+async def generate_variants(
+    media_id: int, source_path: str, session_maker=async_session_maker
+) -> None:
+    """Render the variants of an uploaded file and record them on the media."""
+    loop = asyncio.get_running_loop()
+    try:
+        rendered = await loop.run_in_executor(
+            get_executor(), render_variants, source_path
+        )
+        if not rendered:
+            return
+
+        async with session_maker() as session:
+            await session.execute(
+                insert_ignoring_conflicts(session, MediaVariant),
+                [
+                    {
+                        "media_id": media_id,
+                        "kind": kind,
+                        "file_path": path,
+                        "width": width,
+                        "height": height,
+                    }
+                    for kind, path, width, height in rendered
+                ],
+            )
+            # Tweets show the variants, so their author's feeds are stale now.
+            await session.execute(
+                bump_versions(select(Media.uploader_id).where(Media.id == media_id))
+            )
+            await session.commit()
+    except Exception:
+        logger.exception("Failed to generate variants for media %s", media_id)
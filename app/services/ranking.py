@@ -0,0 +1,137 @@
+"""Ranked "top" feed.
+
+The newest ``TOP_FEED_CANDIDATES`` tweets of a feed are ranked by engagement
+that decays with age::
+
+    score = log(1 + likes) - AUDIENCE_WEIGHT * log(1 + author followers)
+            - age * ln(2) / HALF_LIFE
+
+Dividing likes by a power of the author's audience keeps large accounts
+from winning on reach alone, and a tweet's score halves every
+``TOP_FEED_HALF_LIFE_SECONDS`` (in log space it drops by ``ln(2)``). The
+candidates are fetched in one query and scored together with numpy.
+
+Ranked feeds are cached per reader for ``TOP_FEED_CACHE_TTL`` seconds under
+the feed's version stamp (see ``app.services.versions``), so any new tweet,
+like or follow in the feed misses the cache.
+"""
+
+import math
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy.sql import ColumnElement
+
+from app.models.tweet import Tweet
+from app.models.user import User
+from app.services.timeline import timeline_tweet_ids
+from app.services.upsert import dialect_name
+
+TOP_FEED_CANDIDATES = int(os.getenv("TOP_FEED_CANDIDATES", "5000"))
+TOP_FEED_HALF_LIFE_SECONDS = float(os.getenv("TOP_FEED_HALF_LIFE_SECONDS", "21600"))
+TOP_FEED_AUDIENCE_WEIGHT = float(os.getenv("TOP_FEED_AUDIENCE_WEIGHT", "0.5"))
+TOP_FEED_CACHE_TTL = float(os.getenv("TOP_FEED_CACHE_TTL", "30"))
+TOP_FEED_CACHE_SIZE = int(os.getenv("TOP_FEED_CACHE_SIZE", "10000"))
+
+Stamp = Tuple[int, int]
+
+
+@dataclass(frozen=True)
+class RankedFeed:
+    stamp: Stamp
+    computed_at: float
+    tweet_ids: Tuple[int, ...]
+
+
+class RankedFeedCache:
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[int, Tuple[float, RankedFeed]]" = OrderedDict()
+
+    def get(self, user_id: int, stamp: Stamp) -> Optional[RankedFeed]:
+        entry = self._entries.get(user_id)
+        if entry is None:
+            return None
+        expires_at, feed = entry
+        if feed.stamp != stamp or expires_at <= time.monotonic():
+            del self._entries[user_id]
+            return None
+        self._entries.move_to_end(user_id)
+        return feed
+
+    def store(self, user_id: int, feed: RankedFeed) -> None:
+        self._entries[user_id] = (time.monotonic() + self.ttl, feed)
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+ranked_feed_cache = RankedFeedCache(TOP_FEED_CACHE_SIZE, TOP_FEED_CACHE_TTL)
+
+
+def score_tweets(
+    likes: np.ndarray,
+    followers: np.ndarray,
+    ages: np.ndarray,
+    half_life: float = TOP_FEED_HALF_LIFE_SECONDS,
+    audience_weight: float = TOP_FEED_AUDIENCE_WEIGHT,
+) -> np.ndarray:
+    return (
+        np.log1p(likes)
+        - audience_weight * np.log1p(followers)
+        - np.maximum(ages, 0) * (math.log(2) / half_life)
+    )
+
+
+def rank_tweets(candidates: Sequence[Tuple[int, int, int, float]]) -> np.ndarray:
+    """Order ``(tweet_id, likes, author_followers, age)`` rows, best first.
+
+    Ties go to the newer tweet.
+    """
+    if not candidates:
+        return np.empty(0, dtype=np.int64)
+    columns = np.array(candidates, dtype=np.float64)
+    tweet_ids = columns[:, 0].astype(np.int64)
+    scores = score_tweets(columns[:, 1], columns[:, 2], columns[:, 3])
+    # lexsort sorts by the last key first, both ascending.
+    return tweet_ids[np.lexsort((-tweet_ids, -scores))]
+
+
+def _age_seconds(db: AsyncSession) -> ColumnElement:
+    if dialect_name(db) == "postgresql":
+        return func.extract("epoch", func.now() - Tweet.created_at)
+    return (func.julianday("now") - func.julianday(Tweet.created_at)) * 86400
+
+
+async def rank_feed(db: AsyncSession, user_id: int, stamp: Stamp) -> RankedFeed:
+    """Rank a reader's feed candidates and cache the result under ``stamp``."""
+    candidate_ids = timeline_tweet_ids(user_id, TOP_FEED_CANDIDATES)
+    query = (
+        select(
+            Tweet.id,
+            Tweet.likes_count,
+            User.followers_count,
+            _age_seconds(db).label("age"),
+        )
+        .join(User, User.id == Tweet.author_id)
+        .where(Tweet.id.in_(candidate_ids))
+    )
+    candidates = (await db.execute(query)).all()
+    feed = RankedFeed(
+        stamp=stamp,
+        computed_at=time.time(),
+        tweet_ids=tuple(rank_tweets(candidates).tolist()),
+    )
+    ranked_feed_cache.store(user_id, feed)
+    return feed
@@ -0,0 +1,108 @@
+"""Ranked full-text search over tweet content.
+
+A query matches tweets containing all of its words. Only the most recent
+``SEARCH_CANDIDATES`` matches are ranked, so common words cost the same as
+rare ones: PostgreSQL either walks the primary key backwards until it has
+collected them or takes them from the GIN index, whichever is cheaper, and
+never ranks millions of rows. Pages are cut with a ``(rank, id)`` keyset,
+passed around as an opaque cursor.
+"""
+
+import base64
+import os
+import re
+from typing import List, Optional, Tuple
+
+import orjson
+from sqlalchemy import Integer, and_, column, func, literal, literal_column, or_, table
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy.sql import Subquery
+
+from app.models.tweet import SEARCH_CONFIG, Tweet
+from app.services.upsert import dialect_name
+
+SEARCH_CANDIDATES = int(os.getenv("SEARCH_CANDIDATES", "1000"))
+
+WORD = re.compile(r"\w+")
+
+Cursor = Tuple[float, int]
+
+tweets_fts = table("tweets_fts", column("rowid", Integer))
+
+
+def search_terms(query: str) -> List[str]:
+    return WORD.findall(query.lower())
+
+
+def encode_cursor(rank: float, tweet_id: int) -> str:
+    return base64.urlsafe_b64encode(orjson.dumps([rank, tweet_id])).decode()
+
+
+def decode_cursor(cursor: str) -> Cursor:
+    """Parse a cursor from ``encode_cursor``, raises ``ValueError`` if invalid."""
+    try:
+        rank, tweet_id = orjson.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError) as error:
+        raise ValueError("Invalid cursor") from error
+    if not isinstance(rank, (int, float)) or not isinstance(tweet_id, int):
+        raise ValueError("Invalid cursor")
+    return float(rank), tweet_id
+
+
+def _postgresql_ranked(terms: List[str]) -> Subquery:
+    search_vector = literal_column("tweets.search_vector")
+    ts_query = func.plainto_tsquery(
+        literal_column(f"'{SEARCH_CONFIG}'::regconfig"), " ".join(terms)
+    )
+    candidates = (
+        select(Tweet.id)
+        .where(search_vector.op("@@")(ts_query))
+        .order_by(Tweet.id.desc())
+        .limit(SEARCH_CANDIDATES)
+        .subquery()
+    )
+    # Ranked outside of the candidate query so that only the candidates are.
+    return (
+        select(Tweet.id, func.ts_rank(search_vector, ts_query).label("rank"))
+        .join(candidates, candidates.c.id == Tweet.id)
+        .subquery()
+    )
+
+
+def _sqlite_ranked(terms: List[str]) -> Subquery:
+    fts = literal_column("tweets_fts")
+    phrase = " ".join('"' + term.replace('"', '""') + '"' for term in terms)
+    return (
+        select(
+            tweets_fts.c.rowid.label("id"),
+            # bm25() is lower for better matches.
+            (-func.bm25(fts)).label("rank"),
+        )
+        .where(fts.op("MATCH")(literal(phrase)))
+        .order_by(tweets_fts.c.rowid.desc())
+        .limit(SEARCH_CANDIDATES)
+        .subquery()
+    )
+
+
+async def search_tweet_ids(
+    db: AsyncSession, terms: List[str], limit: int, after: Optional[Cursor] = None
+) -> List[Tuple[int, float]]:
+    """Return up to ``limit`` ``(tweet_id, rank)`` pairs, best match first."""
+    if dialect_name(db) == "postgresql":
+        ranked = _postgresql_ranked(terms)
+    else:
+        ranked = _sqlite_ranked(terms)
+
+    query = select(ranked.c.id, ranked.c.rank)
+    if after is not None:
+        rank, tweet_id = after
+        query = query.where(
+            or_(
+                ranked.c.rank < rank,
+                and_(ranked.c.rank == rank, ranked.c.id < tweet_id),
+            )
+        )
+    query = query.order_by(ranked.c.rank.desc(), ranked.c.id.desc()).limit(limit)
+    return [(row.id, row.rank) for row in (await db.execute(query)).all()]
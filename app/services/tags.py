@@ -0,0 +1,51 @@
+"""Hashtags and mentions extracted from tweet content at write time.
+
+Tags are stored lowercased, mentions are resolved to users by their exact
+name; mentions of unknown names are dropped.
+"""
+
+import re
+from typing import List
+
+from sqlalchemy import Integer, insert, literal
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.models.tweet_mention import TweetMention
+from app.models.tweet_tag import MAX_TAG_LENGTH, TweetTag
+from app.models.user import User
+
+HASHTAG = re.compile(r"(?<![\w#])#(\w+)")
+MENTION = re.compile(r"(?<![\w@])@(\w+)")
+
+
+def normalize_tag(tag: str) -> str:
+    return tag.lower()
+
+
+def extract_tags(content: str) -> List[str]:
+    tags = (normalize_tag(tag) for tag in HASHTAG.findall(content))
+    return list(dict.fromkeys(tag for tag in tags if len(tag) <= MAX_TAG_LENGTH))
+
+
+def extract_mentions(content: str) -> List[str]:
+    return list(dict.fromkeys(MENTION.findall(content)))
+
+
+async def index_tweet(db: AsyncSession, tweet_id: int, content: str) -> List[str]:
+    """Store the tweet's tags and mentions, returning the tags."""
+    tags = extract_tags(content)
+    if tags:
+        await db.execute(
+            insert(TweetTag), [{"tag": tag, "tweet_id": tweet_id} for tag in tags]
+        )
+
+    names = extract_mentions(content)
+    if names:
+        await db.execute(
+            insert(TweetMention).from_select(
+                ["user_id", "tweet_id"],
+                select(User.id, literal(tweet_id, Integer)).where(User.name.in_(names)),
+            )
+        )
+    return tags
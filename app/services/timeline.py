@@ -0,0 +1,194 @@
+"""Materialized home timelines.
+
+Every user has a list of tweet ids in ``timeline_entries`` that is filled when
+tweets are written (fan-out-on-write), so reading a feed is a range scan over
+one user's entries instead of a join over everyone they follow.
+
+Authors with at least ``FANOUT_FOLLOWER_THRESHOLD`` followers are not fanned
+out: their tweets are merged into the feed at read time instead, which keeps a
+single tweet from turning into millions of inserts. An author who falls back
+below the threshold keeps ``fan_out_on_read`` set and stays on read, since the
+tweets written while they were above it never reached their followers.
+"""
+
+import os
+from typing import Iterable, Optional
+
+from sqlalchemy import (
+    Integer,
+    delete,
+    func,
+    insert,
+    literal,
+    or_,
+    union_all,
+    update,
+)
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy.sql import Select
+
+from app.models.follow import Follow
+from app.models.timeline import TimelineEntry
+from app.models.tweet import Tweet
+from app.models.user import User
+from app.services.upsert import insert_ignoring_conflicts
+
+FANOUT_FOLLOWER_THRESHOLD = int(os.getenv("FANOUT_FOLLOWER_THRESHOLD", "10000"))
+TIMELINE_BACKFILL_LIMIT = int(os.getenv("TIMELINE_BACKFILL_LIMIT", "1000"))
+
+ENTRY_COLUMNS = ["user_id", "tweet_id", "author_id"]
+
+
+def _served_on_read():
+    """Condition on ``User`` that holds for authors merged in at read time."""
+    return or_(User.followers_count >= FANOUT_FOLLOWER_THRESHOLD, User.fan_out_on_read)
+
+
+def keep_on_read():
+    """``fan_out_on_read`` for an update that may lower a followers count."""
+    return or_(User.fan_out_on_read, User.followers_count >= FANOUT_FOLLOWER_THRESHOLD)
+
+
+def _fanned_out(author_id):
+    """Condition that holds when the author's tweets are pushed on write."""
+    return select(User.id).where(User.id == author_id, ~_served_on_read()).exists()
+
+
+async def fan_out_tweet(db: AsyncSession, tweet: Tweet) -> None:
+    """Push a freshly flushed tweet into its author's and followers' timelines."""
+    tweet_id = literal(tweet.id, Integer)
+    author_id = literal(tweet.author_id, Integer)
+
+    followers = select(Follow.follower_id, tweet_id, author_id).where(
+        Follow.following_id == tweet.author_id, _fanned_out(tweet.author_id)
+    )
+    author = select(author_id, tweet_id, author_id)
+
+    await db.execute(
+        insert(TimelineEntry).from_select(ENTRY_COLUMNS, union_all(followers, author))
+    )
+
+
+async def purge_tweet(db: AsyncSession, tweet_id: int) -> None:
+    await db.execute(delete(TimelineEntry).where(TimelineEntry.tweet_id == tweet_id))
+
+
+def backfill_query(follower_id: int, author_id: int) -> Select:
+    """Select the timeline entries a new follow of ``author_id`` adds."""
+    return (
+        select(literal(follower_id, Integer), Tweet.id, Tweet.author_id)
+        .where(Tweet.author_id == author_id, _fanned_out(author_id))
+        .order_by(Tweet.id.desc())
+        .limit(TIMELINE_BACKFILL_LIMIT)
+    )
+
+
+async def backfill_follow(db: AsyncSession, follower_id: int, author_id: int) -> None:
+    """Copy the most recent tweets of a newly followed author into a timeline."""
+    await db.execute(
+        insert(TimelineEntry).from_select(
+            ENTRY_COLUMNS, backfill_query(follower_id, author_id)
+        )
+    )
+
+
+async def backfill_follows(
+    db: AsyncSession, follower_id: int, author_ids: Iterable[int]
+) -> None:
+    """Backfill a timeline after following several authors at once."""
+    ranked = (
+        select(
+            Tweet.id,
+            Tweet.author_id,
+            func.row_number()
+            .over(partition_by=Tweet.author_id, order_by=Tweet.id.desc())
+            .label("rank"),
+        )
+        .where(Tweet.author_id.in_(author_ids), _fanned_out(Tweet.author_id))
+        .subquery()
+    )
+    recent = select(
+        literal(follower_id, Integer), ranked.c.id, ranked.c.author_id
+    ).where(ranked.c.rank <= TIMELINE_BACKFILL_LIMIT)
+    await db.execute(insert(TimelineEntry).from_select(ENTRY_COLUMNS, recent))
+
+
+async def purge_follow(db: AsyncSession, follower_id: int, author_id: int) -> None:
+    await db.execute(
+        delete(TimelineEntry).where(
+            TimelineEntry.user_id == follower_id,
+            TimelineEntry.author_id == author_id,
+        )
+    )
+
+
+async def rebuild_timeline(db: AsyncSession, user_id: int) -> None:
+    """Materialize a timeline from the follow graph and mark it as built.
+
+    Runs once per user, on their first feed read: it covers data written
+    before timelines existed. Entries fanned out or backfilled in the
+    meantime are kept. The user's version is bumped so feeds cached before
+    the rebuild are not revalidated.
+    """
+    following_ids = select(Follow.following_id).where(Follow.follower_id == user_id)
+    tweets = select(literal(user_id, Integer), Tweet.id, Tweet.author_id).where(
+        or_(
+            Tweet.author_id == user_id,
+            Tweet.author_id.in_(following_ids) & _fanned_out(Tweet.author_id),
+        )
+    )
+    await db.execute(
+        insert_ignoring_conflicts(db, TimelineEntry).from_select(ENTRY_COLUMNS, tweets)
+    )
+    await db.execute(
+        update(User)
+        .where(User.id == user_id)
+        .values(timeline_built=True, version=User.version + 1)
+    )
+
+
+def _newest(query: Select, column, limit: Optional[int]):
+    query = query.order_by(column.desc())
+    if limit is not None:
+        query = query.limit(limit)
+    return query.subquery()
+
+
+def timeline_tweet_ids(
+    user_id: int,
+    limit: Optional[int] = None,
+    max_id: Optional[int] = None,
+    since_id: Optional[int] = None,
+) -> Select:
+    """Select the ids of a user's feed, newest first.
+
+    Materialized entries are merged with the tweets of followed authors that
+    are served on read. Each branch seeks on the tweet id and stops after
+    ``limit`` rows, so the merge only ever sorts and deduplicates twice the
+    page size.
+    """
+    entries = select(TimelineEntry.tweet_id).where(TimelineEntry.user_id == user_id)
+    on_read_authors = (
+        select(Follow.following_id)
+        .join(User, User.id == Follow.following_id)
+        .where(Follow.follower_id == user_id, _served_on_read())
+    )
+    on_read = select(Tweet.id).where(Tweet.author_id.in_(on_read_authors))
+
+    if max_id is not None:
+        entries = entries.where(TimelineEntry.tweet_id < max_id)
+        on_read = on_read.where(Tweet.id < max_id)
+    if since_id is not None:
+        entries = entries.where(TimelineEntry.tweet_id > since_id)
+        on_read = on_read.where(Tweet.id > since_id)
+
+    entries = _newest(entries, TimelineEntry.tweet_id, limit)
+    on_read = _newest(on_read, Tweet.id, limit)
+    merged = union_all(
+        select(entries.c.tweet_id), select(on_read.c.id.label("tweet_id"))
+    ).subquery()
+    page = select(merged.c.tweet_id).distinct().order_by(merged.c.tweet_id.desc())
+    if limit is not None:
+        page = page.limit(limit)
+    return select(page.subquery().c.tweet_id)
@@ -0,0 +1,231 @@
+"""Trending hashtags from an in-memory sliding window.
+
+Tag uses are counted in a ring of ``TRENDING_BUCKETS`` count-min sketches,
+each counting one slice of the last ``TRENDING_WINDOW_SECONDS``; the oldest
+slice is cleared when time moves on. A tag's estimate is the sum of
+its estimates in every slice. Count-min estimates never undercount, and
+overcount by at most ``e / width`` of the window's tag uses with probability
+``1 - exp(-depth)``.
+
+The ``TRENDING_CAPACITY`` tags with the highest estimates are tracked as
+candidates in a heap, so reading the trends touches neither the database nor
+the sketches.
+
+Counts are process local, every worker counts the tweets it served. Behind a
+load balancer each worker sees a similar sample of the traffic, which keeps
+the ranking. The state is written to ``TRENDING_CHECKPOINT_PATH`` every
+``TRENDING_CHECKPOINT_SECONDS`` and loaded again on start.
+"""
+
+import asyncio
+import hashlib
+import heapq
+import logging
+import os
+import time
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import anyio
+import orjson
+
+TRENDING_WINDOW_SECONDS = float(os.getenv("TRENDING_WINDOW_SECONDS", "3600"))
+TRENDING_BUCKETS = int(os.getenv("TRENDING_BUCKETS", "12"))
+TRENDING_WIDTH = int(os.getenv("TRENDING_WIDTH", "4096"))
+TRENDING_DEPTH = int(os.getenv("TRENDING_DEPTH", "4"))
+TRENDING_CAPACITY = int(os.getenv("TRENDING_CAPACITY", "200"))
+TRENDING_CHECKPOINT_PATH = os.getenv("TRENDING_CHECKPOINT_PATH", "trending.ckpt")
+TRENDING_CHECKPOINT_SECONDS = float(os.getenv("TRENDING_CHECKPOINT_SECONDS", "60"))
+
+CHECKPOINT_VERSION = 1
+
+logger = logging.getLogger(__name__)
+
+
+class CountMinSketch:
+    def __init__(self, width: int, depth: int):
+        self.width = width
+        self.depth = depth
+        self.counters = array("q", bytes(8 * width * depth))
+
+    def slots(self, key: str) -> List[int]:
+        """One counter per row, from two halves of a single hash."""
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        step = int.from_bytes(digest[8:], "little") | 1
+        return [
+            row * self.width + (first + row * step) % self.width
+            for row in range(self.depth)
+        ]
+
+    def add(self, slots: List[int], amount: int = 1) -> None:
+        for slot in slots:
+            self.counters[slot] += amount
+
+    def estimate(self, slots: List[int]) -> int:
+        return min(self.counters[slot] for slot in slots)
+
+    def clear(self) -> None:
+        self.counters = array("q", bytes(8 * self.width * self.depth))
+
+
+class TrendingTags:
+    def __init__(
+        self,
+        window: float = TRENDING_WINDOW_SECONDS,
+        buckets: int = TRENDING_BUCKETS,
+        width: int = TRENDING_WIDTH,
+        depth: int = TRENDING_DEPTH,
+        capacity: int = TRENDING_CAPACITY,
+        now: Optional[float] = None,
+    ):
+        self.bucket_seconds = window / buckets
+        self.sketches = [CountMinSketch(width, depth) for _ in range(buckets)]
+        self.capacity = capacity
+        # Index of the newest sketch and the number of the slice it counts.
+        self.current = 0
+        self.bucket = self._bucket_number(time.time() if now is None else now)
+        self.candidates: Dict[str, int] = {}
+        self._heap: List[Tuple[int, str]] = []
+
+    def _bucket_number(self, now: float) -> int:
+        return int(now // self.bucket_seconds)
+
+    def _advance(self, now: float) -> None:
+        steps = self._bucket_number(now) - self.bucket
+        if steps <= 0:
+            return
+        for _ in range(min(steps, len(self.sketches))):
+            self.current = (self.current + 1) % len(self.sketches)
+            self.sketches[self.current].clear()
+        self.bucket += steps
+        self._refresh_candidates()
+
+    def _estimate(self, slots: List[int]) -> int:
+        return sum(sketch.estimate(slots) for sketch in self.sketches)
+
+    def _refresh_candidates(self) -> None:
+        """Re-estimate the candidates after the oldest slice expired."""
+        sketch = self.sketches[0]
+        estimates = {tag: self._estimate(sketch.slots(tag)) for tag in self.candidates}
+        self.candidates = {tag: count for tag, count in estimates.items() if count}
+        self._rebuild_heap()
+
+    def _rebuild_heap(self) -> None:
+        self._heap = [(count, tag) for tag, count in self.candidates.items()]
+        heapq.heapify(self._heap)
+
+    def _lowest(self) -> Tuple[int, str]:
+        # Entries are never updated in place, outdated ones are skipped here.
+        while True:
+            count, tag = self._heap[0]
+            if self.candidates.get(tag) == count:
+                return count, tag
+            heapq.heappop(self._heap)
+
+    def _offer(self, tag: str, count: int) -> None:
+        if tag not in self.candidates and len(self.candidates) >= self.capacity:
+            lowest, lowest_tag = self._lowest()
+            if count <= lowest:
+                return
+            heapq.heappop(self._heap)
+            del self.candidates[lowest_tag]
+        self.candidates[tag] = count
+        heapq.heappush(self._heap, (count, tag))
+        if len(self._heap) > 4 * self.capacity:
+            self._rebuild_heap()
+
+    def record(self, tags: Iterable[str], now: Optional[float] = None) -> None:
+        self._advance(time.time() if now is None else now)
+        sketch = self.sketches[self.current]
+        for tag in tags:
+            slots = sketch.slots(tag)
+            sketch.add(slots)
+            self._offer(tag, self._estimate(slots))
+
+    def top(self, limit: int, now: Optional[float] = None) -> List[Tuple[str, int]]:
+        """The ``limit`` most used tags of the window with estimated counts."""
+        self._advance(time.time() if now is None else now)
+        ranked = sorted(self.candidates.items(), key=lambda item: (-item[1], item[0]))
+        return ranked[:limit]
+
+    def snapshot(self) -> bytes:
+        header = {
+            "version": CHECKPOINT_VERSION,
+            "bucket_seconds": self.bucket_seconds,
+            "buckets": len(self.sketches),
+            "width": self.sketches[0].width,
+            "depth": self.sketches[0].depth,
+            "current": self.current,
+            "bucket": self.bucket,
+            "candidates": list(self.candidates),
+        }
+        counters = b"".join(sketch.counters.tobytes() for sketch in self.sketches)
+        return orjson.dumps(header) + b"\n" + counters
+
+    def restore(self, data: bytes, now: Optional[float] = None) -> bool:
+        """Load a ``snapshot``, returns False if it was taken with other settings."""
+        header_line, _, counters = data.partition(b"\n")
+        header = orjson.loads(header_line)
+        sketch = self.sketches[0]
+        expected = {
+            "version": CHECKPOINT_VERSION,
+            "bucket_seconds": self.bucket_seconds,
+            "buckets": len(self.sketches),
+            "width": sketch.width,
+            "depth": sketch.depth,
+        }
+        size = 8 * sketch.width * sketch.depth
+        matches = all(header.get(key) == value for key, value in expected.items())
+        if not matches or len(counters) != size * len(self.sketches):
+            return False
+
+        for index, restored in enumerate(self.sketches):
+            restored.counters = array("q")
+            restored.counters.frombytes(counters[index * size : (index + 1) * size])
+        self.current = header["current"]
+        self.bucket = header["bucket"]
+        self.candidates = {tag: 0 for tag in header["candidates"]}
+        self._refresh_candidates()
+        self._advance(time.time() if now is None else now)
+        return True
+
+
+trending_tags = TrendingTags()
+
+
+def _write_atomically(path: str, data: bytes) -> None:
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as checkpoint:
+        checkpoint.write(data)
+    os.replace(tmp_path, path)
+
+
+def load_checkpoint(path: str = TRENDING_CHECKPOINT_PATH) -> None:
+    try:
+        with open(path, "rb") as checkpoint:
+            data = checkpoint.read()
+    except FileNotFoundError:
+        return
+    try:
+        if not trending_tags.restore(data):
+            logger.warning("Ignoring trending checkpoint %s of other settings", path)
+    except (KeyError, ValueError):
+        logger.warning("Ignoring unreadable trending checkpoint %s", path)
+
+
+async def save_checkpoint(path: str = TRENDING_CHECKPOINT_PATH) -> None:
+    # The snapshot is taken on the event loop, only the write is offloaded.
+    await anyio.to_thread.run_sync(_write_atomically, path, trending_tags.snapshot())
+
+
+async def checkpoint_periodically(
+    path: str = TRENDING_CHECKPOINT_PATH,
+    interval: float = TRENDING_CHECKPOINT_SECONDS,
+) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await save_checkpoint(path)
+        except OSError:
+            logger.exception("Failed to write trending checkpoint %s", path)
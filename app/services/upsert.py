@@ -0,0 +1,36 @@
+"""Helpers for idempotent ``INSERT ... ON CONFLICT DO NOTHING`` writes.
+
+On PostgreSQL a write and its side effects run as one statement built from
+data-modifying CTEs. SQLite has no data-modifying CTEs, so the same steps run
+as separate statements; that path exists for tests and local runs.
+"""
+
+import enum
+
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+class WriteOutcome(enum.Enum):
+    CREATED = "created"
+    ALREADY_EXISTS = "already_exists"
+    TARGET_NOT_FOUND = "target_not_found"
+
+
+def write_outcome(found: bool, created: bool) -> WriteOutcome:
+    if not found:
+        return WriteOutcome.TARGET_NOT_FOUND
+    if not created:
+        return WriteOutcome.ALREADY_EXISTS
+    return WriteOutcome.CREATED
+
+
+def dialect_name(db: AsyncSession) -> str:
+    return db.get_bind().dialect.name
+
+
+def insert_ignoring_conflicts(db: AsyncSession, model):
+    """Return an ``INSERT`` for ``model`` that silently skips duplicates."""
+    if dialect_name(db) == "postgresql":
+        return postgresql.insert(model).on_conflict_do_nothing()
+    return sqlite.insert(model).on_conflict_do_nothing()
@@ -0,0 +1,66 @@
+"""Per-user version stamps for conditional GETs.
+
+``users.version`` grows whenever something shown in a user's feed or profile
+changes on their side: they post or delete a tweet, one of their tweets gets
+liked or unliked, its media finishes resizing, or they follow or get followed.
+
+A profile is identified by its user's version. A feed is identified by the
+reader's own version, which changes whenever the set of followed accounts
+does, plus the sum of the followed accounts' versions. Versions only grow, so
+the sum changes as soon as any of them does.
+"""
+
+import hashlib
+from typing import Iterable, Union
+
+from sqlalchemy import Update, func, update
+from sqlalchemy.future import select
+from sqlalchemy.orm import aliased
+from sqlalchemy.sql import Select
+
+from app.models.follow import Follow
+from app.models.tweet import Tweet
+from app.models.user import User
+
+UserIds = Union[Iterable[int], Select]
+
+
+def bump_versions(user_ids: UserIds) -> Update:
+    return (
+        update(User)
+        .where(User.id.in_(user_ids))
+        .values(version=User.version + 1)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def bump_authors(tweet_ids: UserIds) -> Update:
+    """Bump the authors of the given tweets."""
+    return bump_versions(select(Tweet.author_id).where(Tweet.id.in_(tweet_ids)))
+
+
+def feed_version_query(user_id: int) -> Select:
+    """Select ``(version, followed_versions, timeline_built)`` of a reader."""
+    followed = aliased(User)
+    followed_versions = (
+        select(func.coalesce(func.sum(followed.version), 0))
+        .join(Follow, Follow.following_id == followed.id)
+        .where(Follow.follower_id == user_id)
+        .scalar_subquery()
+    )
+    return select(
+        User.version,
+        followed_versions.label("followed_versions"),
+        User.timeline_built,
+    ).where(User.id == user_id)
+
+
+def feed_etag(user_id: int, version: int, followed_versions: int, *params) -> str:
+    key = ":".join(str(part) for part in (user_id, version, followed_versions, *params))
+    return '"feed-' + hashlib.sha1(key.encode()).hexdigest()[:20] + '"'
+
+
+def profile_etag(user_id: int, version: int, *params) -> str:
+    return (
+        '"' + "-".join(str(part) for part in ("user", user_id, version, *params)) + '"'
+    )
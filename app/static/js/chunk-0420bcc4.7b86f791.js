@@ -0,0 +1,2 @@
+(window["webpackJsonp"]=window["webpackJsonp"]||[]).push([["chunk-0420bcc4"],{a5c9:function(e,t,n){},a9bc:function(e,t,n){"use strict";n("a5c9")},bb51:function(e,t,n){"use strict";n.r(t);var a=n("7a23"),c={class:"home"},o=Object(a["h"])("hr",{class:"gap"},null,-1),i={key:0,class:"tweet-wrapper"},l={class:"home__more"};function s(e,t,n,s,r,u){var p=Object(a["C"])("add-tweet"),b=Object(a["C"])("tweet");return Object(a["u"])(),Object(a["g"])("div",c,[Object(a["k"])(p,{onSubmitClick:u.handleTweetSubmit},null,8,["onSubmitClick"]),o,e.tweetData?(Object(a["u"])(),Object(a["g"])("div",i,[(Object(a["u"])(!0),Object(a["g"])(a["a"],null,Object(a["A"])(e.tweetData,(function(e){return Object(a["u"])(),Object(a["e"])(b,{key:e.id,"tweet-data":e,onDeleteTweet:u.handleTweetDelete,onGetTweets:u.getTweets},null,8,["tweet-data","onDeleteTweet","onGetTweets"])})),128))])):Object(a["f"])("",!0),Object(a["h"])("div",l,[null!==e.nextCursor?(Object(a["u"])(),Object(a["g"])("button",{key:0,type:"button",onClick:t[0]||(t[0]=function(){return u.loadMore&&u.loadMore.apply(u,arguments)})}," Show more ")):Object(a["f"])("",!0)])])}var r=n("1da1"),u=n("5530"),p=(n("96cf"),n("99af"),n("345e")),b=n("9257"),g=n("7424"),d=n("5502"),U={components:{AddTweet:p["a"],Tweet:b["a"]},data:function(){return{tweetData:[],nextCursor:null}},computed:Object(u["a"])(Object(u["a"])(Object(u["a"])({},Object(d["b"])(["getMe"])),Object(d["c"])(["isPaginationEnabled","paginationLimit"])),{},{pageSize:function(){return this.isPaginationEnabled?this.paginationLimit:void 0}}),watch:{isPaginationEnabled:function(){this.getTweets()}},mounted:function(){var e=Object(r["a"])(regeneratorRuntime.mark((function e(){return regeneratorRuntime.wrap((function(e){while(1)switch(e.prev=e.next){case 0:this.getTweets();case 1:case"end":return e.stop()}}),e,this)})));function t(){return e.apply(this,arguments)}return t}(),methods:{handleTweetSubmit:function(){var e=this;return Object(r["a"])(regeneratorRuntime.mark((function t(){return regeneratorRuntime.wrap((function(t){while(1)switch(t.prev=t.next){case 0:return t.prev=0,t.next=3,e.getTweets();case 3:t.next=8;break;case 5:t.prev=5,t.t0=t["catch"](0),e.$notification({type:"error",message:"Error in send tweet"});case 8:case"end":return t.stop()}}),t,null,[[0,5]])})))()},getTweets:function(){var e=Object(r["a"])(regeneratorRuntime.mark((function e(){var t,n,a,c,o;return regeneratorRuntime.wrap((function(e){while(1)switch(e.prev=e.next){case 0:return e.next=2,Object(g["d"])(null,this.pageSize);case 2:t=e.sent,this.tweetData=null===t||void 0===t||null===(n=t.data)||void 0===n?void 0:n.tweets,this.nextCursor=null!==(a=null===t||void 0===t||null===(c=t.data)||void 0===c?void 0:c.next_cursor)&&void 0!==a?a:null;case 5:case"end":return e.stop()}}),e,this)})));function t(){return e.apply(this,arguments)}return t}(),loadMore:function(){var e=Object(r["a"])(regeneratorRuntime.mark((function e(){var t,n,a,c,o,i;return regeneratorRuntime.wrap((function(e){while(1)switch(e.prev=e.next){case 0:return e.next=2,Object(g["d"])(this.nextCursor,this.pageSize);case 2:t=e.sent,this.tweetData=this.tweetData.concat(null!==(n=null===t||void 0===t||null===(a=t.data)||void 0===a?void 0:a.tweets)&&void 0!==n?n:[]),this.nextCursor=null!==(c=null===t||void 0===t||null===(o=t.data)||void 0===o?void 0:o.next_cursor)&&void 0!==c?c:null;case 5:case"end":return e.stop()}}),e,this)})));function t(){return e.apply(this,arguments)}return t}(),handleTweetDelete:function(){var e=this;return Object(r["a"])(regeneratorRuntime.mark((function t(){return regeneratorRuntime.wrap((function(t){while(1)switch(t.prev=t.next){case 0:e.handleTweetSubmit();case 1:case"end":return t.stop()}}),t)})))()}}};n("a9bc");U.render=s;t["default"]=U}}]);
+//# sourceMappingURL=chunk-0420bcc4.7b86f791.js.map
\ No newline at end of file
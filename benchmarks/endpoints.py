@@ -0,0 +1,317 @@
+"""Endpoint benchmarks with latency percentiles and queries per request.
+
+Drives the ASGI app in-process through ``ASGITransport`` (the database comes
+from ``DATABASE_URL``) or a running server with ``--base-url``. The scenarios
+expect a data set from ``app.generate_data``; ``--generate`` creates the
+tables and loads a small one first, which is meant for a fresh SQLite file.
+
+Usage::
+
+    DATABASE_URL=sqlite+aiosqlite:///bench.db \\
+        python -m benchmarks.endpoints --generate --output report.json
+    python -m benchmarks.endpoints --base-url http://localhost:8000 --requests 500
+
+The JSON report has sorted keys so reports of two commits can be diffed.
+Queries per request come from ``/internal/metrics``; a running server needs
+the same ``INTERNAL_TOKEN`` in the environment of both processes.
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import math
+import os
+import random
+import re
+import secrets
+import subprocess
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+import anyio
+from httpx import ASGITransport, AsyncClient, Response
+
+Send = Callable[[int], Awaitable[Response]]
+
+METRIC_LINE = re.compile(
+    r'^http_request_db_statements_(sum|count)\{route="([^"]*)"\} (\S+)$'
+)
+FOLLOW_BATCH_SIZE = 100
+
+
+@dataclass
+class Options:
+    requests: int
+    reader_id: int
+    following: int
+    seed: int
+
+
+async def user_names(client: AsyncClient, user_ids: List[int]) -> List[str]:
+    names = []
+    for start in range(0, len(user_ids), 100):
+        response = await client.get(
+            "/api/users",
+            params={"ids": ",".join(map(str, user_ids[start : start + 100]))},
+        )
+        response.raise_for_status()
+        names += [user["name"] for user in response.json()["users"]]
+    return names
+
+
+async def feed_following_1k(client: AsyncClient, options: Options) -> Send:
+    """Home feed of a user following ``--following`` accounts."""
+    (reader,) = await user_names(client, [options.reader_id])
+    headers = {"api-key": reader}
+    followees = [
+        user_id
+        for user_id in range(1, options.following + 2)
+        if user_id != options.reader_id
+    ][: options.following]
+    for start in range(0, len(followees), FOLLOW_BATCH_SIZE):
+        await client.post(
+            "/api/follows/batch",
+            json={"user_ids": followees[start : start + FOLLOW_BATCH_SIZE]},
+            headers=headers,
+        )
+
+    async def send(index: int) -> Response:
+        return await client.get("/api/tweets", headers=headers)
+
+    return send
+
+
+async def celebrity_profile(client: AsyncClient, options: Options) -> Send:
+    """Public profile of the account with the most followers."""
+    response = await client.get("/api/users/me", headers={"api-key": "celebrity1"})
+    response.raise_for_status()
+    celebrity_id = response.json()["user"]["id"]
+
+    async def send(index: int) -> Response:
+        return await client.get(f"/api/users/{celebrity_id}")
+
+    return send
+
+
+async def like_storm(client: AsyncClient, options: Options) -> Send:
+    """Distinct users liking one fresh tweet at the same time."""
+    (author,) = await user_names(client, [options.reader_id])
+    response = await client.post(
+        "/api/tweets",
+        json={"tweet_data": "Like storm", "tweet_media_ids": []},
+        headers={"api-key": author},
+    )
+    response.raise_for_status()
+    tweet_id = response.json()["tweet_id"]
+    likers = await user_names(client, list(range(1, options.requests + 1)))
+
+    async def send(index: int) -> Response:
+        return await client.post(
+            f"/api/tweets/{tweet_id}/likes",
+            headers={"api-key": likers[index % len(likers)]},
+        )
+
+    return send
+
+
+async def concurrent_uploads(client: AsyncClient, options: Options) -> Send:
+    """Distinct small JPEG uploads, each one stored and resized."""
+    from PIL import Image
+
+    (uploader,) = await user_names(client, [options.reader_id])
+    rng = random.Random(options.seed)
+    images = []
+    for _ in range(options.requests):
+        buffer = io.BytesIO()
+        color = tuple(rng.randrange(256) for _ in range(3))
+        Image.new("RGB", (640, 480), color).save(buffer, "JPEG")
+        images.append(buffer.getvalue())
+
+    async def send(index: int) -> Response:
+        return await client.post(
+            "/api/medias",
+            files={"file": (f"bench{index}.jpg", images[index], "image/jpeg")},
+            headers={"api-key": uploader},
+        )
+
+    return send
+
+
+SCENARIOS: Dict[str, Callable[[AsyncClient, Options], Awaitable[Send]]] = {
+    "feed_following_1k": feed_following_1k,
+    "celebrity_profile": celebrity_profile,
+    "like_storm": like_storm,
+    "concurrent_uploads": concurrent_uploads,
+}
+
+
+async def statement_totals(client: AsyncClient) -> Tuple[float, float]:
+    """Statements executed and requests served so far, over all routes."""
+    response = await client.get("/internal/metrics")
+    response.raise_for_status()
+    totals = {"sum": 0.0, "count": 0.0}
+    for line in response.text.splitlines():
+        match = METRIC_LINE.match(line)
+        if match and match.group(2) != "/internal/metrics":
+            totals[match.group(1)] += float(match.group(3))
+    return totals["sum"], totals["count"]
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile."""
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(fraction * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+async def run_scenario(
+    client: AsyncClient, send: Send, requests: int, concurrency: int
+) -> dict:
+    latencies: List[float] = []
+    errors = 0
+    next_index = 0
+
+    async def worker() -> None:
+        nonlocal next_index, errors
+        while next_index < requests:
+            index = next_index
+            next_index += 1
+            started = time.perf_counter()
+            response = await send(index)
+            latencies.append((time.perf_counter() - started) * 1000)
+            if response.status_code >= 400:
+                errors += 1
+
+    statements_before, served_before = await statement_totals(client)
+    started = time.perf_counter()
+    async with anyio.create_task_group() as task_group:
+        for _ in range(concurrency):
+            task_group.start_soon(worker)
+    elapsed = time.perf_counter() - started
+    statements_after, served_after = await statement_totals(client)
+
+    latencies.sort()
+    served = served_after - served_before
+    return {
+        "requests": requests,
+        "errors": errors,
+        "throughput_rps": round(requests / elapsed, 1),
+        "latency_ms": {
+            "p50": round(percentile(latencies, 0.50), 2),
+            "p95": round(percentile(latencies, 0.95), 2),
+            "p99": round(percentile(latencies, 0.99), 2),
+            "mean": round(sum(latencies) / len(latencies), 2),
+            "max": round(latencies[-1], 2),
+        },
+        "queries_per_request": (
+            round((statements_after - statements_before) / served, 2)
+            if served
+            else None
+        ),
+    }
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def generate_data_set() -> None:
+    from app.database import engine
+    from app.generate_data import DataSetConfig, generate
+    from app.models.base import Base
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with engine.connect() as conn:
+        await generate(
+            conn,
+            DataSetConfig(users=5000, tweets=50000, follows=100000, likes=200000),
+        )
+
+
+async def run(args: argparse.Namespace) -> dict:
+    if args.base_url:
+        token = os.getenv("INTERNAL_TOKEN", "")
+        client = AsyncClient(
+            base_url=args.base_url,
+            headers={"internal-token": token},
+            timeout=60,
+        )
+    else:
+        from app.api.endpoints import internal
+        from app.main import app
+
+        if args.generate:
+            await generate_data_set()
+        if internal.INTERNAL_TOKEN is None:
+            internal.INTERNAL_TOKEN = secrets.token_urlsafe()
+        client = AsyncClient(
+            transport=ASGITransport(app=app),
+            base_url="http://bench",
+            headers={"internal-token": internal.INTERNAL_TOKEN},
+            timeout=60,
+        )
+
+    options = Options(
+        requests=args.requests,
+        reader_id=args.reader_id,
+        following=args.following,
+        seed=args.seed,
+    )
+    report = {
+        "meta": {
+            "revision": git_revision(),
+            "target": args.base_url or "in-process",
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "seed": args.seed,
+        },
+        "scenarios": {},
+    }
+    async with client:
+        for name in args.scenarios:
+            send = await SCENARIOS[name](client, options)
+            report["scenarios"][name] = await run_scenario(
+                client, send, args.requests, args.concurrency
+            )
+            print(f"{name}: {report['scenarios'][name]}")
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url", help="Benchmark a running server instead")
+    parser.add_argument("--generate", action="store_true")
+    parser.add_argument(
+        "--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS)
+    )
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--reader-id", type=int, default=11)
+    parser.add_argument("--following", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    encoded = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, "w") as output:
+            output.write(encoded + "\n")
+    else:
+        print(encoded)
+
+
+if __name__ == "__main__":
+    main()
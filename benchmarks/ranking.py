@@ -0,0 +1,95 @@
+"""Compare top feed scoring times of the numpy and a plain Python ranking.
+
+Usage::
+
+    python -m benchmarks.ranking --candidates 5000 --repeat 50
+"""
+
+import argparse
+import math
+import random
+import statistics
+import time
+from typing import Callable, Dict, List, Sequence, Tuple
+
+from app.services.ranking import (
+    TOP_FEED_AUDIENCE_WEIGHT,
+    TOP_FEED_HALF_LIFE_SECONDS,
+    rank_tweets,
+)
+
+Candidate = Tuple[int, int, int, float]
+
+
+def build_candidates(count: int, seed: int = 42) -> List[Candidate]:
+    """Rows as the candidate query returns them, with skewed likes and audiences."""
+    rng = random.Random(seed)
+    return [
+        (
+            tweet_id,
+            int(rng.paretovariate(1.1)) - 1,
+            int(rng.paretovariate(0.8)) - 1,
+            rng.uniform(0, 7 * 86400),
+        )
+        for tweet_id in range(count, 0, -1)
+    ]
+
+
+def rank_python(candidates: Sequence[Candidate]) -> List[int]:
+    """The same score computed tweet by tweet."""
+    decay = math.log(2) / TOP_FEED_HALF_LIFE_SECONDS
+    scored = [
+        (
+            math.log1p(likes)
+            - TOP_FEED_AUDIENCE_WEIGHT * math.log1p(followers)
+            - max(age, 0) * decay,
+            tweet_id,
+        )
+        for tweet_id, likes, followers, age in candidates
+    ]
+    scored.sort(reverse=True)
+    return [tweet_id for _, tweet_id in scored]
+
+
+def rank_numpy(candidates: Sequence[Candidate]) -> List[int]:
+    return rank_tweets(candidates).tolist()
+
+
+RANKERS: Dict[str, Callable[[Sequence[Candidate]], List[int]]] = {
+    "python loop": rank_python,
+    "numpy": rank_numpy,
+}
+
+
+def measure(
+    rank: Callable[[Sequence[Candidate]], List[int]], candidates, repeat: int
+) -> List[float]:
+    rank(candidates)
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        rank(candidates)
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--candidates", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    candidates = build_candidates(args.candidates)
+    assert rank_python(candidates) == rank_numpy(candidates)
+    baseline = None
+    print(f"{'ranker':<16}{'median ms':>12}{'p99 ms':>10}{'speedup':>10}")
+    for name, rank in RANKERS.items():
+        timings = sorted(measure(rank, candidates, args.repeat))
+        median = statistics.median(timings)
+        baseline = baseline or median
+        p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+        print(f"{name:<16}{median:>12.2f}{p99:>10.2f}{baseline / median:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Compare feed encode times of the generic and the TypeAdapter response paths.
+
+Usage::
+
+    python -m benchmarks.serialization --tweets 1000 --repeat 20
+"""
+
+import argparse
+import statistics
+import time
+from typing import Callable, Dict, List
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.api.responses import ModelResponse, ORJSONResponse
+from app.schemas.tweet import (
+    TweetAuthor,
+    TweetDetail,
+    TweetLike,
+    TweetListResponse,
+    TweetMedia,
+)
+
+
+def build_feed(tweet_count: int, likes_per_tweet: int = 10) -> TweetListResponse:
+    tweets = []
+    for tweet_id in range(tweet_count, 0, -1):
+        path = f"uploads/ab/cd/{tweet_id:064x}.jpg"
+        tweets.append(
+            TweetDetail(
+                id=tweet_id,
+                content=f"Tweet number {tweet_id} with some text in it",
+                attachments=[path],
+                media=[
+                    TweetMedia(
+                        id=tweet_id,
+                        url=path,
+                        thumbnail_url=path.replace(".jpg", "_thumbnail.jpg"),
+                        medium_url=path.replace(".jpg", "_medium.jpg"),
+                    )
+                ],
+                author=TweetAuthor(id=tweet_id % 97, name=f"author_{tweet_id % 97}"),
+                likes=[
+                    TweetLike(user_id=user_id, name=f"user_{user_id}")
+                    for user_id in range(likes_per_tweet)
+                ],
+                likes_count=likes_per_tweet,
+            )
+        )
+    return TweetListResponse(result=True, tweets=tweets, next_cursor=1)
+
+
+def encode_generic(feed: TweetListResponse) -> bytes:
+    """What FastAPI does for a returned model with the default JSONResponse."""
+    return JSONResponse(jsonable_encoder(feed)).body
+
+
+def encode_orjson(feed: TweetListResponse) -> bytes:
+    """The same pipeline with ORJSONResponse as the default response class."""
+    return ORJSONResponse(jsonable_encoder(feed)).body
+
+
+def encode_type_adapter(feed: TweetListResponse) -> bytes:
+    return ModelResponse(feed).body
+
+
+ENCODERS: Dict[str, Callable[[TweetListResponse], bytes]] = {
+    "jsonable_encoder + json": encode_generic,
+    "jsonable_encoder + orjson": encode_orjson,
+    "TypeAdapter.dump_json": encode_type_adapter,
+}
+
+
+def measure(
+    encode: Callable[[TweetListResponse], bytes], feed, repeat: int
+) -> List[float]:
+    encode(feed)
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        encode(feed)
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tweets", type=int, default=1000)
+    parser.add_argument("--likes", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    feed = build_feed(args.tweets, args.likes)
+    baseline = None
+    print(f"{'encoder':<28}{'median ms':>12}{'min ms':>10}{'speedup':>10}")
+    for name, encode in ENCODERS.items():
+        timings = measure(encode, feed, args.repeat)
+        median = statistics.median(timings)
+        baseline = baseline or median
+        print(
+            f"{name:<28}{median:>12.2f}{min(timings):>10.2f}"
+            f"{baseline / median:>9.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -9,7 +9,11 @@ from app.models.base import Base
 from app.models.follow import Follow
 from app.models.like import Like
 from app.models.media import Media
+from app.models.media_variant import MediaVariant
+from app.models.timeline import TimelineEntry
 from app.models.tweet import Tweet
+from app.models.tweet_mention import TweetMention
+from app.models.tweet_tag import TweetTag
 from app.models.user import User
 
 config = context.config
@@ -41,4 +45,14 @@ else:
     asyncio.run(run_migrations_online())
 
 
-__all__ = ["Follow", "Like", "Media", "Tweet", "User"]
+__all__ = [
+    "Follow",
+    "Like",
+    "Media",
+    "MediaVariant",
+    "TimelineEntry",
+    "Tweet",
+    "TweetMention",
+    "TweetTag",
+    "User",
+]
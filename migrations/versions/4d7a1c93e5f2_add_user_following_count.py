@@ -0,0 +1,46 @@
+"""Add following count to users
+
+Revision ID: 4d7a1c93e5f2
+Revises: 9b2e6f0d4a17
+Create Date: 2026-10-18 20:14:51.603118
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "4d7a1c93e5f2"
+down_revision: Union[str, None] = "9b2e6f0d4a17"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL_BATCH_SIZE = 10000
+
+
+def upgrade() -> None:
+    op.add_column(
+        "users",
+        sa.Column("following_count", sa.Integer(), server_default="0", nullable=False),
+    )
+
+    # Every batch commits on its own, so row locks and WAL are released as
+    # the backfill goes instead of piling up until the end of the migration.
+    with op.get_context().autocommit_block():
+        bind = op.get_bind()
+        max_id = bind.execute(sa.text("SELECT max(id) FROM users")).scalar() or 0
+        for start in range(0, max_id + 1, BACKFILL_BATCH_SIZE):
+            bind.execute(
+                sa.text(
+                    "UPDATE users SET following_count = "
+                    "(SELECT count(*) FROM follows "
+                    "WHERE follows.follower_id = users.id) "
+                    "WHERE id >= :start AND id < :end"
+                ),
+                {"start": start, "end": start + BACKFILL_BATCH_SIZE},
+            )
+
+
+def downgrade() -> None:
+    op.drop_column("users", "following_count")
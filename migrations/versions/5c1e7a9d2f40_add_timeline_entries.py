@@ -0,0 +1,71 @@
+"""Add timeline entries and followers count
+
+Revision ID: 5c1e7a9d2f40
+Revises: 03b27927d4b8
+Create Date: 2026-10-18 10:12:41.503118
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "5c1e7a9d2f40"
+down_revision: Union[str, None] = "03b27927d4b8"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL_BATCH_SIZE = 10000
+
+
+def upgrade() -> None:
+    op.add_column(
+        "users",
+        sa.Column("followers_count", sa.Integer(), server_default="0", nullable=False),
+    )
+
+    # Every batch commits on its own, so row locks and WAL are released as
+    # the backfill goes instead of piling up until the end of the migration.
+    with op.get_context().autocommit_block():
+        bind = op.get_bind()
+        max_id = bind.execute(sa.text("SELECT max(id) FROM users")).scalar() or 0
+        for start in range(0, max_id + 1, BACKFILL_BATCH_SIZE):
+            bind.execute(
+                sa.text(
+                    "UPDATE users SET followers_count = "
+                    "(SELECT count(*) FROM follows "
+                    "WHERE follows.following_id = users.id) "
+                    "WHERE id >= :start AND id < :end"
+                ),
+                {"start": start, "end": start + BACKFILL_BATCH_SIZE},
+            )
+
+    op.create_table(
+        "timeline_entries",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("tweet_id", sa.Integer(), nullable=False),
+        sa.Column("author_id", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["tweet_id"], ["tweets.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["author_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("user_id", "tweet_id"),
+    )
+    op.create_index(
+        "ix_timeline_entries_user_author",
+        "timeline_entries",
+        ["user_id", "author_id"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_timeline_entries_tweet_id", "timeline_entries", ["tweet_id"], unique=False
+    )
+    # Timelines of existing users are materialized on their first feed read,
+    # see 6a0f2e8b1c35 and app.services.timeline.rebuild_timeline.
+
+
+def downgrade() -> None:
+    op.drop_index("ix_timeline_entries_tweet_id", table_name="timeline_entries")
+    op.drop_index("ix_timeline_entries_user_author", table_name="timeline_entries")
+    op.drop_table("timeline_entries")
+    op.drop_column("users", "followers_count")
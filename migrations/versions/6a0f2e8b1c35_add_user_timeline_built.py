@@ -0,0 +1,33 @@
+"""Add timeline built marker to users
+
+Revision ID: 6a0f2e8b1c35
+Revises: 4d7a1c93e5f2
+Create Date: 2026-10-19 09:31:06.284517
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "6a0f2e8b1c35"
+down_revision: Union[str, None] = "4d7a1c93e5f2"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Every existing timeline is rebuilt once on its next read. That includes
+    # timelines that only hold entries fanned out since 5c1e7a9d2f40 and are
+    # missing the history before it.
+    op.add_column(
+        "users",
+        sa.Column(
+            "timeline_built", sa.Boolean(), server_default=sa.false(), nullable=False
+        ),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("users", "timeline_built")
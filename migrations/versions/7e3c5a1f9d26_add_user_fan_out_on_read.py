@@ -0,0 +1,32 @@
+"""Add fan out on read marker to users
+
+Revision ID: 7e3c5a1f9d26
+Revises: 6a0f2e8b1c35
+Create Date: 2026-10-20 11:02:47.915304
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "7e3c5a1f9d26"
+down_revision: Union[str, None] = "6a0f2e8b1c35"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Authors currently above FANOUT_FOLLOWER_THRESHOLD are served on read by
+    # their count; the marker only has to be set once a count drops below it.
+    op.add_column(
+        "users",
+        sa.Column(
+            "fan_out_on_read", sa.Boolean(), server_default=sa.false(), nullable=False
+        ),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("users", "fan_out_on_read")
@@ -0,0 +1,45 @@
+"""Add likes count to tweets
+
+Revision ID: 8e4b2d61c7a3
+Revises: 5c1e7a9d2f40
+Create Date: 2026-10-18 11:04:27.918224
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "8e4b2d61c7a3"
+down_revision: Union[str, None] = "5c1e7a9d2f40"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL_BATCH_SIZE = 10000
+
+
+def upgrade() -> None:
+    op.add_column(
+        "tweets",
+        sa.Column("likes_count", sa.Integer(), server_default="0", nullable=False),
+    )
+
+    # Every batch commits on its own, so row locks and WAL are released as
+    # the backfill goes instead of piling up until the end of the migration.
+    with op.get_context().autocommit_block():
+        bind = op.get_bind()
+        max_id = bind.execute(sa.text("SELECT max(id) FROM tweets")).scalar() or 0
+        for start in range(0, max_id + 1, BACKFILL_BATCH_SIZE):
+            bind.execute(
+                sa.text(
+                    "UPDATE tweets SET likes_count = "
+                    "(SELECT count(*) FROM likes WHERE likes.tweet_id = tweets.id) "
+                    "WHERE id >= :start AND id < :end"
+                ),
+                {"start": start, "end": start + BACKFILL_BATCH_SIZE},
+            )
+
+
+def downgrade() -> None:
+    op.drop_column("tweets", "likes_count")
@@ -0,0 +1,43 @@
+"""Add created_at to tweets
+
+Revision ID: 9b2e6f0d4a17
+Revises: f1b6d4c92a83
+Create Date: 2026-10-18 19:02:37.418205
+
+"""
+
+from datetime import datetime, timezone
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "9b2e6f0d4a17"
+down_revision: Union[str, None] = "f1b6d4c92a83"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name == "sqlite":
+        # SQLite cannot add a column with a non-constant default; existing
+        # tweets get the time of the migration like on PostgreSQL.
+        now = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+        server_default = sa.text(f"'{now}'")
+    else:
+        # now() is evaluated once and stored as the column's default for the
+        # existing rows, so the table is not rewritten.
+        server_default = sa.func.now()
+    op.add_column(
+        "tweets",
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=server_default,
+            nullable=False,
+        ),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("tweets", "created_at")
@@ -0,0 +1,28 @@
+"""Add version to users
+
+Revision ID: a7f3c9e21b64
+Revises: e2a95c4b7d18
+Create Date: 2026-10-18 16:21:09.530187
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "a7f3c9e21b64"
+down_revision: Union[str, None] = "e2a95c4b7d18"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "users",
+        sa.Column("version", sa.Integer(), server_default="0", nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("users", "version")
@@ -0,0 +1,73 @@
+"""Add indexes for hot lookup paths
+
+Revision ID: b7d03f9e1a52
+Revises: 8e4b2d61c7a3
+Create Date: 2026-10-18 12:31:09.264871
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "b7d03f9e1a52"
+down_revision: Union[str, None] = "8e4b2d61c7a3"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (name, table, columns, unique)
+INDEXES = [
+    ("ix_users_name", "users", ["name"], True),
+    (
+        "ix_follows_following_follower",
+        "follows",
+        ["following_id", "follower_id"],
+        False,
+    ),
+    ("ix_likes_tweet_user", "likes", ["tweet_id", "user_id"], False),
+    ("ix_medias_tweet_id", "medias", ["tweet_id"], False),
+    ("ix_tweets_author_id_id", "tweets", ["author_id", "id"], False),
+]
+
+
+def index_is_invalid(bind, name: str) -> bool:
+    """Whether ``name`` is left over from a failed concurrent build."""
+    if bind.dialect.name != "postgresql":
+        return False
+    valid = bind.execute(
+        sa.text(
+            "SELECT indisvalid FROM pg_index WHERE indexrelid = to_regclass(:name)"
+        ),
+        {"name": name},
+    ).scalar()
+    return valid is False
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block, so the
+    # indexes are built outside the migration transaction and the tables stay
+    # writable while they are built.
+    with op.get_context().autocommit_block():
+        bind = op.get_bind()
+        for name, table, columns, unique in INDEXES:
+            # A failed concurrent build leaves an INVALID index behind, which
+            # IF NOT EXISTS would skip: a unique one would never be enforced.
+            if index_is_invalid(bind, name):
+                op.drop_index(name, table_name=table, postgresql_concurrently=True)
+            op.create_index(
+                name,
+                table,
+                columns,
+                unique=unique,
+                if_not_exists=True,
+                postgresql_concurrently=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(
+                name, table_name=table, if_exists=True, postgresql_concurrently=True
+            )
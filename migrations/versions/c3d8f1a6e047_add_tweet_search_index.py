@@ -0,0 +1,111 @@
+"""Add full-text search index to tweets
+
+Revision ID: c3d8f1a6e047
+Revises: a7f3c9e21b64
+Create Date: 2026-10-18 17:48:52.106339
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects.postgresql import TSVECTOR
+
+revision: str = "c3d8f1a6e047"
+down_revision: Union[str, None] = "a7f3c9e21b64"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL_BATCH_SIZE = 10000
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name == "sqlite":
+        op.execute(
+            "CREATE VIRTUAL TABLE tweets_fts USING fts5("
+            "content, content='tweets', content_rowid='id')"
+        )
+        op.execute(
+            "CREATE TRIGGER tweets_fts_insert AFTER INSERT ON tweets BEGIN "
+            "INSERT INTO tweets_fts (rowid, content) VALUES (new.id, new.content); END"
+        )
+        op.execute(
+            "CREATE TRIGGER tweets_fts_delete AFTER DELETE ON tweets BEGIN "
+            "INSERT INTO tweets_fts (tweets_fts, rowid, content) "
+            "VALUES ('delete', old.id, old.content); END"
+        )
+        op.execute(
+            "CREATE TRIGGER tweets_fts_update AFTER UPDATE OF content ON tweets BEGIN "
+            "INSERT INTO tweets_fts (tweets_fts, rowid, content) "
+            "VALUES ('delete', old.id, old.content); "
+            "INSERT INTO tweets_fts (rowid, content) VALUES (new.id, new.content); END"
+        )
+        op.execute("INSERT INTO tweets_fts (tweets_fts) VALUES ('rebuild')")
+        return
+
+    # A trigger-maintained column instead of a generated one: adding a stored
+    # generated column rewrites the whole table under an exclusive lock,
+    # while this one is backfilled in batches.
+    op.add_column("tweets", sa.Column("search_vector", TSVECTOR()))
+    op.execute(
+        "CREATE TRIGGER tweets_search_vector BEFORE INSERT OR UPDATE OF content "
+        "ON tweets FOR EACH ROW EXECUTE FUNCTION tsvector_update_trigger("
+        "search_vector, 'pg_catalog.simple', content)"
+    )
+
+    # Leaving the migration's transaction commits the column and the trigger,
+    # then every batch commits on its own so locks and WAL do not pile up.
+    with op.get_context().autocommit_block():
+        bind = op.get_bind()
+        max_id = bind.execute(sa.text("SELECT max(id) FROM tweets")).scalar() or 0
+        for start in range(0, max_id + 1, BACKFILL_BATCH_SIZE):
+            bind.execute(
+                sa.text(
+                    "UPDATE tweets SET search_vector = to_tsvector('simple', content) "
+                    "WHERE id >= :start AND id < :end AND search_vector IS NULL"
+                ),
+                {"start": start, "end": start + BACKFILL_BATCH_SIZE},
+            )
+
+        # A failed concurrent build leaves an INVALID index behind, which
+        # IF NOT EXISTS would skip and the planner would never use.
+        valid = bind.execute(
+            sa.text(
+                "SELECT indisvalid FROM pg_index "
+                "WHERE indexrelid = to_regclass('ix_tweets_search_vector')"
+            )
+        ).scalar()
+        if valid is False:
+            op.drop_index(
+                "ix_tweets_search_vector",
+                table_name="tweets",
+                postgresql_concurrently=True,
+            )
+        op.create_index(
+            "ix_tweets_search_vector",
+            "tweets",
+            ["search_vector"],
+            postgresql_using="gin",
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == "sqlite":
+        op.execute("DROP TABLE IF EXISTS tweets_fts")
+        for trigger in ("tweets_fts_insert", "tweets_fts_delete", "tweets_fts_update"):
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        return
+
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_tweets_search_vector",
+            table_name="tweets",
+            if_exists=True,
+            postgresql_concurrently=True,
+        )
+    op.execute("DROP TRIGGER IF EXISTS tweets_search_vector ON tweets")
+    op.drop_column("tweets", "search_vector")
@@ -0,0 +1,40 @@
+"""Add media variants
+
+Revision ID: d41c8a7e05b9
+Revises: b7d03f9e1a52
+Create Date: 2026-10-18 13:47:52.130954
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "d41c8a7e05b9"
+down_revision: Union[str, None] = "b7d03f9e1a52"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "media_variants",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("media_id", sa.Integer(), nullable=False),
+        sa.Column("kind", sa.String(), nullable=False),
+        sa.Column("file_path", sa.String(), nullable=False),
+        sa.Column("width", sa.Integer(), nullable=False),
+        sa.Column("height", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["media_id"], ["medias.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("media_id", "kind", name="unique_media_variant"),
+    )
+    op.create_index(
+        op.f("ix_media_variants_id"), "media_variants", ["id"], unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_media_variants_id"), table_name="media_variants")
+    op.drop_table("media_variants")
@@ -0,0 +1,34 @@
+"""Add uploader to media
+
+Revision ID: e2a95c4b7d18
+Revises: d41c8a7e05b9
+Create Date: 2026-10-18 15:02:36.771402
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "e2a95c4b7d18"
+down_revision: Union[str, None] = "d41c8a7e05b9"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("medias", sa.Column("uploader_id", sa.Integer(), nullable=True))
+    op.create_foreign_key(
+        "fk_medias_uploader_id_users",
+        "medias",
+        "users",
+        ["uploader_id"],
+        ["id"],
+        ondelete="SET NULL",
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint("fk_medias_uploader_id_users", "medias", type_="foreignkey")
+    op.drop_column("medias", "uploader_id")
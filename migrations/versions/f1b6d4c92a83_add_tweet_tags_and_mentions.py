@@ -0,0 +1,84 @@
+"""Add tweet tags and mentions
+
+Revision ID: f1b6d4c92a83
+Revises: c3d8f1a6e047
+Create Date: 2026-10-18 19:05:14.662093
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+revision: str = "f1b6d4c92a83"
+down_revision: Union[str, None] = "c3d8f1a6e047"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL_BATCH_SIZE = 10000
+
+# Same patterns as app.services.tags, in PostgreSQL's regex dialect.
+BACKFILL_TAGS = r"""
+INSERT INTO tweet_tags (tag, tweet_id)
+SELECT DISTINCT lower(found.groups[1]), tweets.id
+FROM tweets
+CROSS JOIN LATERAL regexp_matches(
+    tweets.content, '(?<![\w#])#(\w+)', 'g'
+) AS found(groups)
+WHERE tweets.id >= :start AND tweets.id < :end
+AND length(found.groups[1]) <= 100
+ON CONFLICT DO NOTHING
+"""
+BACKFILL_MENTIONS = r"""
+INSERT INTO tweet_mentions (user_id, tweet_id)
+SELECT DISTINCT users.id, tweets.id
+FROM tweets
+CROSS JOIN LATERAL regexp_matches(
+    tweets.content, '(?<![\w@])@(\w+)', 'g'
+) AS found(groups)
+JOIN users ON users.name = found.groups[1]
+WHERE tweets.id >= :start AND tweets.id < :end
+ON CONFLICT DO NOTHING
+"""
+
+
+def upgrade() -> None:
+    op.create_table(
+        "tweet_tags",
+        sa.Column("tag", sa.String(length=100), nullable=False),
+        sa.Column("tweet_id", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["tweet_id"], ["tweets.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("tag", "tweet_id"),
+    )
+    op.create_index("ix_tweet_tags_tweet_id", "tweet_tags", ["tweet_id"], unique=False)
+    op.create_table(
+        "tweet_mentions",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("tweet_id", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["tweet_id"], ["tweets.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("user_id", "tweet_id"),
+    )
+    op.create_index(
+        "ix_tweet_mentions_tweet_id", "tweet_mentions", ["tweet_id"], unique=False
+    )
+
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    # Every batch commits on its own, so row locks and WAL are released as
+    # the backfill goes instead of piling up until the end of the migration.
+    with op.get_context().autocommit_block():
+        bind = op.get_bind()
+        max_id = bind.execute(sa.text("SELECT max(id) FROM tweets")).scalar() or 0
+        for start in range(0, max_id + 1, BACKFILL_BATCH_SIZE):
+            params = {"start": start, "end": start + BACKFILL_BATCH_SIZE}
+            bind.execute(sa.text(BACKFILL_TAGS), params)
+            bind.execute(sa.text(BACKFILL_MENTIONS), params)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_tweet_mentions_tweet_id", table_name="tweet_mentions")
+    op.drop_table("tweet_mentions")
+    op.drop_index("ix_tweet_tags_tweet_id", table_name="tweet_tags")
+    op.drop_table("tweet_tags")
@@ -1,17 +1,32 @@
+from contextlib import contextmanager
+from typing import Dict
+
+import pytest
 import pytest_asyncio
 from httpx import ASGITransport, AsyncClient
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 
-from app.database import get_db
+from app.api.endpoints import internal
+from app.database import get_db, get_read_db, instrument_engine
 from app.main import app
+from app.metrics import RequestStats, current_request
 from app.models.base import Base
 from app.models.follow import Follow  # noqa: F401
 from app.models.like import Like  # noqa: F401
+from app.models.media import Media  # noqa: F401
+from app.models.media_variant import MediaVariant  # noqa: F401
+from app.models.timeline import TimelineEntry  # noqa: F401
 from app.models.tweet import Tweet  # noqa: F401
+from app.models.tweet_mention import TweetMention  # noqa: F401
+from app.models.tweet_tag import TweetTag  # noqa: F401
 from app.models.user import User  # noqa: F401
+from app.services.auth_cache import api_key_cache
+from app.services.ranking import ranked_feed_cache
 
 DATABASE_URL = "sqlite+aiosqlite:///:memory:"
 engine = create_async_engine(DATABASE_URL, echo=False)
+instrument_engine(engine)
 
 TestingSessionLocal = async_sessionmaker(
     bind=engine,
@@ -19,6 +34,82 @@ TestingSessionLocal = async_sessionmaker(
 )
 
 
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers",
+        "query_budget(n): fail when one API request executes more than n statements",
+    )
+
+
+class QueryBudget:
+    """SQL statistics of the API requests made during a test."""
+
+    def __init__(self):
+        self.requests: Dict[int, RequestStats] = {}
+
+    def collect(self, conn, cursor, statement, parameters, context, executemany):
+        stats = current_request.get()
+        if stats is not None:
+            self.requests.setdefault(id(stats), stats)
+
+    @contextmanager
+    def __call__(self, budget: int):
+        """Fail when a request made inside the block exceeds ``budget``."""
+        before = set(self.requests)
+        yield
+        for key, stats in self.requests.items():
+            if key not in before and stats.statement_count > budget:
+                statements = "\n".join(
+                    f"  {count}x {sql}" for sql, count, _ in stats.breakdown(limit=20)
+                )
+                pytest.fail(
+                    f"Request executed {stats.statement_count} SQL statements, "
+                    f"budget is {budget}:\n{statements}"
+                )
+
+
+@contextmanager
+def collecting(budget: QueryBudget):
+    event.listen(engine.sync_engine, "before_cursor_execute", budget.collect)
+    try:
+        yield budget
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", budget.collect)
+
+
+@pytest.fixture
+def query_budget():
+    """Считает SQL-запросы каждого обращения к API: with query_budget(5): ..."""
+    with collecting(QueryBudget()) as budget:
+        yield budget
+
+
+@pytest.hookimpl(wrapper=True)
+def pytest_runtest_call(item):
+    """Применяет маркер query_budget(n) ко всем обращениям к API в тесте"""
+    marker = item.get_closest_marker("query_budget")
+    if marker is None:
+        return (yield)
+    with collecting(QueryBudget()) as budget, budget(*marker.args):
+        return (yield)
+
+
+@pytest.fixture(autouse=True)
+def clear_api_key_cache():
+    """Не даёт закэшированным api-key протекать между тестами"""
+    api_key_cache.clear()
+    yield
+    api_key_cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def clear_ranked_feed_cache():
+    """Версии пользователей повторяются между тестами, поэтому кэш сбрасывается"""
+    ranked_feed_cache.clear()
+    yield
+    ranked_feed_cache.clear()
+
+
 @pytest_asyncio.fixture
 async def setup_database():
     """Создаёт таблицы перед тестами и удаляет после"""
@@ -41,7 +132,15 @@ async def test_session(setup_database):
 async def client(test_session):
     """Асинхронный клиент FastAPI с тестовой БД"""
     app.dependency_overrides[get_db] = lambda: test_session
+    app.dependency_overrides[get_read_db] = lambda: test_session
     async with AsyncClient(
         transport=ASGITransport(app=app), base_url="http://test"
     ) as client:
         yield client
+
+
+@pytest.fixture
+def internal_headers(monkeypatch):
+    """Задаёт токен внутренних эндпоинтов и возвращает заголовки с ним"""
+    monkeypatch.setattr(internal, "INTERNAL_TOKEN", "internal-secret")
+    return {"internal-token": "internal-secret"}
@@ -0,0 +1,82 @@
+import anyio
+import pytest
+
+from app.models.user import User
+from app.services.auth_cache import ApiKeyCache, AuthUser, api_key_cache
+
+
+@pytest.mark.anyio
+async def test_api_key_lookup_is_cached(test_session, client):
+    """Test the api-key lookup is served from cache after the first request"""
+    user = User(id=1, name="user1")
+    test_session.add(user)
+    await test_session.commit()
+
+    response = await client.get("/api/follows/following", headers={"api-key": "user1"})
+    assert response.status_code == 200
+
+    loads = []
+
+    async def load():
+        loads.append(1)
+
+    assert await api_key_cache.get("user1", load) == AuthUser(id=1, name="user1")
+    assert loads == []
+
+
+@pytest.mark.anyio
+async def test_api_key_cache_single_flight():
+    """Test concurrent misses for one key share a single load"""
+    cache = ApiKeyCache(maxsize=10, ttl=60)
+    loads = []
+
+    async def load():
+        loads.append(1)
+        await anyio.sleep(0.01)
+        return AuthUser(id=1, name="user1")
+
+    results = []
+
+    async def get():
+        results.append(await cache.get("user1", load))
+
+    async with anyio.create_task_group() as tg:
+        for _ in range(5):
+            tg.start_soon(get)
+
+    assert len(loads) == 1
+    assert results == [AuthUser(id=1, name="user1")] * 5
+
+
+@pytest.mark.anyio
+async def test_api_key_cache_evicts_least_recently_used():
+    """Test the cache stays within its size bound"""
+    cache = ApiKeyCache(maxsize=2, ttl=60)
+
+    for user_id, name in enumerate(["a", "b", "c"]):
+
+        async def load(user_id=user_id, name=name):
+            return AuthUser(id=user_id, name=name)
+
+        await cache.get(name, load)
+
+    assert list(cache._entries) == ["b", "c"]
+
+
+@pytest.mark.anyio
+async def test_renamed_user_is_invalidated(test_session, client):
+    """Test renaming a user drops the cached entry for the old api-key"""
+    user = User(id=1, name="user1")
+    test_session.add(user)
+    await test_session.commit()
+
+    response = await client.get("/api/users/me", headers={"api-key": "user1"})
+    assert response.status_code == 200
+
+    user.name = "renamed"
+    await test_session.commit()
+
+    response = await client.get("/api/users/me", headers={"api-key": "user1"})
+    assert response.status_code == 404
+    response = await client.get("/api/users/me", headers={"api-key": "renamed"})
+    assert response.status_code == 200
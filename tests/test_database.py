@@ -0,0 +1,193 @@
+import time
+
+import pytest
+import pytest_asyncio
+from fastapi import Response
+from sqlalchemy import text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app import database
+from app.api.endpoints import internal
+from app.database import (
+    DB_POOL_SIZE,
+    LAST_WRITE_COOKIE,
+    InstrumentedPool,
+    RecentWriters,
+    Replica,
+    ReplicaSet,
+    async_session_maker,
+    create_engine,
+    read_session,
+    recent_writers,
+)
+from app.metrics import pool_checkout_timeouts, pool_wait_seconds
+
+
+@pytest_asyncio.fixture
+async def replica_set(monkeypatch):
+    """Подменяет набор реплик и очищает журнал недавних записей"""
+    installed = []
+
+    def install(*urls):
+        replica_set = ReplicaSet([Replica(url) for url in urls])
+        monkeypatch.setattr(database, "replicas", replica_set)
+        installed.extend(replica_set.replicas)
+        return replica_set
+
+    recent_writers.clear()
+    yield install
+    recent_writers.clear()
+    for replica in installed:
+        await replica.engine.dispose()
+
+
+def test_replica_set_round_robins_healthy_replicas():
+    """Test replicas are rotated and failed ones are skipped"""
+    first, second = Replica("sqlite+aiosqlite://"), Replica("sqlite+aiosqlite://")
+    replica_set = ReplicaSet([first, second])
+
+    assert replica_set.candidates() == [first, second]
+    assert replica_set.candidates() == [second, first]
+
+    second.mark_down()
+    assert replica_set.candidates() == [first]
+    assert replica_set.candidates() == [first]
+
+
+def test_recent_writers_expire_and_evict(monkeypatch):
+    """Test writers are forgotten after the window and above the size"""
+    now = 100.0
+    monkeypatch.setattr(database.time, "monotonic", lambda: now)
+    writers = RecentWriters(window=5, maxsize=2)
+
+    writers.record("user1")
+    writers.record("user2")
+    writers.record("user3")
+    assert not writers.wrote_recently("user1")
+    assert writers.wrote_recently("user3")
+
+    now = 106.0
+    assert not writers.wrote_recently("user3")
+
+
+@pytest.mark.anyio
+async def test_read_session_uses_replica(replica_set):
+    """Test reads go to a replica when one is configured"""
+    (replica,) = replica_set("sqlite+aiosqlite://").replicas
+
+    async with read_session("user1") as session:
+        assert session.bind is replica.engine
+
+
+@pytest.mark.anyio
+async def test_read_session_reads_own_writes_from_primary(replica_set):
+    """Test a client that just wrote reads from the primary"""
+    replica_set("sqlite+aiosqlite://")
+    recent_writers.record("user1")
+
+    async with read_session("user1") as session:
+        assert session.bind is database.engine
+    async with read_session("user2") as session:
+        assert session.bind is not database.engine
+
+
+@pytest.mark.anyio
+async def test_read_session_routes_on_last_write_cookie(replica_set):
+    """Test a fresh last write cookie sends reads of any worker to the primary"""
+    replica_set("sqlite+aiosqlite://")
+
+    async with read_session("user1", f"{time.time():.3f}") as session:
+        assert session.bind is database.engine
+    for stale in ["0", f"{time.time() + 3600:.3f}", "garbage"]:
+        async with read_session("user1", stale) as session:
+            assert session.bind is not database.engine
+
+
+@pytest.mark.anyio
+async def test_commit_sets_last_write_cookie():
+    """Test committing a request session sets the last write cookie once"""
+    response = Response()
+    async with async_session_maker(info={"response": response}) as session:
+        await session.execute(text("SELECT 1"))
+        await session.commit()
+        await session.execute(text("SELECT 1"))
+        await session.commit()
+
+    cookies = response.headers.getlist("set-cookie")
+    assert len(cookies) == 1
+    assert cookies[0].startswith(f"{LAST_WRITE_COOKIE}=")
+
+
+@pytest.mark.anyio
+async def test_read_session_falls_back_to_primary(replica_set):
+    """Test an unreachable replica is marked down and the primary is used"""
+    (replica,) = replica_set("sqlite+aiosqlite:////nonexistent/replica.db").replicas
+
+    async with read_session() as session:
+        assert session.bind is database.engine
+    assert not replica.healthy
+
+
+def test_create_engine_applies_pool_settings():
+    """Test server databases get the configured instrumented pool"""
+    engine = create_engine("postgresql+asyncpg://user:secret@db/microblog", "test")
+
+    assert isinstance(engine.pool, InstrumentedPool)
+    assert engine.pool.size() == DB_POOL_SIZE
+
+
+def test_create_engine_keeps_sqlite_pool():
+    """Test SQLite engines keep SQLAlchemy's default pool"""
+    engine = create_engine("sqlite+aiosqlite://", "test")
+
+    assert not isinstance(engine.pool, InstrumentedPool)
+
+
+@pytest.mark.anyio
+async def test_instrumented_pool_records_waits_and_timeouts(tmp_path):
+    """Test checkout waits and timeouts are recorded per pool"""
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}",
+        poolclass=InstrumentedPool,
+        pool_logging_name="exhausted",
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.01,
+    )
+    timeouts = pool_checkout_timeouts.get(pool="exhausted")
+    waits = pool_wait_seconds.snapshot(pool="exhausted")["count"]
+    try:
+        async with engine.connect():
+            with pytest.raises(PoolTimeoutError):
+                async with engine.connect():
+                    pass
+    finally:
+        await engine.dispose()
+
+    assert pool_checkout_timeouts.get(pool="exhausted") == timeouts + 1
+    assert pool_wait_seconds.snapshot(pool="exhausted")["count"] == waits + 2
+
+
+@pytest.mark.anyio
+async def test_get_pool_status(client, internal_headers):
+    """Test the internal pool endpoint reports the primary pool"""
+    response = await client.get("/internal/pool", headers=internal_headers)
+
+    assert response.status_code == 200
+    (primary,) = response.json()["pools"]
+    assert primary["name"] == "primary"
+    assert primary["checkout_timeouts"] == 0
+
+
+@pytest.mark.anyio
+async def test_internal_endpoints_require_token(client, monkeypatch):
+    """Test internal endpoints are hidden without the configured token"""
+    monkeypatch.setattr(internal, "INTERNAL_TOKEN", None)
+    response = await client.get("/internal/metrics")
+    assert response.status_code == 404
+
+    monkeypatch.setattr(internal, "INTERNAL_TOKEN", "internal-secret")
+    for headers in [{}, {"internal-token": "guess"}]:
+        response = await client.get("/internal/pool", headers=headers)
+        assert response.status_code == 404
@@ -0,0 +1,173 @@
+from contextlib import asynccontextmanager
+
+import asyncpg
+import orjson
+import pytest
+
+from app.api.endpoints import tweets
+from app.api.sse import KEEPALIVE_FRAME, RESYNC_FRAME, event_stream
+from app.models.follow import Follow
+from app.models.user import User
+from app.services import events
+from app.services.events import (
+    InProcessBroker,
+    PostgresBroker,
+    broker,
+    publish,
+    sse_frame,
+)
+
+
+def decode(frame: bytes) -> dict:
+    event_line, data_line = frame.decode().strip().split("\n")
+    data = orjson.loads(data_line.removeprefix("data: "))
+    assert event_line == f"event: {data['type']}"
+    return data
+
+
+@pytest.mark.anyio
+async def test_events_are_delivered_on_commit(test_session):
+    """Test published events reach subscribers only once the write commits"""
+    with broker.subscribe([1]) as subscription:
+        await publish(test_session, 1, {"type": "tweet_created", "tweet_id": 1})
+        await publish(test_session, 2, {"type": "tweet_created", "tweet_id": 2})
+        assert subscription.receive_stream.statistics().current_buffer_used == 0
+
+        await test_session.commit()
+        assert decode(await subscription.receive())["tweet_id"] == 1
+        assert subscription.receive_stream.statistics().current_buffer_used == 0
+
+        test_session.add(User(id=1, name="user1"))
+        await test_session.flush()
+        await publish(test_session, 1, {"type": "tweet_created", "tweet_id": 3})
+        await test_session.rollback()
+        await test_session.commit()
+        assert subscription.receive_stream.statistics().current_buffer_used == 0
+
+    assert broker.subscribers == {}
+
+
+@pytest.mark.anyio
+async def test_write_endpoints_publish_feed_events(test_session, client):
+    """Test creating, liking, unliking and deleting a tweet push events"""
+    user1 = User(id=1, name="user1")
+    user2 = User(id=2, name="user2")
+    follow = Follow(follower_id=1, following_id=2)
+
+    test_session.add_all([user1, user2, follow])
+    await test_session.commit()
+
+    with broker.subscribe([2]) as subscription:
+        response = await client.post(
+            "/api/tweets",
+            json={"tweet_data": "Hello", "tweet_media_ids": []},
+            headers={"api-key": "user2"},
+        )
+        tweet_id = response.json()["tweet_id"]
+        await client.post(f"/api/tweets/{tweet_id}/likes", headers={"api-key": "user1"})
+        await client.post(f"/api/tweets/{tweet_id}/likes", headers={"api-key": "user1"})
+        await client.delete(
+            f"/api/tweets/{tweet_id}/likes", headers={"api-key": "user1"}
+        )
+        await client.post(
+            "/api/tweets/likes/batch",
+            json={"tweet_ids": [tweet_id, 999]},
+            headers={"api-key": "user1"},
+        )
+        await client.delete(f"/api/tweets/{tweet_id}", headers={"api-key": "user2"})
+
+        received = [decode(await subscription.receive()) for _ in range(5)]
+        assert subscription.receive_stream.statistics().current_buffer_used == 0
+
+    base = {"tweet_id": tweet_id, "author_id": 2}
+    assert received == [
+        {"type": "tweet_created", **base},
+        {"type": "likes_changed", **base, "delta": 1},
+        {"type": "likes_changed", **base, "delta": -1},
+        {"type": "likes_changed", **base, "delta": 1},
+        {"type": "tweet_deleted", **base},
+    ]
+
+
+@pytest.mark.anyio
+async def test_event_stream_sends_keepalives_and_frames():
+    """Test the stream interleaves keepalive comments with published frames"""
+    stream = event_stream([1], keepalive=0.01)
+    assert (await stream.__anext__()).startswith(b"retry: ")
+    assert await stream.__anext__() == KEEPALIVE_FRAME
+
+    frame = sse_frame({"type": "tweet_created", "tweet_id": 1})
+    broker.deliver(1, frame)
+    assert await stream.__anext__() == frame
+
+    await stream.aclose()
+    assert broker.subscribers == {}
+
+
+@pytest.mark.anyio
+async def test_slow_subscriber_is_told_to_resync(monkeypatch):
+    """Test a subscriber that falls too far behind is closed with a resync event"""
+    small_broker = InProcessBroker(buffer_size=2)
+    monkeypatch.setattr("app.services.events.broker", small_broker)
+    stream = event_stream([1])
+    await stream.__anext__()
+
+    frames = [sse_frame({"type": "tweet_created", "tweet_id": i}) for i in range(3)]
+    for frame in frames:
+        small_broker.deliver(1, frame)
+
+    assert [chunk async for chunk in stream] == frames[:2] + [RESYNC_FRAME]
+    assert small_broker.subscribers == {}
+
+
+@pytest.mark.anyio
+async def test_stream_feed_closes_its_session_before_streaming(
+    test_session, client, monkeypatch
+):
+    """Test the stream subscribes to followed authors without holding a session"""
+    test_session.add_all(
+        [
+            User(id=1, name="user1"),
+            User(id=2, name="user2"),
+            Follow(follower_id=1, following_id=2),
+        ]
+    )
+    await test_session.commit()
+    sessions = []
+
+    @asynccontextmanager
+    async def read_session(api_key=None, last_write=None):
+        sessions.append("opened")
+        yield test_session
+        sessions.append("closed")
+
+    async def stream(channels):
+        yield f"{sessions} {channels}".encode()
+
+    monkeypatch.setattr(tweets, "read_session", read_session)
+    monkeypatch.setattr(tweets, "event_stream", stream)
+
+    response = await client.get("/api/tweets/stream", headers={"api-key": "user1"})
+
+    assert response.status_code == 200
+    assert response.text == "['opened', 'closed'] [1, 2]"
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("anyio_backend", ["asyncio"])
+async def test_postgres_broker_keeps_retrying_after_database_errors(monkeypatch):
+    """Test the listener reconnects after socket and server errors alike"""
+    postgres = PostgresBroker("postgresql+asyncpg://user:secret@db/microblog")
+    errors = [ConnectionRefusedError(), asyncpg.CannotConnectNowError("recovery")]
+
+    async def start():
+        if errors:
+            raise errors.pop(0)
+        postgres.connection = object()
+
+    monkeypatch.setattr(postgres, "start", start)
+    monkeypatch.setattr(events, "LISTEN_RETRY_SECONDS", 0)
+    await postgres._listen_again()
+
+    assert errors == []
+    assert postgres.connection is not None
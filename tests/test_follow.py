@@ -2,10 +2,13 @@ import pytest
 from sqlalchemy import select
 
 from app.models.follow import Follow
+from app.models.timeline import TimelineEntry
+from app.models.tweet import Tweet
 from app.models.user import User
 
 
 @pytest.mark.anyio
+@pytest.mark.query_budget(4)
 async def test_follow_user(test_session, client):
     """Test following a user (user1 -> user2)"""
     user1 = User(id=1, name="user1")
@@ -27,6 +30,7 @@ async def test_follow_user(test_session, client):
 
 
 @pytest.mark.anyio
+@pytest.mark.query_budget(3)
 async def test_follow_user_already_following(test_session, client):
     """Test following a user who is already followed (should return 400)"""
     user1 = User(id=1, name="user1")
@@ -43,6 +47,21 @@ async def test_follow_user_already_following(test_session, client):
 
 
 @pytest.mark.anyio
+@pytest.mark.query_budget(3)
+async def test_follow_user_not_found(test_session, client):
+    """Test following a missing user (should return 404)"""
+    user1 = User(id=1, name="user1")
+    test_session.add(user1)
+    await test_session.commit()
+
+    response = await client.post("/api/follows/999", headers={"api-key": "user1"})
+
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Target user not found"
+
+
+@pytest.mark.anyio
+@pytest.mark.query_budget(5)
 async def test_unfollow_user(test_session, client):
     """Test unfollowing a user (user1 -> user2)"""
     user1 = User(id=1, name="user1")
@@ -64,6 +83,39 @@ async def test_unfollow_user(test_session, client):
 
 
 @pytest.mark.anyio
+@pytest.mark.query_budget(4)
+async def test_follow_and_unfollow_keep_timeline_consistent(test_session, client):
+    """Test following backfills the author's tweets and unfollowing purges them"""
+    user1 = User(id=1, name="user1")
+    user2 = User(id=2, name="user2")
+    tweet = Tweet(id=1, content="Before follow", author_id=2)
+
+    test_session.add_all([user1, user2, tweet])
+    await test_session.commit()
+
+    await client.post("/api/follows/2", headers={"api-key": "user1"})
+
+    entries = await test_session.execute(
+        select(TimelineEntry.tweet_id).where(TimelineEntry.user_id == 1)
+    )
+    assert entries.scalars().all() == [1]
+    await test_session.refresh(user1)
+    await test_session.refresh(user2)
+    assert (user1.following_count, user2.followers_count) == (1, 1)
+
+    await client.delete("/api/follows/2", headers={"api-key": "user1"})
+
+    entries = await test_session.execute(
+        select(TimelineEntry).where(TimelineEntry.user_id == 1)
+    )
+    assert entries.scalar() is None
+    await test_session.refresh(user1)
+    await test_session.refresh(user2)
+    assert (user1.following_count, user2.followers_count) == (0, 0)
+
+
+@pytest.mark.anyio
+@pytest.mark.query_budget(2)
 async def test_unfollow_user_not_following(test_session, client):
     """Test unfollowing a user when not following them (should return 400)"""
     user1 = User(id=1, name="user1")
@@ -79,6 +131,7 @@ async def test_unfollow_user_not_following(test_session, client):
 
 
 @pytest.mark.anyio
+@pytest.mark.query_budget(2)
 async def test_get_following(test_session, client):
     """Test retrieving the list of followed users"""
     user1 = User(id=1, name="user1")
@@ -101,6 +154,7 @@ async def test_get_following(test_session, client):
 
 
 @pytest.mark.anyio
+@pytest.mark.query_budget(2)
 async def test_get_followers(test_session, client):
     """Test retrieving the list of followers"""
     user1 = User(id=1, name="user1")
@@ -120,3 +174,66 @@ async def test_get_followers(test_session, client):
     assert len(data["followers"]) == 2
     assert {"id": 2, "name": "user2"} in data["followers"]
     assert {"id": 3, "name": "user3"} in data["followers"]
+
+
+@pytest.mark.anyio
+async def test_get_following_pages(test_session, client):
+    """Test the own following list is paginated with the max_id cursor"""
+    users = [User(id=user_id, name=f"user{user_id}") for user_id in range(1, 5)]
+    follows = [Follow(follower_id=1, following_id=user_id) for user_id in (2, 3, 4)]
+
+    test_session.add_all([*users, *follows])
+    await test_session.commit()
+    headers = {"api-key": "user1"}
+
+    response = await client.get(
+        "/api/follows/following", params={"limit": 2}, headers=headers
+    )
+    data = response.json()
+    assert [user["id"] for user in data["following"]] == [4, 3]
+    assert data["next_cursor"] == 3
+
+    response = await client.get(
+        "/api/follows/following",
+        params={"limit": 2, "max_id": data["next_cursor"]},
+        headers=headers,
+    )
+    data = response.json()
+    assert [user["id"] for user in data["following"]] == [2]
+    assert data["next_cursor"] is None
+
+
+@pytest.mark.anyio
+@pytest.mark.query_budget(5)
+async def test_follow_users_batch(test_session, client):
+    """Test following several users at once with per-user results"""
+    user1 = User(id=1, name="user1")
+    user2 = User(id=2, name="user2")
+    user3 = User(id=3, name="user3")
+    tweet = Tweet(id=1, content="Backfilled", author_id=3)
+    follow = Follow(follower_id=1, following_id=2)
+
+    test_session.add_all([user1, user2, user3, tweet, follow])
+    await test_session.commit()
+
+    response = await client.post(
+        "/api/follows/batch",
+        headers={"api-key": "user1"},
+        json={"user_ids": [2, 3, 1, 999]},
+    )
+
+    assert response.status_code == 200
+    assert response.json()["results"] == [
+        {"user_id": 2, "result": False, "detail": "Already following this user"},
+        {"user_id": 3, "result": True, "detail": None},
+        {"user_id": 1, "result": False, "detail": "Cannot follow yourself"},
+        {"user_id": 999, "result": False, "detail": "Target user not found"},
+    ]
+    await test_session.refresh(user1)
+    await test_session.refresh(user3)
+    assert user3.followers_count == 1
+    assert user1.following_count == 1
+    entries = await test_session.execute(
+        select(TimelineEntry.tweet_id).where(TimelineEntry.user_id == 1)
+    )
+    assert entries.scalars().all() == [1]
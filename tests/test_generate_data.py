@@ -0,0 +1,64 @@
+import pytest
+from sqlalchemy import func, select
+
+from app.generate_data import DataSet, DataSetConfig, generate, skewed_counts
+from app.models.follow import Follow
+from app.models.like import Like
+from app.models.tweet import Tweet
+from app.models.user import User
+
+CONFIG = DataSetConfig(users=50, tweets=200, follows=400, likes=1000, celebrities=3)
+FIRST_IDS = {"users": 1, "tweets": 1, "follows": 1, "likes": 1, "medias": 1}
+
+
+def test_skewed_counts_respect_total_and_cap():
+    """Test counts add up, decrease with rank and stay under the cap"""
+    counts = skewed_counts(1000, 50, 1.1, 49)
+
+    assert sum(counts) == 1000
+    assert max(counts) <= 49
+    assert counts == sorted(counts, reverse=True)
+
+
+def test_data_set_is_deterministic():
+    """Test the same configuration always produces the same rows"""
+    first, second = DataSet(CONFIG, FIRST_IDS), DataSet(CONFIG, FIRST_IDS)
+
+    for (_, _, rows), (_, _, same_rows) in zip(first.tables(), second.tables()):
+        assert list(rows) == list(same_rows)
+
+
+@pytest.mark.anyio
+async def test_generate_keeps_counters_consistent(test_session):
+    """Test generated counters match the generated follows and likes"""
+    async with test_session.bind.connect() as conn:
+        loaded = await generate(conn, CONFIG, batch_size=64)
+
+    assert loaded["users"] == 50
+    assert loaded["likes"] == 1000
+    followers = (
+        select(func.count(Follow.id))
+        .where(Follow.following_id == User.id)
+        .scalar_subquery()
+    )
+    following = (
+        select(func.count(Follow.id))
+        .where(Follow.follower_id == User.id)
+        .scalar_subquery()
+    )
+    likes = (
+        select(func.count(Like.id)).where(Like.tweet_id == Tweet.id).scalar_subquery()
+    )
+    assert not await test_session.scalar(
+        select(func.count(User.id)).where(User.followers_count != followers)
+    )
+    assert not await test_session.scalar(
+        select(func.count(User.id)).where(User.following_count != following)
+    )
+    assert not await test_session.scalar(
+        select(func.count(Tweet.id)).where(Tweet.likes_count != likes)
+    )
+    top = await test_session.scalar(
+        select(User.name).order_by(User.followers_count.desc()).limit(1)
+    )
+    assert top == "celebrity1"
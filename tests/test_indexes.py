@@ -0,0 +1,109 @@
+import re
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.future import select
+
+from app.models.base import Base
+from app.models.follow import Follow
+from app.models.like import Like
+from app.models.media import Media
+from app.models.tweet import Tweet
+from app.models.user import User
+from app.services import timeline
+from app.services.timeline import timeline_tweet_ids
+
+# A table read that does not go through any index looks like "SCAN tweets";
+# scans of subquery results such as "SCAN anon_1" are fine.
+FULL_SCAN = re.compile(r"^SCAN (%s)$" % "|".join(Base.metadata.tables))
+
+
+async def query_plan_steps(session, query):
+    compiled = query.compile(
+        dialect=session.get_bind().dialect,
+        compile_kwargs={"literal_binds": True},
+    )
+    result = await session.execute(text(f"EXPLAIN QUERY PLAN {compiled}"))
+    return result.all()
+
+
+async def query_plan(session, query):
+    return [step.detail for step in await query_plan_steps(session, query)]
+
+
+def assert_uses_indexes(plan):
+    assert plan
+    for step in plan:
+        assert not FULL_SCAN.match(step), plan
+
+
+@pytest.mark.anyio
+async def test_feed_queries_use_indexes(test_session, monkeypatch):
+    """Test the feed page and its eager loads are index searches"""
+    monkeypatch.setattr(timeline, "FANOUT_FOLLOWER_THRESHOLD", 1)
+    queries = [
+        select(Tweet).where(Tweet.id.in_(timeline_tweet_ids(1, 21, max_id=100))),
+        select(Like.tweet_id, User.name)
+        .join(User, User.id == Like.user_id)
+        .where(Like.tweet_id.in_([1, 2, 3])),
+        select(Media.file_path).where(Media.tweet_id.in_([1, 2, 3])),
+        select(User.id).where(User.name == "user1"),
+    ]
+
+    for query in queries:
+        assert_uses_indexes(await query_plan(test_session, query))
+
+
+@pytest.mark.anyio
+async def test_feed_page_only_sorts_the_page(test_session, monkeypatch):
+    """Test the feed branches are cut to the page before they are merged"""
+    monkeypatch.setattr(timeline, "FANOUT_FOLLOWER_THRESHOLD", 1)
+    steps = await query_plan_steps(test_session, timeline_tweet_ids(1, 21, max_id=100))
+
+    assert "UNION USING TEMP B-TREE" not in [step.detail for step in steps]
+    # Every member of the union is a subquery with its own LIMIT, so the
+    # merge's DISTINCT and ORDER BY see at most two pages of rows.
+    members = [
+        [step.detail for step in steps if step.parent == member.id]
+        for member in steps
+        if member.detail in ("LEFT-MOST SUBQUERY", "UNION ALL")
+    ]
+    assert len(members) == 2, steps
+    for member in members:
+        assert [detail for detail in member if detail.startswith("CO-ROUTINE")]
+        assert not [detail for detail in member if FULL_SCAN.match(detail)]
+    # The materialized timeline is read newest first straight off its key.
+    entries = next(s for s in steps if s.detail.startswith("SEARCH timeline_entries"))
+    assert not [
+        step
+        for step in steps
+        if step.parent == entries.parent and "TEMP B-TREE" in step.detail
+    ], steps
+
+
+@pytest.mark.anyio
+async def test_follower_queries_use_indexes(test_session):
+    """Test follower and following lookups are index searches"""
+    queries = [
+        select(User.id, User.name)
+        .join(Follow, Follow.follower_id == User.id)
+        .where(Follow.following_id == 1),
+        select(User.id, User.name)
+        .join(Follow, Follow.following_id == User.id)
+        .where(Follow.follower_id == 1),
+    ]
+
+    for query in queries:
+        assert_uses_indexes(await query_plan(test_session, query))
+
+
+@pytest.mark.anyio
+async def test_like_queries_use_indexes(test_session):
+    """Test like lookups by tweet and by user are index searches"""
+    queries = [
+        select(Like.id).where(Like.tweet_id == 1),
+        select(Like.id).where(Like.user_id == 1, Like.tweet_id == 1),
+    ]
+
+    for query in queries:
+        assert_uses_indexes(await query_plan(test_session, query))
@@ -0,0 +1,311 @@
+import hashlib
+import os
+from contextlib import asynccontextmanager
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+from PIL import Image
+from sqlalchemy import select
+from starlette.applications import Starlette
+from starlette.routing import Mount
+
+from app.api.media_files import MediaFiles
+from app.api.middleware import BodySizeLimitMiddleware
+from app.models.media import Media
+from app.models.media_variant import MediaVariant
+from app.models.tweet import Tweet
+from app.models.user import User
+from app.services import media_storage
+from app.services.media_storage import MAX_UPLOAD_SIZE, MULTIPART_OVERHEAD
+from app.services.media_variants import generate_variants, render_variants
+
+
+@pytest.fixture
+def upload_dir(tmp_path, monkeypatch):
+    directory = str(tmp_path / "uploads")
+    monkeypatch.setattr(media_storage, "UPLOAD_DIR", directory)
+    return directory
+
+
+@pytest.mark.anyio
+async def test_upload_media(test_session, client, upload_dir):
+    """Test uploading a file stores it under its sha256 digest"""
+    user = User(id=1, name="user1")
+    test_session.add(user)
+    await test_session.commit()
+
+    content = b"fake image bytes"
+    response = await client.post(
+        "/api/medias",
+        headers={"api-key": "user1"},
+        files={"file": ("photo.PNG", content, "image/png")},
+    )
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["result"] is True
+
+    media = await test_session.get(Media, data["media_id"])
+    assert media.uploader_id == 1
+    digest = hashlib.sha256(content).hexdigest()
+    assert media.file_path == os.path.join(
+        upload_dir, digest[:2], digest[2:4], digest + ".png"
+    )
+    with open(media.file_path, "rb") as stored:
+        assert stored.read() == content
+
+
+@pytest.mark.anyio
+async def test_upload_media_deduplicates_content(test_session, client, upload_dir):
+    """Test identical uploads share one blob and same names do not collide"""
+    user = User(id=1, name="user1")
+    test_session.add(user)
+    await test_session.commit()
+
+    uploads = [("a.png", b"same"), ("b.png", b"same"), ("a.png", b"other")]
+    for filename, content in uploads:
+        response = await client.post(
+            "/api/medias",
+            headers={"api-key": "user1"},
+            files={"file": (filename, content, "image/png")},
+        )
+        assert response.status_code == 200
+
+    paths = (await test_session.execute(select(Media.file_path))).scalars().all()
+    assert len(paths) == 3
+    assert paths[0] == paths[1] != paths[2]
+    assert len([f for _, _, files in os.walk(upload_dir) for f in files]) == 2
+
+
+@pytest.mark.anyio
+async def test_upload_media_too_large(test_session, client, upload_dir, monkeypatch):
+    """Test uploads over the size limit are rejected (should return 413)"""
+    monkeypatch.setattr(media_storage, "MAX_UPLOAD_SIZE", 4)
+    user = User(id=1, name="user1")
+    test_session.add(user)
+    await test_session.commit()
+
+    response = await client.post(
+        "/api/medias",
+        headers={"api-key": "user1"},
+        files={"file": ("big.png", b"too large", "image/png")},
+    )
+
+    assert response.status_code == 413
+    assert response.json()["detail"] == "File too large"
+    assert os.listdir(os.path.join(upload_dir, "tmp")) == []
+
+
+@pytest.mark.anyio
+async def test_upload_media_streamed_too_large(test_session, client, upload_dir):
+    """Test a chunked upload past the body limit is rejected (should return 413)"""
+    user = User(id=1, name="user1")
+    test_session.add(user)
+    await test_session.commit()
+
+    chunk = b"x" * (1024 * 1024)
+    chunk_count = (MAX_UPLOAD_SIZE + MULTIPART_OVERHEAD) // len(chunk) + 1
+
+    async def body():
+        yield (
+            b"--limit\r\n"
+            b'Content-Disposition: form-data; name="file"; filename="big.png"\r\n'
+            b"Content-Type: image/png\r\n\r\n"
+        )
+        for _ in range(chunk_count):
+            yield chunk
+        yield b"\r\n--limit--\r\n"
+
+    response = await client.post(
+        "/api/medias",
+        headers={
+            "api-key": "user1",
+            "content-type": "multipart/form-data; boundary=limit",
+        },
+        content=body(),
+    )
+
+    assert response.status_code == 413
+    assert response.json()["detail"] == "File too large"
+    assert (await test_session.execute(select(Media))).first() is None
+
+
+@pytest.mark.anyio
+async def test_body_size_limit_refuses_before_the_app_reads():
+    """Test oversized bodies get 413 whether declared up front or streamed"""
+    received = []
+
+    async def echo_size(scope, receive, send):
+        size = 0
+        while True:
+            message = await receive()
+            received.append(message)
+            size += len(message.get("body", b""))
+            if not message.get("more_body"):
+                break
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": str(size).encode()})
+
+    limited = BodySizeLimitMiddleware(echo_size, paths=["/upload"], max_body_size=8)
+    async with AsyncClient(
+        transport=ASGITransport(app=limited), base_url="http://test"
+    ) as client:
+        response = await client.post("/upload", content=b"x" * 9)
+        assert response.status_code == 413
+        assert response.json()["detail"] == "File too large"
+        assert received == []
+
+        async def chunks():
+            yield b"x" * 5
+            yield b"x" * 5
+
+        response = await client.post("/upload", content=chunks())
+        assert response.status_code == 413
+
+        response = await client.post("/upload", content=b"x" * 8)
+        assert response.text == "8"
+        response = await client.post("/other", content=b"x" * 9)
+        assert response.text == "9"
+
+
+def make_image(path, size):
+    Image.new("RGB", size, color=(200, 30, 30)).save(path, format="PNG")
+    return str(path)
+
+
+def test_render_variants(tmp_path):
+    """Test large images get resized renditions next to the original"""
+    source = make_image(tmp_path / "original.png", (2000, 1000))
+
+    variants = {kind: rest for kind, *rest in render_variants(source)}
+
+    assert variants["thumbnail"][1:] == [320, 160]
+    assert variants["medium"][1:] == [1080, 540]
+    with Image.open(variants["thumbnail"][0]) as thumbnail:
+        assert thumbnail.size == (320, 160)
+
+
+def test_render_variants_skips_existing_renditions(tmp_path, monkeypatch):
+    """Test rendering an upload again reuses the renditions without resizing"""
+    source = make_image(tmp_path / "original.png", (2000, 1000))
+    first = render_variants(source)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("resized again")
+
+    monkeypatch.setattr(Image.Image, "thumbnail", fail)
+    assert render_variants(source) == first
+
+
+def test_render_variants_small_image_and_non_image(tmp_path):
+    """Test small images reuse the original and unreadable files are skipped"""
+    source = make_image(tmp_path / "small.png", (100, 50))
+    assert render_variants(source) == [
+        ("thumbnail", source, 100, 50),
+        ("medium", source, 100, 50),
+    ]
+
+    text_file = tmp_path / "notes.png"
+    text_file.write_bytes(b"not an image")
+    assert render_variants(str(text_file)) == []
+
+
+@pytest.mark.anyio
+async def test_generate_variants_records_rows(test_session, tmp_path):
+    """Test generated renditions are stored as media variants"""
+    source = make_image(tmp_path / "original.png", (2000, 1000))
+    media = Media(id=1, file_path=source)
+    test_session.add(media)
+    await test_session.commit()
+
+    @asynccontextmanager
+    async def session_maker():
+        yield test_session
+
+    await generate_variants(1, source, session_maker=session_maker)
+
+    variants = await test_session.execute(
+        select(MediaVariant.kind, MediaVariant.width).where(MediaVariant.media_id == 1)
+    )
+    assert sorted(variants.all()) == [("medium", 1080), ("thumbnail", 320)]
+
+
+@pytest.mark.anyio
+async def test_feed_returns_variant_urls(test_session, client):
+    """Test feed entries carry the thumbnail and medium renditions"""
+    user = User(id=1, name="user1")
+    tweet = Tweet(id=1, content="Look", author_id=1)
+    media = Media(id=1, file_path="uploads/a.png", tweet_id=1)
+    thumbnail = MediaVariant(
+        media_id=1,
+        kind="thumbnail",
+        file_path="uploads/a_thumbnail.png",
+        width=320,
+        height=160,
+    )
+
+    test_session.add_all([user, tweet, media, thumbnail])
+    await test_session.commit()
+
+    response = await client.get("/api/tweets", headers={"api-key": "user1"})
+
+    (entry,) = response.json()["tweets"]
+    assert entry["attachments"] == ["uploads/a.png"]
+    assert entry["media"] == [
+        {
+            "id": 1,
+            "url": "uploads/a.png",
+            "thumbnail_url": "uploads/a_thumbnail.png",
+            "medium_url": None,
+        }
+    ]
+
+
+@pytest.fixture
+def media_client(tmp_path):
+    digest = hashlib.sha256(b"0123456789").hexdigest()
+    (tmp_path / "tmp").mkdir()
+    (tmp_path / "tmp" / "partial").write_bytes(b"partial")
+    (tmp_path / f"{digest}.mp4").write_bytes(b"0123456789")
+    (tmp_path / "legacy.png").write_bytes(b"legacy")
+
+    app = Starlette(routes=[Mount("/", MediaFiles(directory=str(tmp_path)))])
+    client = AsyncClient(transport=ASGITransport(app=app), base_url="http://test")
+    return client, digest
+
+
+@pytest.mark.anyio
+async def test_media_files_are_immutable(media_client):
+    """Test content-addressed uploads get a strong ETag and long caching"""
+    client, digest = media_client
+
+    async with client:
+        response = await client.get(f"/{digest}.mp4")
+        assert response.status_code == 200
+        assert response.headers["etag"] == f'"{digest}"'
+        assert "immutable" in response.headers["cache-control"]
+
+        response = await client.get(
+            f"/{digest}.mp4", headers={"if-none-match": f'"{digest}"'}
+        )
+        assert response.status_code == 304
+
+        response = await client.get("/legacy.png")
+        assert response.status_code == 200
+        assert "cache-control" not in response.headers
+
+        response = await client.get("/tmp/partial")
+        assert response.status_code == 404
+
+
+@pytest.mark.anyio
+async def test_media_files_support_ranges(media_client):
+    """Test byte ranges are served for seeking"""
+    client, digest = media_client
+
+    async with client:
+        response = await client.get(f"/{digest}.mp4", headers={"range": "bytes=2-5"})
+
+    assert response.status_code == 206
+    assert response.content == b"2345"
+    assert response.headers["content-range"] == "bytes 2-5/10"
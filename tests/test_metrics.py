@@ -0,0 +1,94 @@
+import logging
+
+import pytest
+
+from app.api import middleware
+from app.metrics import (
+    Counter,
+    Histogram,
+    RequestStats,
+    current_request,
+    request_statements,
+)
+from app.models.tweet import Tweet
+from app.models.user import User
+
+
+def test_histogram_exposition():
+    """Test histograms are exposed with cumulative buckets, sum and count"""
+    histogram = Histogram(
+        "test_seconds", "Test histogram.", buckets=(0.1, 1), registry=[]
+    )
+    histogram.observe(0.05, route="/a")
+    histogram.observe(0.5, route="/a")
+    histogram.observe(3, route="/a")
+
+    assert histogram.expose() == [
+        "# HELP test_seconds Test histogram.",
+        "# TYPE test_seconds histogram",
+        'test_seconds_bucket{route="/a",le="0.1"} 1',
+        'test_seconds_bucket{route="/a",le="1"} 2',
+        'test_seconds_bucket{route="/a",le="+Inf"} 3',
+        'test_seconds_sum{route="/a"} 3.55',
+        'test_seconds_count{route="/a"} 3',
+    ]
+
+
+def test_counter_exposition_escapes_labels():
+    """Test label values are escaped in the text format"""
+    counter = Counter("test_total", "Test counter.", registry=[])
+    counter.inc(pool='say "hi"')
+
+    assert counter.expose()[-1] == 'test_total{pool="say \\"hi\\""} 1'
+
+
+def test_request_stats_breakdown():
+    """Test statements are grouped by their normalized text"""
+    stats = RequestStats()
+    stats.record("SELECT 1\n FROM users", 0.002)
+    stats.record("SELECT 1 FROM users", 0.001)
+    stats.record("SELECT 2", 0.01)
+
+    assert stats.statement_count == 3
+    assert stats.breakdown() == [
+        ("SELECT 2", 1, 0.01),
+        ("SELECT 1 FROM users", 2, pytest.approx(0.003)),
+    ]
+
+
+@pytest.mark.anyio
+async def test_request_statements_are_counted(test_session, client, internal_headers):
+    """Test statements of a request are counted per route and exported"""
+    test_session.add_all(
+        [User(id=1, name="user1"), Tweet(id=1, content="Hi", author_id=1)]
+    )
+    await test_session.commit()
+    route = "/api/tweets/{tweet_id}/likes"
+    before = request_statements.snapshot(route=route)
+
+    response = await client.get("/api/tweets/1/likes")
+
+    assert response.status_code == 200
+    after = request_statements.snapshot(route=route)
+    assert after["count"] == before["count"] + 1
+    assert after["sum"] == before["sum"] + 1
+    assert current_request.get() is None
+
+    metrics = await client.get("/internal/metrics", headers=internal_headers)
+    assert metrics.status_code == 200
+    assert f'http_request_db_statements_count{{route="{route}"}}' in metrics.text
+
+
+@pytest.mark.anyio
+async def test_slow_request_is_logged(test_session, client, monkeypatch, caplog):
+    """Test requests above the threshold are logged with their SQL"""
+    test_session.add(User(id=1, name="user1"))
+    await test_session.commit()
+    monkeypatch.setattr(middleware, "SLOW_REQUEST_SECONDS", 0)
+
+    with caplog.at_level(logging.WARNING, logger=middleware.__name__):
+        await client.get("/api/users/1")
+
+    (record,) = caplog.records
+    assert "Slow request GET /api/users/1" in record.getMessage()
+    assert "FROM users" in record.getMessage()
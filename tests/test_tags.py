@@ -0,0 +1,149 @@
+import pytest
+from sqlalchemy.future import select
+
+from app.models.tweet_mention import TweetMention
+from app.models.tweet_tag import TweetTag
+from app.models.user import User
+from app.services.tags import extract_mentions, extract_tags
+from app.services.trending import TrendingTags
+
+NOW = 1_700_000_000.0
+
+
+@pytest.fixture
+def trending(monkeypatch):
+    """Свежий счётчик трендов вместо общего для процесса"""
+    trending = TrendingTags(window=3600, buckets=12, width=256, depth=4, capacity=3)
+    monkeypatch.setattr("app.api.endpoints.tweets.trending_tags", trending)
+    monkeypatch.setattr("app.api.endpoints.tags.trending_tags", trending)
+    return trending
+
+
+def test_extract_tags_and_mentions():
+    """Test hashtags are lowercased and deduplicated, emails are not mentions"""
+    content = "#Python and #python 3.13 at #PyCon_2026! mail me@example.com @bob @bob"
+
+    assert extract_tags(content) == ["python", "pycon_2026"]
+    assert extract_mentions(content) == ["bob"]
+    assert extract_tags("no##tags or a#b") == []
+
+
+@pytest.mark.anyio
+@pytest.mark.query_budget(6)
+async def test_create_tweet_indexes_tags_and_mentions(test_session, client, trending):
+    """Test creating a tweet stores its tags and mentions of existing users"""
+    user1 = User(id=1, name="user1")
+    user2 = User(id=2, name="user2")
+
+    test_session.add_all([user1, user2])
+    await test_session.commit()
+
+    response = await client.post(
+        "/api/tweets",
+        json={"tweet_data": "Hi @user2 and @nobody #Hello", "tweet_media_ids": []},
+        headers={"api-key": "user1"},
+    )
+    tweet_id = response.json()["tweet_id"]
+
+    tags = await test_session.execute(select(TweetTag.tag, TweetTag.tweet_id))
+    assert tags.all() == [("hello", tweet_id)]
+    mentions = await test_session.execute(
+        select(TweetMention.user_id, TweetMention.tweet_id)
+    )
+    assert mentions.all() == [(2, tweet_id)]
+
+
+@pytest.mark.anyio
+async def test_get_tag_timeline(test_session, client, trending):
+    """Test walking a tag timeline newest first with the max_id cursor"""
+    user = User(id=1, name="user1")
+
+    test_session.add(user)
+    await test_session.commit()
+    for content in ["#News one", "no tag", "#news two", "#NEWS three", "#other"]:
+        await client.post(
+            "/api/tweets",
+            json={"tweet_data": content, "tweet_media_ids": []},
+            headers={"api-key": "user1"},
+        )
+
+    response = await client.get("/api/tags/News", params={"limit": 2})
+    data = response.json()
+    assert [tweet["content"] for tweet in data["tweets"]] == [
+        "#NEWS three",
+        "#news two",
+    ]
+
+    response = await client.get(
+        "/api/tags/news", params={"limit": 2, "max_id": data["next_cursor"]}
+    )
+    data = response.json()
+    assert [tweet["content"] for tweet in data["tweets"]] == ["#News one"]
+    assert data["next_cursor"] is None
+
+
+@pytest.mark.anyio
+@pytest.mark.query_budget(0)
+async def test_get_trending_tags(test_session, client, trending):
+    """Test trending tags are served from memory, most used first"""
+    trending.record(["python", "news"])
+    trending.record(["python"])
+    trending.record(["trending"])
+
+    response = await client.get("/api/trending/tags", params={"limit": 2})
+
+    assert response.status_code == 200
+    assert response.json()["tags"] == [
+        {"tag": "python", "count": 2},
+        {"tag": "news", "count": 1},
+    ]
+
+
+@pytest.mark.anyio
+async def test_tag_named_trending_has_a_timeline(test_session, client, trending):
+    """Test the #trending hashtag is not shadowed by the trending tags list"""
+    test_session.add(User(id=1, name="user1"))
+    await test_session.commit()
+    await client.post(
+        "/api/tweets",
+        json={"tweet_data": "What is #trending", "tweet_media_ids": []},
+        headers={"api-key": "user1"},
+    )
+
+    response = await client.get("/api/tags/trending")
+
+    assert [tweet["content"] for tweet in response.json()["tweets"]] == [
+        "What is #trending"
+    ]
+
+
+def test_trending_window_slides():
+    """Test uses older than the window stop counting"""
+    trending = TrendingTags(window=3600, buckets=12, width=256, depth=4, now=NOW)
+    trending.record(["old"] * 5, now=NOW)
+    trending.record(["new"] * 3, now=NOW + 1800)
+
+    assert trending.top(10, now=NOW + 1800) == [("old", 5), ("new", 3)]
+    assert trending.top(10, now=NOW + 3600 + 300) == [("new", 3)]
+    assert trending.top(10, now=NOW + 2 * 3600 + 300) == []
+
+
+def test_trending_keeps_top_candidates():
+    """Test the candidate heap keeps the most used tags within its capacity"""
+    trending = TrendingTags(width=1024, depth=4, capacity=2, now=NOW)
+    for tag, uses in [("a", 3), ("b", 1), ("c", 2), ("d", 1), ("b", 4)]:
+        trending.record([tag] * uses, now=NOW)
+
+    assert trending.top(10, now=NOW) == [("b", 5), ("a", 3)]
+
+
+def test_trending_checkpoint_round_trip():
+    """Test a snapshot restores counts and candidates, and other settings are refused"""
+    trending = TrendingTags(width=256, depth=4, now=NOW)
+    trending.record(["python", "python", "news"], now=NOW)
+
+    restored = TrendingTags(width=256, depth=4, now=NOW)
+    assert restored.restore(trending.snapshot(), now=NOW + 60)
+    assert restored.top(10, now=NOW + 60) == [("python", 2), ("news", 1)]
+
+    assert not TrendingTags(width=128, depth=4).restore(trending.snapshot())
@@ -1,13 +1,20 @@
+from datetime import datetime, timedelta, timezone
+
 import pytest
 from sqlalchemy import select
 
 from app.models.follow import Follow
 from app.models.like import Like
+from app.models.media import Media
+from app.models.timeline import TimelineEntry
 from app.models.tweet import Tweet
 from app.models.user import User
+from app.reconcile_counters import reconcile_counters
+from app.services import ranking, timeline
 
 
 @pytest.mark.anyio
+@pytest.mark.query_budget(4)
 async def test_create_tweet(test_session, client):
     """Test creating a tweet"""
     user = User(id=1, name="user1")
@@ -33,6 +40,57 @@ async def test_create_tweet(test_session, client):
 
 
 @pytest.mark.anyio
+@pytest.mark.query_budget(5)
+async def test_create_tweet_with_media(test_session, client):
+    """Test creating a tweet attaches the author's uploaded media"""
+    user = User(id=1, name="user1")
+    medias = [
+        Media(id=i, file_path=f"uploads/{i}.png", uploader_id=1) for i in range(1, 5)
+    ]
+    test_session.add_all([user, *medias])
+    await test_session.commit()
+
+    response = await client.post(
+        "/api/tweets",
+        headers={"api-key": "user1"},
+        json={"tweet_data": "Album", "tweet_media_ids": [1, 2, 3, 4]},
+    )
+
+    assert response.status_code == 200
+    tweet_id = response.json()["tweet_id"]
+    attached = await test_session.execute(
+        select(Media.id).where(Media.tweet_id == tweet_id)
+    )
+    assert sorted(attached.scalars().all()) == [1, 2, 3, 4]
+
+
+@pytest.mark.anyio
+@pytest.mark.query_budget(3)
+async def test_create_tweet_with_foreign_media(test_session, client):
+    """Test attaching another user's media is rejected (should return 400)"""
+    user1 = User(id=1, name="user1")
+    user2 = User(id=2, name="user2")
+    own = Media(id=1, file_path="uploads/1.png", uploader_id=1)
+    foreign = Media(id=2, file_path="uploads/2.png", uploader_id=2)
+    test_session.add_all([user1, user2, own, foreign])
+    await test_session.commit()
+
+    response = await client.post(
+        "/api/tweets",
+        headers={"api-key": "user1"},
+        json={"tweet_data": "Not mine", "tweet_media_ids": [1, 2]},
+    )
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid media ids"
+    tweets = await test_session.execute(select(Tweet))
+    assert tweets.scalar() is None
+    media = await test_session.execute(select(Media).where(Media.tweet_id.is_not(None)))
+    assert media.scalar() is None
+
+
+@pytest.mark.anyio
+@pytest.mark.query_budget(9)
 async def test_get_user_feed(test_session, client):
     """Test retrieving user feed"""
     user1 = User(id=1, name="user1")
@@ -55,6 +113,419 @@ async def test_get_user_feed(test_session, client):
 
 
 @pytest.mark.anyio
+@pytest.mark.query_budget(10)
+async def test_get_user_feed_details(test_session, client):
+    """Test feed entries carry author, likes and attachments"""
+    user1 = User(id=1, name="user1")
+    user2 = User(id=2, name="user2")
+    tweet = Tweet(id=1, content="With media", author_id=2)
+    follow = Follow(follower_id=1, following_id=2)
+    like = Like(user_id=1, tweet_id=1)
+    media = Media(id=1, file_path="uploads/pic.png", tweet_id=1)
+
+    test_session.add_all([user1, user2, tweet, follow, like, media])
+    await test_session.commit()
+
+    response = await client.get("/api/tweets", headers={"api-key": "user1"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    (entry,) = response.json()["tweets"]
+    assert entry["author"] == {"id": 2, "name": "user2"}
+    assert entry["likes"] == [{"user_id": 1, "name": "user1"}]
+    assert entry["attachments"] == ["uploads/pic.png"]
+
+
+@pytest.mark.anyio
+@pytest.mark.query_budget(9)
+async def test_get_user_feed_pagination(test_session, client):
+    """Test walking the feed with limit and max_id cursors"""
+    user = User(id=1, name="user1")
+    tweets = [Tweet(id=i, content=f"Tweet {i}", author_id=1) for i in range(1, 6)]
+
+    test_session.add_all([user, *tweets])
+    await test_session.commit()
+
+    response = await client.get(
+        "/api/tweets", params={"limit": 2}, headers={"api-key": "user1"}
+    )
+    data = response.json()
+    assert [t["id"] for t in data["tweets"]] == [5, 4]
+    assert data["next_cursor"] == 4
+
+    response = await client.get(
+        "/api/tweets",
+        params={"limit": 2, "max_id": data["next_cursor"]},
+        headers={"api-key": "user1"},
+    )
+    data = response.json()
+    assert [t["id"] for t in data["tweets"]] == [3, 2]
+
+    response = await client.get(
+        "/api/tweets",
+        params={"limit": 2, "max_id": data["next_cursor"]},
+        headers={"api-key": "user1"},
+    )
+    data = response.json()
+    assert [t["id"] for t in data["tweets"]] == [1]
+    assert data["next_cursor"] is None
+
+    response = await client.get(
+        "/api/tweets", params={"since_id": 3}, headers={"api-key": "user1"}
+    )
+    assert [t["id"] for t in response.json()["tweets"]] == [5, 4]
+
+    response = await client.get(
+        "/api/tweets", params={"limit": 1, "full": True}, headers={"api-key": "user1"}
+    )
+    assert len(response.json()["tweets"]) == 5
+
+
+@pytest.mark.anyio
+async def test_get_user_feed_query_count_is_constant(
+    test_session, client, query_budget
+):
+    """Test a feed of 50 tweets with likes and media takes a fixed number of queries"""
+    users = [User(id=i, name=f"user{i}") for i in range(1, 6)]
+    follows = [Follow(follower_id=1, following_id=i) for i in range(2, 6)]
+    tweets = [
+        Tweet(id=i, content=f"Tweet {i}", author_id=2 + i % 4, likes_count=1)
+        for i in range(1, 51)
+    ]
+    likes = [Like(user_id=1 + i % 5, tweet_id=i) for i in range(1, 51)]
+    medias = [
+        Media(id=i, file_path=f"uploads/{i}.png", tweet_id=i) for i in range(1, 51)
+    ]
+
+    test_session.add_all(users + follows + tweets + likes + medias)
+    await test_session.commit()
+    await client.get("/api/tweets?full=true", headers={"api-key": "user1"})
+
+    with query_budget(5):
+        response = await client.get(
+            "/api/tweets?full=true", headers={"api-key": "user1"}
+        )
+
+    assert response.status_code == 200
+    assert len(response.json()["tweets"]) == 50
+
+
+@pytest.mark.anyio
+async def test_get_user_feed_not_modified(test_session, client, query_budget):
+    """Test an unchanged feed is answered with 304 after one version query"""
+    user1 = User(id=1, name="user1")
+    user2 = User(id=2, name="user2")
+    user3 = User(id=3, name="user3")
+    tweet = Tweet(id=1, content="Tweet 1", author_id=2)
+    follow = Follow(follower_id=1, following_id=2)
+
+    test_session.add_all([user1, user2, user3, tweet, follow])
+    await test_session.commit()
+    headers = {"api-key": "user1"}
+
+    response = await client.get("/api/tweets", headers=headers)
+    etag = response.headers["etag"]
+
+    with query_budget(2):
+        response = await client.get(
+            "/api/tweets", headers={**headers, "if-none-match": etag}
+        )
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+    assert response.content == b""
+
+    response = await client.get(
+        "/api/tweets?limit=5", headers={**headers, "if-none-match": etag}
+    )
+    assert response.status_code == 200
+
+    await client.post("/api/tweets/1/likes", headers={"api-key": "user3"})
+    response = await client.get(
+        "/api/tweets", headers={**headers, "if-none-match": etag}
+    )
+    assert response.status_code == 200
+    assert response.json()["tweets"][0]["likes_count"] == 1
+    assert response.headers["etag"] != etag
+
+
+@pytest.mark.anyio
+async def test_get_user_feed_etag_changes_on_writes(test_session, client):
+    """Test posting, following and unfollowing all change the feed's ETag"""
+    user1 = User(id=1, name="user1")
+    user2 = User(id=2, name="user2")
+
+    test_session.add_all([user1, user2])
+    await test_session.commit()
+    headers = {"api-key": "user1"}
+
+    async def feed_etag():
+        response = await client.get("/api/tweets", headers=headers)
+        return response.headers["etag"]
+
+    etags = [await feed_etag()]
+    await client.post("/api/follows/2", headers=headers)
+    etags.append(await feed_etag())
+    await client.post(
+        "/api/tweets",
+        json={"tweet_data": "Hello", "tweet_media_ids": []},
+        headers={"api-key": "user2"},
+    )
+    etags.append(await feed_etag())
+    await client.delete("/api/follows/2", headers=headers)
+    etags.append(await feed_etag())
+
+    assert len(set(etags)) == 4
+
+
+@pytest.mark.anyio
+async def test_get_user_feed_top_mode(test_session, client):
+    """Test the top feed ranks by likes, decayed by age and author audience"""
+    now = datetime.now(timezone.utc)
+    user1 = User(id=1, name="user1")
+    user2 = User(id=2, name="user2")
+    celebrity = User(id=3, name="celebrity", followers_count=99)
+    follows = [
+        Follow(follower_id=1, following_id=2),
+        Follow(follower_id=1, following_id=3),
+    ]
+    tweets = [
+        Tweet(id=1, content="Fresh", author_id=2, created_at=now - timedelta(hours=1)),
+        Tweet(
+            id=2,
+            content="Liked",
+            author_id=2,
+            likes_count=10,
+            created_at=now - timedelta(hours=3),
+        ),
+        Tweet(
+            id=3,
+            content="Old hit",
+            author_id=2,
+            likes_count=50,
+            created_at=now - timedelta(days=3),
+        ),
+        Tweet(
+            id=4,
+            content="Famous",
+            author_id=3,
+            likes_count=10,
+            created_at=now - timedelta(hours=1),
+        ),
+    ]
+
+    test_session.add_all([user1, user2, celebrity, *follows, *tweets])
+    await test_session.commit()
+    headers = {"api-key": "user1"}
+
+    response = await client.get(
+        "/api/tweets", params={"mode": "top", "limit": 2}, headers=headers
+    )
+    data = response.json()
+    assert [tweet["id"] for tweet in data["tweets"]] == [2, 4]
+    assert data["next_cursor"] == 2
+
+    response = await client.get(
+        "/api/tweets",
+        params={"mode": "top", "limit": 2, "offset": data["next_cursor"]},
+        headers=headers,
+    )
+    data = response.json()
+    assert [tweet["id"] for tweet in data["tweets"]] == [1, 3]
+    assert data["next_cursor"] is None
+
+    response = await client.get(
+        "/api/tweets", params={"mode": "top", "max_id": 3}, headers=headers
+    )
+    assert response.status_code == 400
+
+    response = await client.get("/api/tweets", params={"offset": 2}, headers=headers)
+    assert response.status_code == 400
+
+
+@pytest.mark.anyio
+async def test_get_user_feed_top_mode_is_cached(test_session, client, monkeypatch):
+    """Test a ranked feed is reused until activity in the feed changes its stamp"""
+    ranked = []
+
+    async def counting_rank_feed(db, user_id, stamp):
+        ranked.append(user_id)
+        return await ranking.rank_feed(db, user_id, stamp)
+
+    monkeypatch.setattr("app.api.endpoints.tweets.rank_feed", counting_rank_feed)
+    user1 = User(id=1, name="user1")
+    user2 = User(id=2, name="user2")
+    user3 = User(id=3, name="user3")
+    follow = Follow(follower_id=1, following_id=2)
+
+    test_session.add_all([user1, user2, user3, follow])
+    await test_session.commit()
+    for content in ("First", "Second"):
+        await client.post(
+            "/api/tweets",
+            json={"tweet_data": content, "tweet_media_ids": []},
+            headers={"api-key": "user2"},
+        )
+    headers = {"api-key": "user1"}
+
+    async def top_feed():
+        response = await client.get(
+            "/api/tweets", params={"mode": "top"}, headers=headers
+        )
+        return [tweet["content"] for tweet in response.json()["tweets"]]
+
+    assert await top_feed() == ["Second", "First"]
+    assert await top_feed() == ["Second", "First"]
+    assert len(ranked) == 1
+
+    await client.post("/api/tweets/1/likes", headers={"api-key": "user3"})
+    assert await top_feed() == ["First", "Second"]
+    assert len(ranked) == 2
+
+    monkeypatch.setattr(ranking.ranked_feed_cache, "ttl", 0)
+    ranking.ranked_feed_cache.clear()
+    await top_feed()
+    await top_feed()
+    assert len(ranked) == 4
+
+
+def test_rank_tweets_breaks_ties_by_recency():
+    """Test equally scored tweets are ranked newest first"""
+    candidates = [(1, 5, 0, 60.0), (3, 5, 0, 60.0), (2, 0, 0, 0.0), (4, 5, 0, -1.0)]
+
+    assert ranking.rank_tweets(candidates).tolist() == [4, 3, 1, 2]
+    assert ranking.rank_tweets([]).tolist() == []
+
+
+@pytest.mark.anyio
+@pytest.mark.query_budget(6)
+async def test_create_tweet_fans_out_to_followers(test_session, client):
+    """Test a new tweet lands in the author's and followers' timelines"""
+    user1 = User(id=1, name="user1")
+    user2 = User(id=2, name="user2")
+    user3 = User(id=3, name="user3")
+    follow = Follow(follower_id=2, following_id=1)
+
+    test_session.add_all([user1, user2, user3, follow])
+    await test_session.commit()
+
+    response = await client.post(
+        "/api/tweets",
+        headers={"api-key": "user1"},
+        json={"tweet_data": "Fan me out", "tweet_media_ids": []},
+    )
+    tweet_id = response.json()["tweet_id"]
+
+    entries = await test_session.execute(
+        select(TimelineEntry.user_id).where(TimelineEntry.tweet_id == tweet_id)
+    )
+    assert sorted(entries.scalars().all()) == [1, 2]
+
+    response = await client.delete(
+        f"/api/tweets/{tweet_id}", headers={"api-key": "user1"}
+    )
+    assert response.status_code == 200
+
+    entries = await test_session.execute(
+        select(TimelineEntry).where(TimelineEntry.tweet_id == tweet_id)
+    )
+    assert entries.scalar() is None
+
+
+@pytest.mark.anyio
+async def test_get_user_feed_rebuilds_timelines_written_before_materialization(
+    test_session, client
+):
+    """Test a timeline that got fan-out entries still gets its older history"""
+    user1 = User(id=1, name="user1")
+    user2 = User(id=2, name="user2")
+    follow = Follow(follower_id=1, following_id=2)
+    tweet = Tweet(id=1, content="old", author_id=2)
+
+    test_session.add_all([user1, user2, follow, tweet])
+    await test_session.commit()
+    await client.post(
+        "/api/tweets",
+        json={"tweet_data": "new", "tweet_media_ids": []},
+        headers={"api-key": "user2"},
+    )
+
+    response = await client.get("/api/tweets", headers={"api-key": "user1"})
+    assert [t["content"] for t in response.json()["tweets"]] == ["new", "old"]
+
+    await test_session.refresh(user1)
+    assert user1.timeline_built
+
+
+@pytest.mark.anyio
+@pytest.mark.query_budget(5)
+async def test_get_user_feed_merges_fan_out_on_read_authors(
+    test_session, client, monkeypatch
+):
+    """Test tweets of authors above the fan-out threshold are merged on read"""
+    monkeypatch.setattr(timeline, "FANOUT_FOLLOWER_THRESHOLD", 1)
+    user1 = User(id=1, name="user1", timeline_built=True)
+    celebrity = User(id=2, name="celebrity", followers_count=1)
+    follow = Follow(follower_id=1, following_id=2)
+
+    test_session.add_all([user1, celebrity, follow])
+    await test_session.commit()
+
+    for api_key in ("user1", "celebrity"):
+        await client.post(
+            "/api/tweets",
+            headers={"api-key": api_key},
+            json={"tweet_data": f"From {api_key}", "tweet_media_ids": []},
+        )
+
+    entries = await test_session.execute(
+        select(TimelineEntry).where(TimelineEntry.user_id == 1)
+    )
+    assert len(entries.scalars().all()) == 1
+
+    response = await client.get("/api/tweets", headers={"api-key": "user1"})
+    contents = [t["content"] for t in response.json()["tweets"]]
+    assert contents == ["From celebrity", "From user1"]
+
+
+@pytest.mark.anyio
+async def test_get_user_feed_keeps_authors_on_read_below_the_threshold(
+    test_session, client, monkeypatch
+):
+    """Test an author falling below the fan-out threshold stays in feeds"""
+    monkeypatch.setattr(timeline, "FANOUT_FOLLOWER_THRESHOLD", 2)
+    user1 = User(id=1, name="user1", timeline_built=True)
+    celebrity = User(id=2, name="celebrity", followers_count=2)
+    user3 = User(id=3, name="user3")
+    follows = [
+        Follow(follower_id=1, following_id=2),
+        Follow(follower_id=3, following_id=2),
+    ]
+
+    test_session.add_all([user1, celebrity, user3, *follows])
+    await test_session.commit()
+    await client.post(
+        "/api/tweets",
+        headers={"api-key": "celebrity"},
+        json={"tweet_data": "On read", "tweet_media_ids": []},
+    )
+    await client.delete("/api/follows/2", headers={"api-key": "user3"})
+    await client.post(
+        "/api/tweets",
+        headers={"api-key": "celebrity"},
+        json={"tweet_data": "Still on read", "tweet_media_ids": []},
+    )
+
+    await test_session.refresh(celebrity)
+    assert celebrity.followers_count == 1
+    assert celebrity.fan_out_on_read
+
+    response = await client.get("/api/tweets", headers={"api-key": "user1"})
+    contents = [t["content"] for t in response.json()["tweets"]]
+    assert contents == ["Still on read", "On read"]
+
+
+@pytest.mark.anyio
+@pytest.mark.query_budget(7)
 async def test_delete_tweet(test_session, client):
     """Test deleting a tweet"""
     user = User(id=1, name="user1")
@@ -74,6 +545,7 @@ async def test_delete_tweet(test_session, client):
 
 
 @pytest.mark.anyio
+@pytest.mark.query_budget(2)
 async def test_delete_tweet_not_author(test_session, client):
     """Test deleting someone else's tweet (should return 403)"""
     user1 = User(id=1, name="user1")
@@ -90,6 +562,7 @@ async def test_delete_tweet_not_author(test_session, client):
 
 
 @pytest.mark.anyio
+@pytest.mark.query_budget(4)
 async def test_like_tweet(test_session, client):
     """Test liking a tweet"""
     user = User(id=1, name="user1")
@@ -102,6 +575,8 @@ async def test_like_tweet(test_session, client):
 
     assert response.status_code == 200
     assert response.json()["message"] == "Tweet liked"
+    await test_session.refresh(tweet)
+    assert tweet.likes_count == 1
 
     # Check if like exists in DB
     like = await test_session.execute(
@@ -111,6 +586,7 @@ async def test_like_tweet(test_session, client):
 
 
 @pytest.mark.anyio
+@pytest.mark.query_budget(3)
 async def test_like_tweet_already_liked(test_session, client):
     """Test liking a tweet twice (should return 400)"""
     user = User(id=1, name="user1")
@@ -127,11 +603,54 @@ async def test_like_tweet_already_liked(test_session, client):
 
 
 @pytest.mark.anyio
+@pytest.mark.query_budget(3)
+async def test_like_tweet_not_found(test_session, client):
+    """Test liking a missing tweet (should return 404)"""
+    user = User(id=1, name="user1")
+    test_session.add(user)
+    await test_session.commit()
+
+    response = await client.post("/api/tweets/999/likes", headers={"api-key": "user1"})
+
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Tweet not found"
+
+
+@pytest.mark.anyio
+@pytest.mark.query_budget(5)
+async def test_like_tweets_batch(test_session, client):
+    """Test liking several tweets at once with per-tweet results"""
+    user = User(id=1, name="user1")
+    tweet1 = Tweet(id=1, content="Liked before", author_id=1, likes_count=1)
+    tweet2 = Tweet(id=2, content="Like me", author_id=1)
+    like = Like(user_id=1, tweet_id=1)
+
+    test_session.add_all([user, tweet1, tweet2, like])
+    await test_session.commit()
+
+    response = await client.post(
+        "/api/tweets/likes/batch",
+        headers={"api-key": "user1"},
+        json={"tweet_ids": [1, 2, 999]},
+    )
+
+    assert response.status_code == 200
+    assert response.json()["results"] == [
+        {"tweet_id": 1, "result": False, "detail": "Tweet already liked"},
+        {"tweet_id": 2, "result": True, "detail": None},
+        {"tweet_id": 999, "result": False, "detail": "Tweet not found"},
+    ]
+    await test_session.refresh(tweet2)
+    assert tweet2.likes_count == 1
+
+
+@pytest.mark.anyio
+@pytest.mark.query_budget(1)
 async def test_get_tweet_likes(test_session, client):
     """Test retrieving tweet likes count"""
     user1 = User(id=1, name="user1")
     user2 = User(id=2, name="user2")
-    tweet = Tweet(id=1, content="Popular tweet", author_id=1)
+    tweet = Tweet(id=1, content="Popular tweet", author_id=1, likes_count=2)
     like1 = Like(user_id=1, tweet_id=1)
     like2 = Like(user_id=2, tweet_id=1)
 
@@ -145,10 +664,11 @@ async def test_get_tweet_likes(test_session, client):
 
 
 @pytest.mark.anyio
+@pytest.mark.query_budget(6)
 async def test_unlike_tweet(test_session, client):
     """Test unliking a tweet"""
     user = User(id=1, name="user1")
-    tweet = Tweet(id=1, content="Unlike me", author_id=2)
+    tweet = Tweet(id=1, content="Unlike me", author_id=2, likes_count=1)
     like = Like(user_id=1, tweet_id=1)
 
     test_session.add_all([user, tweet, like])
@@ -158,6 +678,8 @@ async def test_unlike_tweet(test_session, client):
 
     assert response.status_code == 200
     assert response.json()["message"] == "Like removed"
+    await test_session.refresh(tweet)
+    assert tweet.likes_count == 0
 
     like = await test_session.execute(
         select(Like).where(Like.user_id == 1, Like.tweet_id == 1)
@@ -166,6 +688,7 @@ async def test_unlike_tweet(test_session, client):
 
 
 @pytest.mark.anyio
+@pytest.mark.query_budget(3)
 async def test_unlike_tweet_not_liked(test_session, client):
     """Test unliking a tweet that wasn't liked (should return 400)"""
     user = User(id=1, name="user1")
@@ -178,3 +701,119 @@ async def test_unlike_tweet_not_liked(test_session, client):
 
     assert response.status_code == 400
     assert response.json()["detail"] == "Like not found"
+
+
+@pytest.mark.anyio
+@pytest.mark.query_budget(1)
+async def test_get_tweet_likes_not_found(test_session, client):
+    """Test retrieving likes count of a missing tweet (should return 404)"""
+    response = await client.get("/api/tweets/999/likes")
+
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Tweet not found"
+
+
+@pytest.mark.anyio
+async def test_reconcile_counters(test_session):
+    """Test drifted like, follower and following counters are recomputed"""
+    user1 = User(id=1, name="user1", followers_count=5)
+    user2 = User(id=2, name="user2")
+    tweet = Tweet(id=1, content="Drifted", author_id=1, likes_count=7)
+    like = Like(user_id=2, tweet_id=1)
+    follow = Follow(follower_id=1, following_id=2)
+
+    test_session.add_all([user1, user2, tweet, like, follow])
+    await test_session.commit()
+
+    fixed = await reconcile_counters(test_session, batch_size=1)
+
+    assert fixed == {"likes_count": 1, "followers_count": 2, "following_count": 1}
+    await test_session.refresh(tweet)
+    await test_session.refresh(user1)
+    await test_session.refresh(user2)
+    assert tweet.likes_count == 1
+    assert (user1.followers_count, user2.followers_count) == (0, 1)
+    assert (user1.following_count, user2.following_count) == (1, 0)
+
+
+@pytest.mark.anyio
+@pytest.mark.query_budget(5)
+async def test_search_tweets(test_session, client):
+    """Test search returns tweets containing every word, best match first"""
+    user = User(id=1, name="user1")
+    tweets = [
+        Tweet(id=1, content="Coffee and a book", author_id=1),
+        Tweet(id=2, content="Morning coffee, then more coffee!", author_id=1),
+        Tweet(id=3, content="Tea in the morning", author_id=1),
+        Tweet(id=4, content="MORNING COFFEE", author_id=1),
+    ]
+
+    test_session.add_all([user, *tweets])
+    await test_session.commit()
+
+    response = await client.get("/api/tweets/search", params={"q": "morning coffee"})
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["result"] is True
+    assert [tweet["id"] for tweet in data["tweets"]] == [4, 2]
+    assert data["tweets"][0]["author"] == {"id": 1, "name": "user1"}
+    assert data["next_cursor"] is None
+
+
+@pytest.mark.anyio
+async def test_search_tweets_pagination(test_session, client):
+    """Test walking search results with the opaque cursor"""
+    user = User(id=1, name="user1")
+    tweets = [
+        Tweet(id=i, content=f"news {'update ' * (i % 3)}{i}", author_id=1)
+        for i in range(1, 8)
+    ]
+
+    test_session.add_all([user, *tweets])
+    await test_session.commit()
+
+    seen, cursor = [], None
+    while True:
+        params = {"q": "news", "limit": 3}
+        if cursor:
+            params["cursor"] = cursor
+        data = (await client.get("/api/tweets/search", params=params)).json()
+        seen += [tweet["id"] for tweet in data["tweets"]]
+        cursor = data["next_cursor"]
+        if cursor is None:
+            break
+
+    assert sorted(seen) == list(range(1, 8))
+    assert len(seen) == 7
+
+
+@pytest.mark.anyio
+async def test_search_tweets_follows_deletes(test_session, client):
+    """Test deleted tweets disappear from search results"""
+    user = User(id=1, name="user1")
+    tweet = Tweet(id=1, content="Launch day", author_id=1)
+
+    test_session.add_all([user, tweet])
+    await test_session.commit()
+
+    response = await client.get("/api/tweets/search", params={"q": "launch"})
+    assert [tweet["id"] for tweet in response.json()["tweets"]] == [1]
+
+    await client.delete("/api/tweets/1", headers={"api-key": "user1"})
+    response = await client.get("/api/tweets/search", params={"q": "launch"})
+    assert response.json()["tweets"] == []
+
+
+@pytest.mark.anyio
+async def test_search_tweets_invalid_input(test_session, client):
+    """Test search rejects bad cursors and ignores queries without words"""
+    response = await client.get(
+        "/api/tweets/search", params={"q": "news", "cursor": "not-a-cursor"}
+    )
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid cursor"
+
+    response = await client.get("/api/tweets/search", params={"q": '"*) OR ('})
+    assert response.status_code == 200
+    assert response.json()["tweets"] == []
@@ -5,28 +5,34 @@ from app.models.user import User
 
 
 @pytest.mark.anyio
+@pytest.mark.query_budget(3)
 async def test_get_current_user(test_session, client):
-    """Test retrieving the current user's profile"""
-    user1 = User(id=1, name="user1")
-    user2 = User(id=2, name="user2")
+    """Test retrieving the current user's profile with the following list"""
+    user1 = User(id=1, name="user1", following_count=1)
+    user2 = User(id=2, name="user2", followers_count=1)
     follow = Follow(follower_id=1, following_id=2)  # user1 follows user2
 
     test_session.add_all([user1, user2, follow])
     await test_session.commit()
 
-    response = await client.get("/api/users/me", headers={"api-key": "user1"})
+    response = await client.get(
+        "/api/users/me", params={"include": "following"}, headers={"api-key": "user1"}
+    )
 
     assert response.status_code == 200
     data = response.json()
     assert data["result"] is True
     assert data["user"]["id"] == 1
     assert data["user"]["name"] == "user1"
+    assert data["user"]["following_count"] == 1
+    assert data["user"]["followers"] is None
     assert len(data["user"]["following"]) == 1
     assert data["user"]["following"][0]["id"] == 2
     assert data["user"]["following"][0]["name"] == "user2"
 
 
 @pytest.mark.anyio
+@pytest.mark.query_budget(1)
 async def test_get_current_user_not_found(test_session, client):
     """Test retrieving current user when user does not exist (should return 404)"""
     response = await client.get(
@@ -38,15 +44,12 @@ async def test_get_current_user_not_found(test_session, client):
 
 
 @pytest.mark.anyio
+@pytest.mark.query_budget(1)
 async def test_get_user_profile(test_session, client):
-    """Test retrieving a user's profile"""
-    user1 = User(id=1, name="user1")
-    user2 = User(id=2, name="user2")
-    user3 = User(id=3, name="user3")
-    follow1 = Follow(follower_id=2, following_id=1)  # user2 follows user1
-    follow2 = Follow(follower_id=3, following_id=1)  # user3 follows user1
+    """Test a profile carries follow counts without loading the lists"""
+    user1 = User(id=1, name="user1", followers_count=2, following_count=1)
 
-    test_session.add_all([user1, user2, user3, follow1, follow2])
+    test_session.add(user1)
     await test_session.commit()
 
     response = await client.get("/api/users/1")
@@ -54,17 +57,156 @@ async def test_get_user_profile(test_session, client):
     assert response.status_code == 200
     data = response.json()
     assert data["result"] is True
-    assert data["user"]["id"] == 1
-    assert data["user"]["name"] == "user1"
-    assert len(data["user"]["followers"]) == 2
-    assert {"id": 2, "name": "user2"} in data["user"]["followers"]
-    assert {"id": 3, "name": "user3"} in data["user"]["followers"]
+    assert data["user"] == {
+        "id": 1,
+        "name": "user1",
+        "followers_count": 2,
+        "following_count": 1,
+        "followers": None,
+        "following": None,
+        "is_following": None,
+    }
+
+
+@pytest.mark.anyio
+@pytest.mark.query_budget(2)
+async def test_get_user_profile_is_following(test_session, client):
+    """Test a profile tells the caller whether they follow the user"""
+    user1 = User(id=1, name="user1", following_count=1)
+    user2 = User(id=2, name="user2", followers_count=1)
+    user3 = User(id=3, name="user3")
+    follow = Follow(follower_id=1, following_id=2)
+
+    test_session.add_all([user1, user2, user3, follow])
+    await test_session.commit()
+
+    response = await client.get("/api/users/2", headers={"api-key": "user1"})
+    assert response.json()["user"]["is_following"] is True
+    etag = response.headers["etag"]
+
+    response = await client.get(
+        "/api/users/2", headers={"api-key": "user3", "if-none-match": etag}
+    )
+    assert response.status_code == 200
+    assert response.json()["user"]["is_following"] is False
+
+
+@pytest.mark.anyio
+@pytest.mark.query_budget(3)
+async def test_get_user_profile_include(test_session, client, monkeypatch):
+    """Test include= embeds the follow lists up to the profile cap"""
+    monkeypatch.setattr("app.api.endpoints.users.PROFILE_LIST_LIMIT", 2)
+    users = [User(id=i, name=f"user{i}") for i in range(1, 5)]
+    follows = [Follow(follower_id=i, following_id=1) for i in (2, 3, 4)]
+    follows.append(Follow(follower_id=1, following_id=2))
+
+    test_session.add_all([*users, *follows])
+    await test_session.commit()
+
+    response = await client.get(
+        "/api/users/1", params={"include": "following,followers"}
+    )
+
+    assert response.status_code == 200
+    data = response.json()["user"]
+    assert data["followers"] == [
+        {"id": 4, "name": "user4"},
+        {"id": 3, "name": "user3"},
+    ]
+    assert data["following"] == [{"id": 2, "name": "user2"}]
+
+    response = await client.get("/api/users/1", params={"include": "likes"})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid include"
+
+
+@pytest.mark.anyio
+async def test_get_user_followers_and_following_pages(test_session, client):
+    """Test walking follower and following lists with limit and max_id"""
+    users = [User(id=i, name=f"user{i}") for i in range(1, 5)]
+    follows = [Follow(follower_id=i, following_id=1) for i in (2, 3, 4)]
+    follows.append(Follow(follower_id=1, following_id=3))
+
+    test_session.add_all([*users, *follows])
+    await test_session.commit()
+
+    response = await client.get("/api/users/1/followers", params={"limit": 2})
+    data = response.json()
+    assert [user["id"] for user in data["users"]] == [4, 3]
+    assert data["next_cursor"] == 3
+
+    response = await client.get(
+        "/api/users/1/followers", params={"limit": 2, "max_id": data["next_cursor"]}
+    )
+    data = response.json()
+    assert data["users"] == [{"id": 2, "name": "user2"}]
+    assert data["next_cursor"] is None
+
+    response = await client.get("/api/users/1/following")
+    assert response.json()["users"] == [{"id": 3, "name": "user3"}]
+
+    response = await client.get("/api/users/2/followers")
+    assert response.json() == {"result": True, "users": [], "next_cursor": None}
+
+    response = await client.get("/api/users/999/followers")
+    assert response.status_code == 404
 
 
 @pytest.mark.anyio
+@pytest.mark.query_budget(1)
 async def test_get_user_profile_not_found(test_session, client):
     """Test retrieving a user profile that does not exist (should return 404)"""
     response = await client.get("/api/users/999")
 
     assert response.status_code == 404
     assert response.json()["detail"] == "User not found"
+
+
+@pytest.mark.anyio
+@pytest.mark.query_budget(1)
+async def test_get_users_batch(test_session, client):
+    """Test looking up several users by id in one call"""
+    user1 = User(id=1, name="user1")
+    user2 = User(id=2, name="user2")
+
+    test_session.add_all([user1, user2])
+    await test_session.commit()
+
+    response = await client.get("/api/users", params={"ids": "2,999,1,2"})
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["users"] == [{"id": 2, "name": "user2"}, {"id": 1, "name": "user1"}]
+    assert data["not_found"] == [999]
+
+    response = await client.get("/api/users", params={"ids": "1,abc"})
+    assert response.status_code == 400
+
+
+@pytest.mark.anyio
+async def test_get_user_profile_not_modified(test_session, client, query_budget):
+    """Test an unchanged profile is answered with 304 until it gets a follower"""
+    user1 = User(id=1, name="user1")
+    user2 = User(id=2, name="user2")
+
+    test_session.add_all([user1, user2])
+    await test_session.commit()
+
+    response = await client.get("/api/users/1")
+    etag = response.headers["etag"]
+
+    with query_budget(1):
+        response = await client.get("/api/users/1", headers={"if-none-match": etag})
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+
+    response = await client.get(
+        "/api/users/me", headers={"api-key": "user1", "if-none-match": etag}
+    )
+    assert response.status_code == 304
+
+    await client.post("/api/follows/1", headers={"api-key": "user2"})
+    response = await client.get("/api/users/1", headers={"if-none-match": etag})
+    assert response.status_code == 200
+    assert response.json()["user"]["followers_count"] == 1
+    assert response.headers["etag"] != etag